@@ -29,6 +29,64 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000 # Используем порт по умолчанию 8000
 
+    # Кэш каталога аккаунтов в памяти процесса
+    LISTING_CACHE_TTL: int = 30  # секунды
+    LISTING_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # Снимок каталога для выгрузки (GET /api/v1/accounts/export)
+    SNAPSHOT_ENABLED: bool = True
+    SNAPSHOT_DIR: str = str(Path(__file__).parent.parent / "data" / "snapshots")
+    SNAPSHOT_REBUILD_INTERVAL: int = 3600  # полная пересборка, секунды
+    SNAPSHOT_APPEND_INTERVAL: int = 60  # дописывание изменений, секунды
+
+    # Проверка согласованности сводки по играм (GET /api/v1/games)
+    GAME_STATS_CHECK_INTERVAL: int = 600  # секунды
+    GAME_STATS_REFRESH_INTERVAL: float = 1  # отложенный пересчет после покупок, секунды
+
+    # Цены по играм в памяти (GET /api/v1/games/{game}/prices)
+    PRICE_INDEX_ENABLED: bool = True
+    PRICE_INDEX_REFRESH_INTERVAL: float = 5  # догон изменений по updated_at, секунды
+    PRICE_INDEX_RELOAD_INTERVAL: int = 900  # полная перезагрузка, секунды
+    PRICE_INDEX_SETTLE_SECONDS: float = 2.0  # более свежие строки догоняются позже, секунды
+
+    # Индекс похожих объявлений (GET /api/v1/accounts/{id}/similar)
+    SIMILAR_ENABLED: bool = True
+    SIMILAR_REFRESH_INTERVAL: int = 10  # догон изменений, секунды
+    SIMILAR_RELOAD_INTERVAL: int = 3600  # полная пересборка, секунды
+    SIMILAR_MAX_DELTA: int = 5000  # изменений до слияния сегментов
+    SIMILAR_SETTLE_SECONDS: float = 2.0  # более свежие строки догоняются позже, секунды
+
+    # Перенос проданных аккаунтов в accounts_archive
+    ARCHIVE_ENABLED: bool = True
+    ARCHIVE_INTERVAL: int = 3600  # секунды
+    ARCHIVE_BATCH_SIZE: int = 1000
+    ARCHIVE_BATCH_PAUSE: float = 0.1  # пауза между пачками, секунды
+    ARCHIVE_MIN_AGE_DAYS: int = 7  # сколько дней проданный аккаунт остается в каталоге
+
+    # Ответы на POST с заголовком Idempotency-Key (в памяти процесса)
+    IDEMPOTENCY_TTL: int = 24 * 3600  # секунды
+    IDEMPOTENCY_MAX_BYTES: int = 16 * 1024 * 1024
+
+    # Поиск пользователя по telegram_id (в памяти процесса)
+    USER_CACHE_MAX_ENTRIES: int = 100000
+    USER_CACHE_TTL: int = 300  # секунды
+    USER_CACHE_NEGATIVE_TTL: int = 30  # для несуществующих telegram_id, секунды
+
+    # Отмена сделок, зависших в статусе pending, и возврат аккаунтов в продажу
+    DEAL_EXPIRY_ENABLED: bool = True
+    DEAL_EXPIRY_INTERVAL: int = 60  # секунды
+    DEAL_PENDING_TTL_HOURS: float = 24
+    DEAL_EXPIRY_BATCH_SIZE: int = 500
+    DEAL_EXPIRY_BATCH_PAUSE: float = 0.1  # пауза между пачками, секунды
+
+    # Рейтинг продавцов: априорная оценка для сглаживания и сверка с отзывами
+    RATING_PRIOR_MEAN: float = 3.0
+    RATING_PRIOR_WEIGHT: float = 5.0  # вес априорной оценки в отзывах; 0 — без сглаживания
+    RATING_CHECK_INTERVAL: int = 3600  # секунды
+
+    # Лента событий сделок: задержка, после которой события считаются зафиксированными
+    DEAL_FEED_SETTLE_SECONDS: float = 2.0
+
     # Убираем Config, т.к. load_dotenv загружает переменные в окружение, откуда их читает BaseSettings
     # class Config:
     #     env_file = env_path
@@ -2,7 +2,20 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from ..models.account import Account
+from ..models.deal import Deal, Review
 from ..models.user import User
+from ..schemas.deal import DealEventType, DealStatus
+from ..services.deals import record_event
+from ..services.ratings import apply_review_rating
+from ..services.sellers import seller_summary
+
+# Завершенные сделки с отзывами: (продавец, покупатель, игра, цена, оценка).
+# Рейтинги тестовых продавцов получаются из этих отзывов: 4.5 и 5.0
+SEED_SALES = [
+    (1, 2, "Dota 2", 9000, 5),
+    (1, 2, "CS:GO", 11000, 4),
+    (2, 1, "World of Warcraft", 6000, 5),
+]
 
 
 async def seed_users(db: AsyncSession):
@@ -17,14 +30,12 @@ async def seed_users(db: AsyncSession):
         User(
             id=1,
             telegram_id=123456789,
-            username="testuser1",
-            rating=4.5
+            username="testuser1"
         ),
         User(
             id=2,
             telegram_id=987654321,
-            username="testuser2",
-            rating=5.0
+            username="testuser2"
         )
     ]
 
@@ -40,6 +51,7 @@ async def seed_accounts(db: AsyncSession):
         return
     
     print("Создание тестовых аккаунтов...")
+    users = {user.id: user for user in (await db.execute(select(User))).scalars()}
     test_accounts = [
         Account(
             title="Аккаунт Dota 2 Immortal",
@@ -47,7 +59,8 @@ async def seed_accounts(db: AsyncSession):
             description="Immortal rank, 6000 MMR, все герои открыты",
             price=15000,
             image_url="https://example.com/dota2.jpg",
-            seller={"id": 1, "name": "testuser1", "rating": 4.5},
+            seller_id=1,
+            seller=seller_summary(users[1]),
             is_available=True
         ),
         Account(
@@ -56,7 +69,8 @@ async def seed_accounts(db: AsyncSession):
             description="Global Elite, инвентарь на 50к",
             price=25000,
             image_url="https://example.com/csgo.jpg",
-            seller={"id": 1, "name": "testuser1", "rating": 4.5},
+            seller_id=1,
+            seller=seller_summary(users[1]),
             is_available=True
         ),
         Account(
@@ -65,7 +79,8 @@ async def seed_accounts(db: AsyncSession):
             description="70 level, полная экипировка",
             price=8000,
             image_url="https://example.com/wow.jpg",
-            seller={"id": 2, "name": "testuser2", "rating": 5.0},
+            seller_id=2,
+            seller=seller_summary(users[2]),
             is_available=True
         ),
         Account(
@@ -74,7 +89,8 @@ async def seed_accounts(db: AsyncSession):
             description="AR 60, все персонажи 90 уровня",
             price=45000,
             image_url="https://example.com/genshin.jpg",
-            seller={"id": 2, "name": "testuser2", "rating": 5.0},
+            seller_id=2,
+            seller=seller_summary(users[2]),
             is_available=True
         ),
         Account(
@@ -83,10 +99,62 @@ async def seed_accounts(db: AsyncSession):
             description="Топ 100 игрок, редкие скины",
             price=12000,
             image_url="https://example.com/pubg.jpg",
-            seller={"id": 1, "name": "testuser1", "rating": 4.5},
+            seller_id=1,
+            seller=seller_summary(users[1]),
             is_available=True
         )
     ]
 
     db.add_all(test_accounts)
-    await db.commit() 
\ No newline at end of file
+    await db.commit()
+
+
+async def seed_reviews(db: AsyncSession):
+    """
+    Заполняем базу завершенными сделками с отзывами
+
+    Рейтинг продавца не задается напрямую: каждый отзыв проходит через
+    apply_review_rating, как при записи через API, поэтому сумма, число
+    оценок и сводка в объявлениях согласованы с отзывами.
+    """
+    result = await db.execute(select(Review))
+    if result.scalars().first():
+        print("Отзывы уже существуют, сидинг отзывов не требуется.")
+        return
+
+    print("Создание тестовых сделок с отзывами...")
+    users = {user.id: user for user in (await db.execute(select(User))).scalars()}
+    for seller_id, buyer_id, game, price, rating in SEED_SALES:
+        account = Account(
+            title=f"Аккаунт {game} (продан)",
+            game=game,
+            description="Проданный аккаунт",
+            price=price,
+            seller_id=seller_id,
+            seller=seller_summary(users[seller_id]),
+            is_available=False,
+        )
+        db.add(account)
+        await db.flush()
+        deal = Deal(
+            seller_id=seller_id,
+            buyer_id=buyer_id,
+            account_id=account.id,
+            status=DealStatus.COMPLETED,
+        )
+        db.add(deal)
+        await db.flush()
+        record_event(db, deal.id, DealEventType.CREATED, to_status=DealStatus.PENDING)
+        record_event(
+            db,
+            deal.id,
+            DealEventType.COMPLETED,
+            from_status=DealStatus.PENDING,
+            to_status=DealStatus.COMPLETED,
+        )
+        db.add(Review(deal_id=deal.id, rating=rating))
+        record_event(db, deal.id, DealEventType.REVIEWED, payload={"rating": rating})
+        await apply_review_rating(db, deal.id, rating)
+
+    await db.commit()
+    print("Тестовые сделки с отзывами созданы.")
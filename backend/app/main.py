@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import traceback
 
@@ -6,10 +7,21 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from sqlalchemy import text
 
-from .database.config import engine, get_db
-from .database.seed import seed_accounts, seed_users
+from .config import settings
+from .database.config import AsyncSessionLocal, engine, get_db
+from .database.seed import seed_accounts, seed_reviews, seed_users
 from .models.base import Base
-from .routers import accounts, auth, deals, users
+from .routers import accounts, auth, deals, games, users
+from .services.archive import run_archiver
+from .services.deal_expiry import run_deal_expiry, sweep_metrics
+from .services.game_stats import run_game_stats_checker, run_game_stats_refresher
+from .services.idempotency import idempotency_middleware, idempotency_store
+from .services.listing_cache import listing_cache
+from .services.price_index import price_index, run_price_indexer
+from .services.ratings import run_seller_rating_checker
+from .services.similar import run_similarity_indexer, similarity_index
+from .services.snapshot import run_snapshot_scheduler
+from .services.user_cache import user_cache
 from .utils.telegram_auth import verify_telegram_auth
 
 # Настройка логирования
@@ -35,6 +47,10 @@ async def generic_exception_handler(request: Request, exc: Exception):
         content={"error": str(exc), "traceback": error_traceback},
     )
 
+# Повторы POST с тем же Idempotency-Key получают сохраненный ответ;
+# подключается до CORS, чтобы заголовки CORS добавлялись и к повторам
+app.middleware("http")(idempotency_middleware)
+
 # Настройка CORS
 app.add_middleware(
     CORSMiddleware,
@@ -54,6 +70,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Idempotent-Replayed"],
 )
 
 # Middleware для логирования запросов
@@ -114,6 +131,8 @@ async def startup_db_and_seed():
             await seed_users(db) # СНАЧАЛА пользователи
             logger.info("Запуск сидинга аккаунтов...")
             await seed_accounts(db) # ПОТОМ аккаунты
+            logger.info("Запуск сидинга отзывов...")
+            await seed_reviews(db)  # И сделки с отзывами
             break # Выходим из генератора сессий
         logger.info("Начальное заполнение базы данных завершено.")
 
@@ -123,11 +142,44 @@ async def startup_db_and_seed():
     logger.info("Инициализация БД завершена.")
 
 
+# Фоновые задачи процесса; отменяются при остановке приложения
+background_tasks = []
+
+
+@app.on_event("startup")
+async def start_background_jobs():
+    """Запуск фоновых задач"""
+    if settings.SNAPSHOT_ENABLED:
+        background_tasks.append(asyncio.create_task(run_snapshot_scheduler(AsyncSessionLocal)))
+    background_tasks.append(asyncio.create_task(run_game_stats_checker(AsyncSessionLocal)))
+    background_tasks.append(asyncio.create_task(run_game_stats_refresher(AsyncSessionLocal)))
+    background_tasks.append(asyncio.create_task(run_seller_rating_checker(AsyncSessionLocal)))
+    if settings.PRICE_INDEX_ENABLED:
+        background_tasks.append(asyncio.create_task(run_price_indexer(AsyncSessionLocal)))
+    if settings.SIMILAR_ENABLED:
+        background_tasks.append(asyncio.create_task(run_similarity_indexer(AsyncSessionLocal)))
+    if settings.ARCHIVE_ENABLED:
+        background_tasks.append(asyncio.create_task(run_archiver(AsyncSessionLocal)))
+    if settings.DEAL_EXPIRY_ENABLED:
+        background_tasks.append(asyncio.create_task(run_deal_expiry(AsyncSessionLocal)))
+    logger.info(f"Запущено фоновых задач: {len(background_tasks)}")
+
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    """Остановка фоновых задач"""
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+
+
 # Подключаем роутеры
 app.include_router(auth.router, prefix="/api/v1", tags=["auth"])
 app.include_router(users.router, prefix="/api/v1", tags=["users"])
 app.include_router(accounts.router, prefix="/api/v1", tags=["accounts"])
 app.include_router(deals.router, prefix="/api/v1", tags=["deals"])
+app.include_router(games.router, prefix="/api/v1", tags=["games"])
 
 
 @app.get("/")
@@ -174,6 +226,24 @@ async def test_db():
         logger.error(f"Database connection error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@app.get("/api/v1/cache/stats")
+async def cache_stats():
+    """Счетчики кэшей в памяти процесса"""
+    return {
+        "listings": listing_cache.stats(),
+        "price_index": price_index.stats(),
+        "similar": similarity_index.stats(),
+        "idempotency": idempotency_store.stats(),
+        "users": user_cache.stats(),
+    }
+
+
+@app.get("/api/v1/jobs/stats")
+async def jobs_stats():
+    """Метрики фоновых задач процесса"""
+    return {"deal_expiry": sweep_metrics.stats()}
+
 @app.get("/api/v1/test-tables")
 async def test_tables():
     """Тестовый эндпоинт для проверки таблиц в БД"""
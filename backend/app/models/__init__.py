@@ -1,8 +1,19 @@
 """Models package for TrustyTrade"""
 
-from .account import Account
+from .account import Account, ArchivedAccount
 from .base import Base, BaseModel
-from .deal import Deal, Review
+from .deal import Deal, DealEvent, Review
+from .game import GameStats
 from .user import User
 
-__all__ = ["Base", "BaseModel", "User", "Account", "Deal", "Review"]
+__all__ = [
+    "Base",
+    "BaseModel",
+    "User",
+    "Account",
+    "ArchivedAccount",
+    "Deal",
+    "DealEvent",
+    "Review",
+    "GameStats",
+]
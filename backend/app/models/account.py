@@ -1,7 +1,9 @@
-from sqlalchemy import Boolean, Column, Float, ForeignKey, Integer, String, JSON
-from sqlalchemy.orm import relationship
+from datetime import datetime
 
-from .base import BaseModel
+from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String, JSON
+from sqlalchemy.orm import relationship, validates
+
+from .base import Base, BaseModel
 
 
 class Account(BaseModel):
@@ -14,8 +16,82 @@ class Account(BaseModel):
     description = Column(String)
     price = Column(Float)
     image_url = Column(String, nullable=True)
+    seller_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    # Денормализованная сводка продавца {"id", "name", "rating"};
+    # при изменении пользователя обновляется массово по seller_id
     seller = Column(JSON, default=lambda: {"id": 0, "name": "Unknown", "rating": 0})
+    # Копия seller["rating"] для фильтрации по индексу
+    seller_rating = Column(Float, nullable=True)
     is_available = Column(Boolean, default=True)
 
     # Связи с другими таблицами
-    deals = relationship("Deal", back_populates="account")
+    deals = relationship(
+        "Deal", primaryjoin="Account.id == foreign(Deal.account_id)", back_populates="live_account"
+    )
+    seller_user = relationship("User", back_populates="listings")
+
+    __table_args__ = (
+        # Составные индексы под keyset-пагинацию каталога
+        Index("ix_accounts_created_at_id", "created_at", "id"),
+        Index("ix_accounts_price_id", "price", "id"),
+        # Водяной знак каталога для ETag списков
+        Index("ix_accounts_updated_at", "updated_at"),
+        # Объявления продавца
+        Index("ix_accounts_seller_id_created_at", "seller_id", "created_at", "id"),
+        # Фильтры и фасеты каталога
+        Index("ix_accounts_available_game_price", "is_available", "game", "price"),
+        Index(
+            "ix_accounts_seller_rating_available",
+            "seller_rating",
+            postgresql_where=is_available.is_(True),
+            sqlite_where=is_available.is_(True),
+        ),
+        # ID не переиспользуются (в SQLite без AUTOINCREMENT новый аккаунт
+        # получил бы ID удаленного последнего): архивные и живые ID не пересекаются,
+        # и Deal.account_id однозначно указывает на одну из таблиц.
+        # В PostgreSQL последовательность и так не выдает значения повторно.
+        # Существующие базы SQLite пересоздает миграция 1a7c3e9f5b20
+        {"sqlite_autoincrement": True},
+    )
+
+    @staticmethod
+    def rating_from_seller(seller):
+        """Значение seller_rating для JSON продавца"""
+        rating = (seller or {}).get("rating")
+        return float(rating) if rating is not None else None
+
+    @validates("seller")
+    def _sync_seller_rating(self, key, seller):
+        """Поддерживает seller_rating в соответствии с JSON продавца"""
+        self.seller_rating = self.rating_from_seller(seller)
+        return seller
+
+
+class ArchivedAccount(Base):
+    """
+    Проданный или удаленный аккаунт, перенесенный из accounts
+
+    Строка сохраняет id и поля исходного аккаунта, поэтому сделки
+    и отзывы продолжают ссылаться на нее через Deal.account_id.
+    """
+
+    __tablename__ = "accounts_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    title = Column(String)
+    game = Column(String)
+    description = Column(String)
+    price = Column(Float)
+    image_url = Column(String, nullable=True)
+    seller_id = Column(Integer, nullable=True, index=True)
+    seller = Column(JSON)
+    seller_rating = Column(Float, nullable=True)
+    is_available = Column(Boolean, default=False)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    archived_at = Column(DateTime, default=datetime.utcnow, index=True)
+    # "sold" — по завершенной сделке, "deleted" — удален продавцом,
+    # "removed" — удален без сделок: только отметка удаления для водяного
+    # знака каталога, через API не отдается
+    archive_reason = Column(String)
@@ -1,10 +1,12 @@
-from sqlalchemy import Column
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, DateTime
 from sqlalchemy import Enum as SQLAlchemyEnum
-from sqlalchemy import ForeignKey, Integer, String
+from sqlalchemy import ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
-from ..schemas.deal import DealStatus
-from .base import BaseModel
+from ..schemas.deal import DealEventType, DealStatus
+from .base import Base, BaseModel
 
 
 class Deal(BaseModel):
@@ -14,14 +16,50 @@ class Deal(BaseModel):
 
     seller_id = Column(Integer, ForeignKey("users.id"))
     buyer_id = Column(Integer, ForeignKey("users.id"))
-    account_id = Column(Integer, ForeignKey("accounts.id"))
+    # Без внешнего ключа: аккаунт может находиться в accounts или в accounts_archive.
+    # Сделка создается только на существующий аккаунт (open_deal), ID аккаунтов
+    # не переиспользуются, а архивная строка сохраняет ID исходной
+    account_id = Column(Integer, index=True)
     status = Column(SQLAlchemyEnum(DealStatus), default=DealStatus.PENDING)
 
     # Связи с другими таблицами
     seller = relationship("User", foreign_keys=[seller_id], back_populates="sales")
     buyer = relationship("User", foreign_keys=[buyer_id], back_populates="purchases")
-    account = relationship("Account", back_populates="deals")
+    # Аккаунт сделки — одна из двух связей; обе загружаются только явно
+    # (joinedload/selectinload), ленивая загрузка в async-коде запрещена
+    live_account = relationship(
+        "Account",
+        primaryjoin="foreign(Deal.account_id) == Account.id",
+        back_populates="deals",
+        lazy="raise_on_sql",
+    )
+    archived_account = relationship(
+        "ArchivedAccount",
+        primaryjoin="foreign(Deal.account_id) == ArchivedAccount.id",
+        viewonly=True,
+        lazy="raise_on_sql",
+    )
     review = relationship("Review", back_populates="deal", uselist=False)
+    events = relationship("DealEvent", back_populates="deal", order_by="DealEvent.id")
+
+    __table_args__ = (
+        # Покупки и продажи пользователя, новые первыми (keyset по created_at, id)
+        Index("ix_deals_buyer_id_created_at", "buyer_id", "created_at", "id"),
+        Index("ix_deals_seller_id_created_at", "seller_id", "created_at", "id"),
+        # Поиск зависших сделок для фоновой отмены
+        Index("ix_deals_status_created_at", "status", "created_at"),
+    )
+
+    @property
+    def account(self):
+        """
+        Аккаунт сделки: из каталога или из архива
+
+        live_account и archived_account должны быть загружены заранее
+        (см. DEAL_EXPANSIONS в services/deals.py), иначе обращение вызовет ошибку,
+        а не запрос к БД.
+        """
+        return self.live_account if self.live_account is not None else self.archived_account
 
 
 class Review(BaseModel):
@@ -35,3 +73,29 @@ class Review(BaseModel):
 
     # Связь с таблицей сделок
     deal = relationship("Deal", back_populates="review")
+
+
+class DealEvent(Base):
+    """
+    Событие сделки в журнале (только добавление)
+
+    id служит сквозным номером последовательности для ленты событий,
+    Deal.status — проекция последнего перехода.
+    """
+
+    __tablename__ = "deal_events"
+
+    id = Column(Integer, primary_key=True)
+    deal_id = Column(Integer, ForeignKey("deals.id"), nullable=False)
+    event_type = Column(SQLAlchemyEnum(DealEventType), nullable=False)
+    from_status = Column(SQLAlchemyEnum(DealStatus), nullable=True)
+    to_status = Column(SQLAlchemyEnum(DealStatus), nullable=True)
+    payload = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    deal = relationship("Deal", back_populates="events")
+
+    __table_args__ = (
+        # История одной сделки
+        Index("ix_deal_events_deal_id_id", "deal_id", "id"),
+    )
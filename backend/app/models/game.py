@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, Integer, String
+
+from .base import Base
+
+
+class GameStats(Base):
+    """
+    Сводка по игре: число доступных аккаунтов и диапазон цен
+
+    Поддерживается сервисом game_stats при изменении аккаунтов и сделок.
+    """
+
+    __tablename__ = "game_stats"
+
+    game = Column(String, primary_key=True)
+    available_count = Column(Integer, nullable=False, default=0)
+    min_price = Column(Float)
+    median_price = Column(Float)
+    max_price = Column(Float)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -3,6 +3,9 @@ from sqlalchemy.orm import relationship
 
 from .base import BaseModel
 
+# Возможные оценки в отзыве
+RATING_STARS = range(1, 6)
+
 
 class User(BaseModel):
     """Модель пользователя"""
@@ -11,8 +14,31 @@ class User(BaseModel):
 
     telegram_id = Column(Integer, unique=True, index=True)
     username = Column(String, index=True)
+    # Рейтинг продавца по отзывам на его сделки: сумма и число оценок
+    # обновляются в транзакции записи отзыва, rating и rating_smoothed —
+    # производные от них значения (см. services/ratings.py)
+    rating_sum = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_count = Column(Integer, nullable=False, default=0, server_default="0")
     rating = Column(Float, default=0.0)
+    rating_smoothed = Column(Float, nullable=True)
+    # Распределение оценок (число отзывов с 1..5 звездами) для сводки отзывов
+    rating_1_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_2_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_3_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_4_count = Column(Integer, nullable=False, default=0, server_default="0")
+    rating_5_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Связи с другими таблицами
     sales = relationship("Deal", foreign_keys="[Deal.seller_id]", back_populates="seller")
     purchases = relationship("Deal", foreign_keys="[Deal.buyer_id]", back_populates="buyer")
+    listings = relationship("Account", back_populates="seller_user")
+
+    @staticmethod
+    def histogram_column(stars: int):
+        """Колонка счетчика отзывов с данной оценкой"""
+        return getattr(User, f"rating_{stars}_count")
+
+    @property
+    def rating_histogram(self) -> dict:
+        """Число отзывов по оценкам {1: n1, ..., 5: n5}"""
+        return {stars: getattr(self, f"rating_{stars}_count") for stars in RATING_STARS}
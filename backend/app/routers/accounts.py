@@ -1,98 +1,435 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional, Union
+from urllib.parse import urlencode
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import or_, select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from ..database.config import get_db
-from ..models.account import Account
+from ..models.account import Account, ArchivedAccount
+from ..models.deal import Deal
 from ..schemas.account import Account as AccountSchema
-from ..schemas.account import AccountCreate, AccountUpdate
+from ..schemas.account import (
+    AccountBulkResult,
+    AccountBulkUpdate,
+    AccountBulkUpdateResult,
+    AccountCreate,
+    AccountFilter,
+    AccountPage,
+    AccountSort,
+    AccountUpdate,
+)
+from ..services.archive import move_to_archive
+from ..services.bulk_import import import_accounts, read_rows
+from ..services.catalog import catalog_watermark, count_facets, filter_conditions
+from ..services.game_stats import refresh_games, touches_stats
+from ..services.listing_cache import (
+    LIST_TAG,
+    account_tag,
+    invalidate_account,
+    invalidate_accounts,
+    listing_cache,
+)
+from ..services.price_index import price_index
+from ..services.search import build_search_query
+from ..services.sellers import resolve_seller
+from ..services.similar import similarity_index
+from ..services.snapshot import snapshot_path
+from ..services.versioning import update_versioned
+from ..utils.etag import (
+    etag_matches,
+    if_match_versions,
+    make_etag,
+    not_modified,
+    version_etag,
+)
+from ..utils.fields import encode_json, parse_fields, select_columns, sparse_rows
+from ..utils.file_response import RangeFileResponse
+from ..utils.pagination import apply_keyset, decode_cursor, encode_cursor
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# Ключи сортировки каталога: колонки составного индекса и направление
+ACCOUNT_SORT_KEYS = {
+    AccountSort.NEWEST: ((Account.created_at, Account.id), True),
+    AccountSort.PRICE: ((Account.price, Account.id), False),
+}
+
+_account_list = TypeAdapter(List[AccountSchema])
+
+
+def _json_response(body: bytes, etag: str) -> Response:
+    """Ответ с уже сериализованным JSON"""
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+
+def _accounts_query(fields: Optional[List[str]], extra: List[str] = ()):
+    """SELECT сущностей Account или только нужных колонок (?fields=)"""
+    if fields is None:
+        return select(Account)
+    return select(*select_columns(Account, fields, extra=["id", *extra]))
+
+
+async def _fetch_accounts(db: AsyncSession, query, fields: Optional[List[str]]) -> list:
+    """Сущности Account или строки с выбранными колонками"""
+    result = await db.execute(query)
+    return result.scalars().all() if fields is None else result.all()
+
+
+def _cached_response(request: Request, cached) -> Response:
+    """Ответ из кэша: 304, если клиент уже имеет эту версию"""
+    if etag_matches(request, cached.etag):
+        return not_modified(cached.etag)
+    return _json_response(cached.body, cached.etag)
+
 
 @router.post("/accounts", response_model=AccountSchema)
 async def create_account(account: AccountCreate, db: AsyncSession = Depends(get_db)):
     """Создание нового аккаунта"""
+    seller_id, seller = await resolve_seller(db, account.seller_id, account.seller)
     db_account = Account(
         title=account.title,
         game=account.game,
         description=account.description,
         price=account.price,
         image_url=account.image_url,
-        seller=account.seller,
+        seller_id=seller_id,
+        seller=seller,
     )
     db.add(db_account)
+    await db.flush()
+    await refresh_games(db, [db_account.game])
     await db.commit()
     await db.refresh(db_account)
+    invalidate_account()
     return db_account
 
 
-@router.get("/accounts", response_model=List[AccountSchema])
+@router.post("/accounts/bulk", response_model=AccountBulkResult)
+async def create_accounts_bulk(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Массовый импорт аккаунтов
+
+    Принимает JSON-массив объектов AccountCreate или NDJSON-поток
+    (Content-Type: application/x-ndjson). Возвращает ID созданных строк
+    и ошибки по номерам строк; ошибочные строки не прерывают импорт.
+    """
+    result = await import_accounts(db, read_rows(request))
+    if result.created:
+        invalidate_account()
+
+    logger.info(f"Bulk import: created={len(result.created)}, failed={len(result.errors)}")
+    return result
+
+
+@router.patch("/accounts/bulk", response_model=AccountBulkUpdateResult)
+async def update_accounts_bulk(payload: AccountBulkUpdate, db: AsyncSession = Depends(get_db)):
+    """
+    Массовое обновление аккаунтов
+
+    Применяет частичное AccountUpdate к списку ID и/или к фильтру каталога
+    одним UPDATE ... RETURNING id, без загрузки строк в ORM.
+    """
+    changes = payload.changes.model_dump(exclude_unset=True)
+    if not changes:
+        raise HTTPException(status_code=400, detail="No changes provided")
+    if payload.ids is None and payload.filter is None:
+        raise HTTPException(status_code=400, detail="Either ids or filter is required")
+
+    conditions = []
+    if payload.ids is not None:
+        conditions.append(Account.id.in_(payload.ids))
+    if payload.filter is not None:
+        filter_where = filter_conditions(payload.filter)
+        if not filter_where:
+            raise HTTPException(status_code=400, detail="Filter must not be empty")
+        conditions.extend(filter_where)
+
+    # updated_at и version задаем явно: от них зависят ETag и водяной знак каталога
+    values = dict(changes, updated_at=datetime.utcnow(), version=Account.version + 1)
+    if "seller_id" in changes or "seller" in changes:
+        values["seller_id"], values["seller"] = await resolve_seller(
+            db, changes.get("seller_id"), changes.get("seller")
+        )
+        values["seller_rating"] = Account.rating_from_seller(values["seller"])
+
+    # Игры, из которых аккаунты уходят при смене game, тоже нужно пересчитать
+    games = set()
+    if "game" in changes:
+        result = await db.execute(select(Account.game).where(*conditions).distinct())
+        games.update(result.scalars())
+
+    statement = (
+        update(Account)
+        .where(*conditions)
+        .values(**values)
+        .returning(Account.id, Account.game)
+        .execution_options(synchronize_session=False)
+    )
+    rows = (await db.execute(statement)).all()
+    ids = [row.id for row in rows]
+    if touches_stats(changes):
+        await refresh_games(db, games | {row.game for row in rows})
+    await db.commit()
+
+    if ids:
+        invalidate_accounts(ids, changes.keys())
+    logger.info(f"Bulk update: {len(ids)} accounts, fields={list(changes)}")
+    return {"updated": len(ids), "ids": ids}
+
+
+@router.get("/accounts", response_model=Union[AccountPage, List[AccountSchema]])
 async def read_accounts(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    sort: AccountSort = AccountSort.NEWEST,
+    facets: bool = False,
+    fields: Optional[str] = None,
+    filters: AccountFilter = Depends(),
     db: AsyncSession = Depends(get_db)
 ):
-    """Получение списка аккаунтов"""
-    logger.info(f"Executing read_accounts endpoint with skip={skip}, limit={limit}")
-    query = select(Account).offset(skip).limit(limit)
-    
+    """
+    Получение списка аккаунтов
+
+    Без параметров cursor и facets работает постраничный вывод через skip/limit.
+    Если передан cursor (пустой для первой страницы), используется keyset-пагинация
+    по (created_at, id) или (price, id) и возвращается страница с next_cursor.
+    При facets=true страница дополнительно содержит количество объявлений
+    по играм и ценовым диапазонам.
+    Параметр fields=id,title,price ограничивает выбираемые колонки и поля ответа.
+    Ответы кэшируются в памяти процесса как готовый JSON.
+    ETag строится по водяному знаку каталога, поэтому 304 стоит одного
+    агрегатного запроса по индексу, без выборки и сериализации страницы.
+    """
+    field_names = parse_fields(fields, AccountSchema)
+    query_string = urlencode(sorted(request.query_params.multi_items()))
+    key = "accounts?" + query_string
+    cached = listing_cache.get(key)
+    if cached is not None:
+        return _cached_response(request, cached)
+    version = listing_cache.version
+
+    # Водяной знак берем до выборки: если запись произойдет между ними,
+    # следующий запрос получит новый ETag и полный ответ
+    etag = make_etag("accounts", query_string, *await catalog_watermark(db))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    if cursor is not None or facets:
+        page = await _read_accounts_page(
+            cursor or "", sort, limit, filters, facets, field_names, db
+        )
+        accounts = page["items"]
+        if field_names is None:
+            body = AccountPage.model_validate(page, from_attributes=True).model_dump_json().encode()
+        else:
+            body = encode_json(dict(page, items=sparse_rows(accounts, field_names)))
+    else:
+        logger.info(f"Executing read_accounts endpoint with skip={skip}, limit={limit}")
+        query = _accounts_query(field_names).where(*filter_conditions(filters))
+        accounts = await _fetch_accounts(db, query.offset(skip).limit(limit), field_names)
+        logger.info(f"Found {len(accounts)} accounts")
+        if field_names is None:
+            body = _account_list.dump_json(
+                _account_list.validate_python(accounts, from_attributes=True)
+            )
+        else:
+            body = encode_json(sparse_rows(accounts, field_names))
+
+    tags = [LIST_TAG, *(account_tag(account.id) for account in accounts)]
+    listing_cache.set(key, body, tags, version=version, etag=etag)
+    return _json_response(body, etag)
+
+
+async def _read_accounts_page(
+    cursor: str,
+    sort: AccountSort,
+    limit: int,
+    filters: AccountFilter,
+    with_facets: bool,
+    fields: Optional[List[str]],
+    db: AsyncSession,
+) -> dict:
+    """Страница каталога по курсору"""
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="Limit must be positive")
+
+    columns, descending = ACCOUNT_SORT_KEYS[sort]
+    values = decode_cursor(cursor, sort.value) if cursor else None
+
+    # Запрашиваем на одну запись больше, чтобы понять, есть ли следующая страница
+    # Колонки ключа сортировки нужны для курсора, даже если их нет в fields
+    query = _accounts_query(fields, extra=[c.key for c in columns])
+    query = query.where(*filter_conditions(filters))
+    query = apply_keyset(query, columns, descending, values).limit(limit + 1)
+    accounts = await _fetch_accounts(db, query, fields)
+
+    next_cursor = None
+    if len(accounts) > limit:
+        accounts = accounts[:limit]
+        last = accounts[-1]
+        next_cursor = encode_cursor(sort.value, [getattr(last, c.key) for c in columns])
+
+    logger.info(f"Found {len(accounts)} accounts, sort={sort.value}")
+    page = {"items": accounts, "next_cursor": next_cursor}
+    if with_facets:
+        page["facets"] = await count_facets(db, filters)
+    return page
+
+
+@router.get("/accounts/search", response_model=List[AccountSchema])
+async def search_accounts(
+    q: str = Query(..., min_length=1, max_length=100),
+    skip: int = 0,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_db),
+):
+    """Полнотекстовый поиск аккаунтов по названию, игре и описанию"""
+    logger.info(f"Executing search_accounts endpoint with q={q!r}, skip={skip}, limit={limit}")
+    query = build_search_query(db.bind.dialect.name, q).offset(skip).limit(limit)
+
     result = await db.execute(query)
     accounts = result.scalars().all()
     logger.info(f"Found {len(accounts)} accounts")
     return accounts
 
 
+@router.get("/accounts/export")
+async def export_accounts(request: Request):
+    """
+    Выгрузка каталога: снимок доступных аккаунтов в gzip-сжатом NDJSON
+
+    Снимок собирается фоновой задачей; поддерживаются Range-запросы
+    для докачки. Строки, дописанные после полной сборки, содержат
+    измененные аккаунты — для каждого id действует последняя строка.
+    """
+    path = snapshot_path()
+    if not path.exists():
+        raise HTTPException(status_code=503, detail="Snapshot is not ready yet")
+    return RangeFileResponse(
+        str(path), request, media_type="application/gzip", filename=path.name
+    )
+
+
+async def _get_account_or_archived(db: AsyncSession, account_id: int):
+    """Аккаунт из каталога, а проданный или удаленный со сделками — из архива"""
+    account = await db.get(Account, account_id)
+    if account is None:
+        account = await db.get(ArchivedAccount, account_id)
+        if account is not None and account.archive_reason == "removed":
+            return None
+    return account
+
+
 @router.get("/accounts/{account_id}", response_model=AccountSchema)
-async def read_account(account_id: int, db: AsyncSession = Depends(get_db)):
+async def read_account(account_id: int, request: Request, db: AsyncSession = Depends(get_db)):
     """Получение информации об аккаунте по ID"""
-    query = select(Account).where(Account.id == account_id)
-    result = await db.execute(query)
-    account = result.scalar_one_or_none()
+    key = f"account:{account_id}"
+    cached = listing_cache.get(key)
+    if cached is not None:
+        return _cached_response(request, cached)
+    version = listing_cache.version
 
+    account = await _get_account_or_archived(db, account_id)
     if account is None:
         raise HTTPException(status_code=404, detail="Account not found")
-    return account
 
+    etag = version_etag(account.version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    body = AccountSchema.model_validate(account).model_dump_json().encode()
+    listing_cache.set(key, body, [account_tag(account_id)], version=version, etag=etag)
+    return _json_response(body, etag)
+
+
+@router.get("/accounts/{account_id}/similar", response_model=List[AccountSchema])
+async def read_similar_accounts(
+    account_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Похожие доступные аккаунты: альтернативы, если этот уже продан
+
+    Близость считается по названию, описанию и игре в индексе в памяти
+    процесса; сам индекс обновляется фоновой задачей.
+    """
+    account = await _get_account_or_archived(db, account_id)
+    if account is None:
+        raise HTTPException(status_code=404, detail="Account not found")
+    if not similarity_index.ready:
+        raise HTTPException(status_code=503, detail="Similarity index is not ready yet")
+
+    matches = similarity_index.similar(
+        account.title, account.description, account.game, limit, exclude=account_id
+    )
+    if not matches:
+        return []
 
-# @router.get("/accounts/user/{user_id}", response_model=List[AccountSchema]) # <-- Функция закомментирована, т.к. user_id удален из модели Account
-# async def read_user_accounts(user_id: int, db: AsyncSession = Depends(get_db)):
-#     """Получение списка аккаунтов пользователя"""
-#     query = select(Account).where(Account.user_id == user_id)
-#     result = await db.execute(query)
-#     accounts = result.scalars().all()
-#     return accounts
+    # Индекс может немного отставать, поэтому доступность перепроверяется по БД
+    ids = [match_id for match_id, _ in matches]
+    query = select(Account).where(Account.id.in_(ids), Account.is_available.is_(True))
+    found = {a.id: a for a in (await db.execute(query)).scalars()}
+    return [found[match_id] for match_id in ids if match_id in found]
 
 
 @router.put("/accounts/{account_id}", response_model=AccountSchema)
 async def update_account(
-    account_id: int, account: AccountUpdate, db: AsyncSession = Depends(get_db)
+    account_id: int,
+    account: AccountUpdate,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
 ):
-    """Обновление информации об аккаунте"""
-    query = select(Account).where(Account.id == account_id)
-    result = await db.execute(query)
-    db_account = result.scalar_one_or_none()
+    """
+    Обновление информации об аккаунте
 
-    if db_account is None:
-        raise HTTPException(status_code=404, detail="Account not found")
+    Одним условным UPDATE ... RETURNING; с If-Match: "<версия>" изменение
+    применяется, только если аккаунт не менялся, иначе 412.
+    """
+    versions = if_match_versions(request)
+    changes = account.model_dump(exclude_unset=True)
+    values = dict(changes)
+    if "seller_id" in changes or "seller" in changes:
+        values["seller_id"], values["seller"] = await resolve_seller(
+            db, changes.get("seller_id"), changes.get("seller")
+        )
+        values["seller_rating"] = Account.rating_from_seller(values["seller"])
 
-    # Обновляем только предоставленные поля
-    for field, value in account.model_dump(exclude_unset=True).items():
-        setattr(db_account, field, value)
+    # Игру, из которой аккаунт уходит, тоже нужно пересчитать
+    games = set()
+    if "game" in changes:
+        games.add(await db.scalar(select(Account.game).where(Account.id == account_id)))
 
+    db_account = await update_versioned(
+        db, Account, account_id, values, versions, not_found="Account not found"
+    )
+    if touches_stats(changes):
+        await refresh_games(db, games | {db_account.game})
     await db.commit()
-    await db.refresh(db_account)
+    if changes:
+        invalidate_account(account_id, changes.keys())
+    response.headers["ETag"] = version_etag(db_account.version)
     return db_account
 
 
 @router.delete("/accounts/{account_id}")
 async def delete_account(account_id: int, db: AsyncSession = Depends(get_db)):
-    """Удаление аккаунта"""
+    """
+    Удаление аккаунта
+
+    Аккаунт переносится в архив: история его сделок сохраняется, а удаление
+    видно водяному знаку каталога по времени архивации. Аккаунт без сделок
+    остается в архиве только отметкой удаления ("removed").
+    """
     query = select(Account).where(Account.id == account_id)
     result = await db.execute(query)
     account = result.scalar_one_or_none()
@@ -100,6 +437,11 @@ async def delete_account(account_id: int, db: AsyncSession = Depends(get_db)):
     if account is None:
         raise HTTPException(status_code=404, detail="Account not found")
 
-    await db.delete(account)
+    has_deals = await db.scalar(select(Deal.id).where(Deal.account_id == account_id).limit(1))
+    await move_to_archive(db, [account_id], "deleted" if has_deals is not None else "removed")
+    await refresh_games(db, [account.game])
     await db.commit()
+    invalidate_account(account_id)
+    price_index.discard(account_id)
+    similarity_index.discard(account_id)
     return {"ok": True}
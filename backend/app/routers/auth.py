@@ -6,6 +6,10 @@ from ..auth.telegram import verify_telegram_auth
 from ..database.config import get_db
 from ..models.user import User
 from ..schemas.auth import TelegramAuth
+from ..schemas.user import User as UserSchema
+from ..services.listing_cache import invalidate_accounts
+from ..services.sellers import refresh_seller_summaries
+from ..services.user_cache import get_user_by_telegram, invalidate_users
 
 router = APIRouter()
 
@@ -17,24 +21,37 @@ async def telegram_auth(
     """
     Авторизация через Telegram
 
-    При успешной авторизации создает или обновляет пользователя в базе
+    При успешной авторизации создает или обновляет пользователя в базе.
+    Повторный вход без изменений обслуживается из кэша пользователей
+    без запросов к БД.
     """
+    username = auth_data.username or auth_data.first_name
+    cached = await get_user_by_telegram(db, auth_data.id)
+    if cached is not None and cached["username"] == username:
+        return {"user": cached, "message": "Successfully authenticated"}
+
     # Ищем пользователя по telegram_id
     query = select(User).where(User.telegram_id == auth_data.id)
     result = await db.execute(query)
     user = result.scalar_one_or_none()
 
+    account_ids = []
     if user:
         # Обновляем существующего пользователя
-        user.username = auth_data.username or auth_data.first_name
+        if user.username != username:
+            user.username = username
+            account_ids = await refresh_seller_summaries(db, user)
     else:
         # Создаем нового пользователя
-        user = User(
-            telegram_id=auth_data.id, username=auth_data.username or auth_data.first_name, rating=0
-        )
+        user = User(telegram_id=auth_data.id, username=username)
         db.add(user)
 
     await db.commit()
     await db.refresh(user)
+    invalidate_users([user.id], [user.telegram_id])
+    if account_ids:
+        invalidate_accounts(account_ids, ["seller"])
 
-    return {"user": user, "message": "Successfully authenticated"}
+    # Тот же вид, что и у ответа из кэша: только поля схемы пользователя
+    user_data = UserSchema.model_validate(user).model_dump(mode="json")
+    return {"user": user_data, "message": "Successfully authenticated"}
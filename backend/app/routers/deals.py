@@ -1,16 +1,49 @@
-from typing import List
+from datetime import datetime, timedelta
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..config import settings
 from ..database.config import get_db
-from ..models.account import Account
-from ..models.deal import Deal, Review
+from ..models.deal import Deal, DealEvent, Review
 from ..schemas.deal import Deal as DealSchema
-from ..schemas.deal import DealCreate, DealStatus, DealUpdate
+from ..schemas.deal import (
+    DealBulkTransition,
+    DealBulkTransitionResult,
+    DealCreate,
+    DealEventFeed,
+    DealEventType,
+    DealStatus,
+    DealTransitionOutcome,
+    DealUpdate,
+)
+from ..schemas.deal import DealEvent as DealEventSchema
 from ..schemas.deal import Review as ReviewSchema
 from ..schemas.deal import ReviewCreate, ReviewUpdate
+from ..services.deals import (
+    DEAL_EXPANSIONS,
+    expand_deal,
+    expand_options,
+    open_deal,
+    record_event,
+    transition_deal,
+    transition_deals,
+)
+from ..services.game_stats import mark_games_dirty
+from ..services.listing_cache import invalidate_account, invalidate_accounts
+from ..services.ratings import apply_review_rating
+from ..services.user_cache import invalidate_users
+from ..services.versioning import update_versioned
+from ..utils.etag import (
+    etag_matches,
+    if_match_versions,
+    make_etag,
+    not_modified,
+    version_etag,
+)
+from ..utils.fields import encode_json, parse_expand, parse_fields, select_columns, sparse_response
 
 router = APIRouter()
 
@@ -18,82 +51,177 @@ router = APIRouter()
 @router.post("/deals/", response_model=DealSchema)
 async def create_deal(deal: DealCreate, db: AsyncSession = Depends(get_db)):
     """Создание новой сделки"""
-    # Проверяем доступность аккаунта
-    query = select(Account).where(Account.id == deal.account_id)
-    result = await db.execute(query)
-    account = result.scalar_one_or_none()
-
-    if account is None:
-        raise HTTPException(status_code=404, detail="Account not found")
-    if not account.is_available:
-        raise HTTPException(status_code=400, detail="Account is not available")
-
-    # Создаем сделку
-    db_deal = Deal(
-        seller_id=deal.seller_id,
-        buyer_id=deal.buyer_id,
-        account_id=deal.account_id,
-        status=deal.status,
-    )
-
-    # Помечаем аккаунт как недоступный
-    account.is_available = False
-
-    db.add(db_deal)
+    db_deal, game = await open_deal(db, deal)
     await db.commit()
-    await db.refresh(db_deal)
+    invalidate_account(deal.account_id, ["is_available"])
+    mark_games_dirty([game])
     return db_deal
 
 
 @router.get("/deals/", response_model=List[DealSchema])
 async def read_deals(
-    skip: int = 0, limit: int = 100, status: DealStatus = None, db: AsyncSession = Depends(get_db)
+    skip: int = 0,
+    limit: int = 100,
+    status: DealStatus = None,
+    fields: Optional[str] = None,
+    expand: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
 ):
-    """Получение списка сделок с фильтрацией по статусу"""
-    query = select(Deal)
+    """
+    Получение списка сделок с фильтрацией по статусу
+
+    Параметр fields=id,status ограничивает выбираемые колонки и поля ответа.
+    Параметр expand=account,seller,buyer,review добавляет в ответ связанные
+    объекты; они загружаются фиксированным числом запросов на всю страницу.
+    """
+    field_names = parse_fields(fields, DealSchema)
+    expand_names = parse_expand(expand, DEAL_EXPANSIONS)
+    if field_names is not None and expand_names:
+        raise HTTPException(status_code=400, detail="fields and expand cannot be combined")
+
+    query = select(Deal) if field_names is None else select(*select_columns(Deal, field_names))
     if status:
         query = query.where(Deal.status == status)
     query = query.offset(skip).limit(limit)
+    if expand_names:
+        query = query.options(*expand_options(expand_names))
     result = await db.execute(query)
-    deals = result.scalars().all()
+    if field_names is not None:
+        return sparse_response(result.all(), field_names)
+
+    deals = result.unique().scalars().all()
+    if expand_names:
+        content = [expand_deal(deal, expand_names) for deal in deals]
+        return Response(content=encode_json(content), media_type="application/json")
     return deals
 
 
+@router.patch("/deals/bulk", response_model=DealBulkTransitionResult)
+async def update_deals_bulk(payload: DealBulkTransition, db: AsyncSession = Depends(get_db)):
+    """
+    Массовый перевод сделок в новый статус (завершение или отмена)
+
+    Переходы проверяются по правилам TRANSITIONS для всего набора сразу,
+    сделки, события и аккаунты обновляются несколькими set-based запросами
+    в одной транзакции. Недопустимые переходы и отсутствующие сделки
+    не прерывают операцию и возвращаются в итогах по сделкам.
+    """
+    results, released = await transition_deals(db, payload.ids, payload.status)
+    await db.commit()
+
+    if released:
+        invalidate_accounts(released, ["is_available"])
+    updated = sum(result["outcome"] == DealTransitionOutcome.UPDATED for result in results)
+    return {"updated": updated, "results": results}
+
+
+@router.get("/deals/events/feed", response_model=DealEventFeed)
+async def read_deal_events_feed(
+    after: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Лента событий всех сделок по возрастанию номера
+
+    Клиент передает в after последний полученный номер (next_after).
+    Последние DEAL_FEED_SETTLE_SECONDS секунд не отдаются: номера выдаются
+    при вставке, и транзакция с меньшим номером может зафиксироваться позже.
+    """
+    settled = datetime.utcnow() - timedelta(seconds=settings.DEAL_FEED_SETTLE_SECONDS)
+    query = (
+        select(DealEvent)
+        .where(DealEvent.id > after, DealEvent.created_at <= settled)
+        .order_by(DealEvent.id)
+        .limit(limit)
+    )
+    events = (await db.execute(query)).scalars().all()
+    return {"items": events, "next_after": events[-1].id if events else after}
+
+
+@router.get("/deals/{deal_id}/events", response_model=List[DealEventSchema])
+async def read_deal_events(deal_id: int, db: AsyncSession = Depends(get_db)):
+    """История сделки: события по порядку"""
+    query = select(DealEvent).where(DealEvent.deal_id == deal_id).order_by(DealEvent.id)
+    events = (await db.execute(query)).scalars().all()
+    if not events and await db.get(Deal, deal_id) is None:
+        raise HTTPException(status_code=404, detail="Deal not found")
+    return events
+
+
 @router.get("/deals/{deal_id}", response_model=DealSchema)
-async def read_deal(deal_id: int, db: AsyncSession = Depends(get_db)):
-    """Получение информации о сделке по ID"""
-    query = select(Deal).where(Deal.id == deal_id)
+async def read_deal(
+    deal_id: int,
+    request: Request,
+    response: Response,
+    expand: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Получение информации о сделке по ID
+
+    Параметр expand=account,seller,buyer,review добавляет связанные объекты.
+    """
+    expand_names = parse_expand(expand, DEAL_EXPANSIONS)
+    query = select(Deal).where(Deal.id == deal_id).options(*expand_options(expand_names))
     result = await db.execute(query)
-    deal = result.scalar_one_or_none()
+    deal = result.unique().scalar_one_or_none()
 
     if deal is None:
         raise HTTPException(status_code=404, detail="Deal not found")
+
+    # Связанные объекты меняются независимо от сделки, поэтому входят в ETag
+    # (такой ETag не подходит для If-Match: условие проверяется по версии сделки)
+    related = [getattr(deal, name) for name in expand_names]
+    etag = version_etag(deal.version)
+    if expand_names:
+        etag = make_etag(
+            "deal",
+            deal.id,
+            deal.version,
+            *expand_names,
+            *[obj.version if obj is not None else None for obj in related],
+        )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    if expand_names:
+        return Response(
+            content=encode_json(expand_deal(deal, expand_names)),
+            media_type="application/json",
+            headers={"ETag": etag},
+        )
+    response.headers["ETag"] = etag
     return deal
 
 
 @router.put("/deals/{deal_id}", response_model=DealSchema)
-async def update_deal(deal_id: int, deal: DealUpdate, db: AsyncSession = Depends(get_db)):
-    """Обновление статуса сделки"""
-    query = select(Deal).where(Deal.id == deal_id)
-    result = await db.execute(query)
-    db_deal = result.scalar_one_or_none()
-
-    if db_deal is None:
-        raise HTTPException(status_code=404, detail="Deal not found")
-
-    # Обновляем статус
+async def update_deal(
+    deal_id: int,
+    deal: DealUpdate,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Обновление статуса сделки
+
+    Статус меняется только допустимым переходом, с записью события.
+    С If-Match: "<версия>" переход применяется, только если сделка не менялась.
+    """
+    versions = if_match_versions(request)
+    changed = False
     if deal.status:
-        db_deal.status = deal.status
-        # Если сделка отменена, возвращаем аккаунт в доступные
-        if deal.status == DealStatus.CANCELLED:
-            account_query = select(Account).where(Account.id == db_deal.account_id)
-            account_result = await db.execute(account_query)
-            account = account_result.scalar_one_or_none()
-            if account:
-                account.is_available = True
+        db_deal, changed = await transition_deal(db, deal_id, deal.status, versions)
+    else:
+        db_deal = await update_versioned(
+            db, Deal, deal_id, {}, versions, not_found="Deal not found"
+        )
 
     await db.commit()
-    await db.refresh(db_deal)
+    if changed and deal.status == DealStatus.CANCELLED:
+        invalidate_account(db_deal.account_id, ["is_available"])
+    response.headers["ETag"] = version_etag(db_deal.version)
     return db_deal
 
 
@@ -122,8 +250,15 @@ async def create_review(deal_id: int, review: ReviewCreate, db: AsyncSession = D
     db_review = Review(deal_id=deal_id, rating=review.rating, comment=review.comment)
 
     db.add(db_review)
+    record_event(db, deal_id, DealEventType.REVIEWED, payload={"rating": review.rating})
+    # Рейтинг продавца обновляется в той же транзакции, что и отзыв
+    seller_id, account_ids = await apply_review_rating(db, deal_id, review.rating)
     await db.commit()
     await db.refresh(db_review)
+    if seller_id is not None:
+        invalidate_users([seller_id])
+    if account_ids:
+        invalidate_accounts(account_ids, ["seller"])
     return db_review
 
 
@@ -140,19 +275,53 @@ async def read_deal_review(deal_id: int, db: AsyncSession = Depends(get_db)):
 
 
 @router.put("/deals/{deal_id}/review/", response_model=ReviewSchema)
-async def update_review(deal_id: int, review: ReviewUpdate, db: AsyncSession = Depends(get_db)):
-    """Обновление отзыва"""
-    query = select(Review).where(Review.deal_id == deal_id)
-    result = await db.execute(query)
-    db_review = result.scalar_one_or_none()
-
-    if db_review is None:
-        raise HTTPException(status_code=404, detail="Review not found")
+async def update_review(
+    deal_id: int,
+    review: ReviewUpdate,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Обновление отзыва
 
+    Одним условным UPDATE ... RETURNING; с If-Match: "<версия>" изменение
+    применяется, только если отзыв не менялся, иначе 412.
+    """
+    versions = if_match_versions(request)
     # Обновляем только предоставленные поля
-    for field, value in review.dict(exclude_unset=True).items():
-        setattr(db_review, field, value)
-
+    changes = review.model_dump(exclude_unset=True)
+
+    # Для рейтинга продавца нужна прежняя оценка: изменение применяется
+    # только к прочитанной версии отзыва, иначе разница была бы неверной
+    old_rating = None
+    if "rating" in changes:
+        query = select(Review.rating, Review.version).where(Review.deal_id == deal_id)
+        current = (await db.execute(query)).first()
+        if current is None:
+            raise HTTPException(status_code=404, detail="Review not found")
+        if versions is not None and current.version not in versions:
+            raise HTTPException(status_code=412, detail="Resource was modified (If-Match failed)")
+        old_rating, versions = current.rating, [current.version]
+
+    db_review = await update_versioned(
+        db,
+        Review,
+        deal_id,
+        changes,
+        versions,
+        not_found="Review not found",
+        key=Review.deal_id,
+    )
+    seller_id, account_ids = None, []
+    if old_rating is not None:
+        seller_id, account_ids = await apply_review_rating(
+            db, deal_id, db_review.rating, old_rating
+        )
     await db.commit()
-    await db.refresh(db_review)
+    if seller_id is not None:
+        invalidate_users([seller_id])
+    if account_ids:
+        invalidate_accounts(account_ids, ["seller"])
+    response.headers["ETag"] = version_etag(db_review.version)
     return db_review
@@ -0,0 +1,55 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database.config import get_db
+from ..models.game import GameStats
+from ..schemas.game import GameStats as GameStatsSchema
+from ..schemas.game import GamePriceStats, GameStatsCheck
+from ..services.game_stats import check_game_stats
+from ..services.price_index import price_index
+from ..utils.price_index import price_stats
+
+router = APIRouter()
+
+
+@router.get("/games", response_model=List[GameStatsSchema])
+async def read_games(db: AsyncSession = Depends(get_db)):
+    """
+    Список игр с числом доступных аккаунтов и ценами (min, медиана, max)
+
+    Читается из сводной таблицы game_stats, которая обновляется
+    при изменении аккаунтов и сделок.
+    """
+    query = select(GameStats).order_by(GameStats.available_count.desc(), GameStats.game)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+@router.get("/games/{game}/prices", response_model=GamePriceStats)
+async def read_game_prices(
+    game: str,
+    bins: int = Query(20, ge=1, le=100),
+    price: Optional[float] = Query(None, ge=0),
+):
+    """
+    Распределение цен игры: процентили, гистограмма и выбросы
+
+    Считается по ценам в памяти процесса (price_index), без сортировки в БД;
+    сам индекс обновляется фоновой задачей.
+    С параметром price возвращает процентиль этой цены и признак выброса.
+    """
+    if not price_index.ready:
+        raise HTTPException(status_code=503, detail="Price index is not ready yet")
+    prices = price_index.get(game)
+    if prices is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return dict(price_stats(prices.prices, bins, price), game=game)
+
+
+@router.post("/games/check", response_model=GameStatsCheck)
+async def check_games(repair: bool = False, db: AsyncSession = Depends(get_db)):
+    """Сверка сводки по играм с аккаунтами; repair=true исправляет расхождения"""
+    return await check_game_stats(db, repair=repair)
@@ -1,13 +1,26 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database.config import get_db
+from ..models.account import Account, ArchivedAccount
+from ..models.deal import Deal, Review
 from ..models.user import User
+from ..schemas.account import SellerAccountPage
+from ..schemas.deal import DealPage, DealRole, DealStatus
 from ..schemas.user import User as UserSchema
-from ..schemas.user import UserCreate, UserUpdate
+from ..schemas.user import SellerRatingCheck, SellerReviewPage, UserCreate, UserUpdate
+from ..services.listing_cache import invalidate_accounts
+from ..services.ratings import check_seller_ratings
+from ..services.sellers import refresh_seller_summaries, summary_changed
+from ..services.user_cache import get_user_by_telegram, invalidate_users
+from ..services.versioning import update_versioned
+from ..utils.etag import etag_matches, if_match_versions, not_modified, version_etag
+from ..utils.fields import parse_fields, select_columns, sparse_response
+from ..utils.pagination import apply_keyset, decode_cursor, encode_cursor
 
 router = APIRouter()
 
@@ -23,24 +36,44 @@ async def create_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     if existing_user:
         raise HTTPException(status_code=400, detail="User already exists")
 
-    db_user = User(telegram_id=user.telegram_id, username=user.username, rating=user.rating)
+    db_user = User(telegram_id=user.telegram_id, username=user.username)
     db.add(db_user)
     await db.commit()
     await db.refresh(db_user)
+    invalidate_users([db_user.id], [db_user.telegram_id])
     return db_user
 
 
 @router.get("/users/", response_model=List[UserSchema])
-async def read_users(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)):
-    """Получение списка пользователей"""
+async def read_users(
+    skip: int = 0,
+    limit: int = 100,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Получение списка пользователей (fields=id,username ограничивает колонки и поля ответа)"""
+    field_names = parse_fields(fields, UserSchema)
+    if field_names is not None:
+        query = select(*select_columns(User, field_names)).offset(skip).limit(limit)
+        result = await db.execute(query)
+        return sparse_response(result.all(), field_names)
+
     query = select(User).offset(skip).limit(limit)
     result = await db.execute(query)
     users = result.scalars().all()
     return users
 
 
+@router.post("/users/ratings/check", response_model=SellerRatingCheck)
+async def check_ratings(repair: bool = False, db: AsyncSession = Depends(get_db)):
+    """Сверка рейтингов продавцов с отзывами; repair=true исправляет расхождения"""
+    return await check_seller_ratings(db, repair=repair)
+
+
 @router.get("/users/{user_id}", response_model=UserSchema)
-async def read_user(user_id: int, db: AsyncSession = Depends(get_db)):
+async def read_user(
+    user_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_db)
+):
     """Получение информации о пользователе по ID"""
     query = select(User).where(User.id == user_id)
     result = await db.execute(query)
@@ -48,37 +81,199 @@ async def read_user(user_id: int, db: AsyncSession = Depends(get_db)):
 
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
+
+    etag = version_etag(user.version)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    response.headers["ETag"] = etag
     return user
 
 
+@router.get("/users/{user_id}/accounts", response_model=SellerAccountPage)
+async def read_user_accounts(
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    is_available: Optional[bool] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Объявления продавца, новые первыми
+
+    Keyset-пагинация по индексу (seller_id, created_at, id);
+    next_cursor передается в cursor для следующей страницы.
+    """
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="Limit must be positive")
+    if await db.get(User, user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    columns = (Account.created_at, Account.id)
+    values = decode_cursor(cursor, "seller") if cursor else None
+    query = select(Account).where(Account.seller_id == user_id)
+    if is_available is not None:
+        query = query.where(Account.is_available.is_(is_available))
+    query = apply_keyset(query, columns, True, values).limit(limit + 1)
+
+    result = await db.execute(query)
+    accounts = result.scalars().all()
+
+    next_cursor = None
+    if len(accounts) > limit:
+        accounts = accounts[:limit]
+        next_cursor = encode_cursor("seller", [accounts[-1].created_at, accounts[-1].id])
+    return {"items": accounts, "next_cursor": next_cursor}
+
+
+@router.get("/users/{user_id}/deals", response_model=DealPage)
+async def read_user_deals(
+    user_id: int,
+    role: Optional[DealRole] = None,
+    status: Optional[DealStatus] = None,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Покупки (role=buyer) и продажи (role=seller) пользователя, новые первыми
+
+    Без role возвращаются обе стороны. Keyset-пагинация по индексам
+    (buyer_id, created_at, id) и (seller_id, created_at, id);
+    include_total=true добавляет число сделок по тем же фильтрам.
+    """
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="Limit must be positive")
+    if await db.get(User, user_id) is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if role == DealRole.BUYER:
+        conditions = [Deal.buyer_id == user_id]
+    elif role == DealRole.SELLER:
+        conditions = [Deal.seller_id == user_id]
+    else:
+        conditions = [or_(Deal.buyer_id == user_id, Deal.seller_id == user_id)]
+    if status:
+        conditions.append(Deal.status == status)
+
+    columns = (Deal.created_at, Deal.id)
+    values = decode_cursor(cursor, "user_deals") if cursor else None
+    query = apply_keyset(select(Deal).where(*conditions), columns, True, values).limit(limit + 1)
+
+    result = await db.execute(query)
+    deals = result.scalars().all()
+
+    next_cursor = None
+    if len(deals) > limit:
+        deals = deals[:limit]
+        next_cursor = encode_cursor("user_deals", [deals[-1].created_at, deals[-1].id])
+
+    total = None
+    if include_total:
+        total = await db.scalar(select(func.count()).select_from(Deal).where(*conditions))
+    return {"items": deals, "next_cursor": next_cursor, "total": total}
+
+
+@router.get("/users/{user_id}/reviews", response_model=SellerReviewPage)
+async def read_user_reviews(
+    user_id: int,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Отзывы о продавце, новые первыми, со сводкой оценок
+
+    Два запроса на страницу: пользователь (сводка из его счетчиков
+    распределения, без агрегации по отзывам) и отзывы с данными сделки
+    и названием аккаунта из каталога или архива. Keyset-пагинация по
+    (created_at, id); next_cursor передается в cursor для следующей страницы.
+    """
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="Limit must be positive")
+    user = await db.get(User, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    columns = (Review.created_at, Review.id)
+    values = decode_cursor(cursor, "seller_reviews") if cursor else None
+    query = (
+        select(
+            Review.id,
+            Review.created_at,
+            Review.rating,
+            Review.comment,
+            Review.deal_id,
+            Deal.buyer_id,
+            Deal.account_id,
+            func.coalesce(Account.title, ArchivedAccount.title).label("account_title"),
+        )
+        .join(Deal, Deal.id == Review.deal_id)
+        .outerjoin(Account, Account.id == Deal.account_id)
+        .outerjoin(ArchivedAccount, ArchivedAccount.id == Deal.account_id)
+        .where(Deal.seller_id == user_id)
+    )
+    query = apply_keyset(query, columns, True, values).limit(limit + 1)
+    reviews = (await db.execute(query)).all()
+
+    next_cursor = None
+    if len(reviews) > limit:
+        reviews = reviews[:limit]
+        next_cursor = encode_cursor("seller_reviews", [reviews[-1].created_at, reviews[-1].id])
+
+    summary = {
+        "rating": user.rating or 0.0,
+        "rating_count": user.rating_count,
+        "rating_smoothed": user.rating_smoothed,
+        "histogram": user.rating_histogram,
+    }
+    return {"items": reviews, "next_cursor": next_cursor, "summary": summary}
+
+
 @router.get("/users/telegram/{telegram_id}", response_model=UserSchema)
 async def read_user_by_telegram(telegram_id: int, db: AsyncSession = Depends(get_db)):
-    """Получение информации о пользователе по Telegram ID"""
-    query = select(User).where(User.telegram_id == telegram_id)
-    result = await db.execute(query)
-    user = result.scalar_one_or_none()
+    """
+    Получение информации о пользователе по Telegram ID
 
+    Из кэша в памяти процесса (в том числе отсутствие пользователя), без
+    запроса к БД и повторной валидации ответа при попадании.
+    """
+    user = await get_user_by_telegram(db, telegram_id)
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    return JSONResponse(content=user)
 
 
 @router.put("/users/{user_id}", response_model=UserSchema)
-async def update_user(user_id: int, user: UserUpdate, db: AsyncSession = Depends(get_db)):
-    """Обновление информации о пользователе"""
-    query = select(User).where(User.id == user_id)
-    result = await db.execute(query)
-    db_user = result.scalar_one_or_none()
+async def update_user(
+    user_id: int,
+    user: UserUpdate,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Обновление информации о пользователе
 
-    if db_user is None:
-        raise HTTPException(status_code=404, detail="User not found")
+    Одним условным UPDATE ... RETURNING; с If-Match: "<версия>" изменение
+    применяется, только если пользователь не менялся, иначе 412.
+    """
+    changes = user.model_dump(exclude_unset=True)
+    db_user = await update_versioned(
+        db, User, user_id, changes, if_match_versions(request), not_found="User not found"
+    )
 
-    # Обновляем только предоставленные поля
-    for field, value in user.dict(exclude_unset=True).items():
-        setattr(db_user, field, value)
+    # Сводка продавца в его объявлениях обновляется в той же транзакции
+    account_ids = []
+    if summary_changed(changes):
+        account_ids = await refresh_seller_summaries(db, db_user)
 
     await db.commit()
-    await db.refresh(db_user)
+    invalidate_users([user_id])
+    if account_ids:
+        invalidate_accounts(account_ids, ["seller"])
+    response.headers["ETag"] = version_etag(db_user.version)
     return db_user
 
 
@@ -92,6 +287,8 @@ async def delete_user(user_id: int, db: AsyncSession = Depends(get_db)):
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
+    telegram_id = user.telegram_id
     await db.delete(user)
     await db.commit()
+    invalidate_users([user_id], [telegram_id])
     return {"ok": True}
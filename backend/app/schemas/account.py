@@ -1,8 +1,26 @@
+from enum import Enum
 from typing import Optional, List
 
 from pydantic import BaseModel, Field
 
-from .base import BaseSchema
+from .base import BaseSchema, CursorPage
+
+
+class AccountSort(str, Enum):
+    """Варианты сортировки каталога для keyset-пагинации"""
+
+    NEWEST = "created_at"
+    PRICE = "price"
+
+
+class AccountFilter(BaseModel):
+    """Фильтры каталога аккаунтов"""
+
+    game: Optional[str] = None
+    min_price: Optional[float] = Field(None, ge=0)
+    max_price: Optional[float] = Field(None, ge=0)
+    is_available: Optional[bool] = None
+    min_seller_rating: Optional[float] = Field(None, ge=0, le=5)
 
 
 class AccountBase(BaseModel):
@@ -13,6 +31,7 @@ class AccountBase(BaseModel):
     price: float = Field(..., gt=0)
     game: str = Field(..., min_length=1, max_length=100)
     image_url: Optional[str] = None
+    seller_id: Optional[int] = None
     seller: Optional[dict] = Field(default_factory=lambda: {"id": 0, "name": "Unknown", "rating": 0})
     is_available: Optional[bool] = True
 
@@ -30,10 +49,26 @@ class AccountUpdate(BaseModel):
     price: Optional[float] = Field(None, gt=0)
     game: Optional[str] = Field(None, min_length=1, max_length=100)
     image_url: Optional[str] = None
+    seller_id: Optional[int] = None
     seller: Optional[dict] = None
     is_available: Optional[bool] = None
 
 
+class AccountBulkUpdate(BaseModel):
+    """Схема для массового обновления аккаунтов по списку ID или фильтру"""
+
+    ids: Optional[List[int]] = Field(None, min_length=1, max_length=10000)
+    filter: Optional[AccountFilter] = None
+    changes: AccountUpdate
+
+
+class AccountBulkUpdateResult(BaseModel):
+    """Результат массового обновления"""
+
+    updated: int
+    ids: List[int]
+
+
 class AccountInDB(AccountBase, BaseSchema):
     """Схема аккаунта в БД"""
     pass
@@ -42,3 +77,58 @@ class AccountInDB(AccountBase, BaseSchema):
 class Account(AccountInDB):
     """Схема для ответа API"""
     pass
+
+
+class GameFacet(BaseModel):
+    """Количество объявлений по игре"""
+
+    game: str
+    count: int
+
+
+class PriceBucketFacet(BaseModel):
+    """Количество объявлений в ценовом диапазоне [min_price, max_price)"""
+
+    min_price: float
+    max_price: Optional[float] = None
+    count: int
+
+
+class AccountFacets(BaseModel):
+    """Фасеты каталога для панели фильтров"""
+
+    games: List[GameFacet]
+    price_buckets: List[PriceBucketFacet]
+
+
+class BulkRowCreated(BaseModel):
+    """Успешно импортированная строка"""
+
+    index: int
+    id: int
+
+
+class BulkRowError(BaseModel):
+    """Строка, не прошедшая валидацию или вставку"""
+
+    index: int
+    errors: List[str]
+
+
+class AccountBulkResult(BaseModel):
+    """Результат массового импорта аккаунтов"""
+
+    created: List[BulkRowCreated] = []
+    errors: List[BulkRowError] = []
+
+
+class SellerAccountPage(CursorPage[Account]):
+    """Страница объявлений продавца"""
+
+    pass
+
+
+class AccountPage(CursorPage[Account]):
+    """Страница каталога аккаунтов"""
+
+    facets: Optional[AccountFacets] = None
@@ -1,8 +1,10 @@
 from datetime import datetime
-from typing import Optional
+from typing import Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel
 
+T = TypeVar("T")
+
 
 class BaseSchema(BaseModel):
     """Базовая схема для всех моделей"""
@@ -15,3 +17,10 @@ class BaseSchema(BaseModel):
     model_config = {
         "from_attributes": True
     }
+
+
+class CursorPage(BaseModel, Generic[T]):
+    """Страница результатов keyset-пагинации"""
+
+    items: List[T]
+    next_cursor: Optional[str] = None
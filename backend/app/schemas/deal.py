@@ -1,9 +1,12 @@
+from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
-from .base import BaseSchema
+from .account import Account
+from .base import BaseSchema, CursorPage
+from .user import User
 
 
 class DealStatus(str, Enum):
@@ -14,6 +17,22 @@ class DealStatus(str, Enum):
     CANCELLED = "cancelled"
 
 
+class DealEventType(str, Enum):
+    """Типы событий сделки"""
+
+    CREATED = "created"
+    COMPLETED = "completed"
+    CANCELLED = "cancelled"
+    REVIEWED = "reviewed"
+
+
+class DealRole(str, Enum):
+    """Сторона пользователя в сделке"""
+
+    BUYER = "buyer"
+    SELLER = "seller"
+
+
 class DealBase(BaseModel):
     """Базовая схема сделки"""
 
@@ -35,6 +54,37 @@ class DealUpdate(BaseModel):
     status: Optional[DealStatus] = None
 
 
+class DealBulkTransition(BaseModel):
+    """Схема массового перевода сделок в новый статус"""
+
+    ids: List[int] = Field(..., min_length=1, max_length=10000)
+    status: DealStatus
+
+
+class DealTransitionOutcome(str, Enum):
+    """Итог перехода для одной сделки"""
+
+    UPDATED = "updated"
+    UNCHANGED = "unchanged"  # сделка уже в этом статусе
+    INVALID = "invalid_transition"
+    NOT_FOUND = "not_found"
+
+
+class DealTransitionResult(BaseModel):
+    """Итог перехода сделки и ее статус после операции"""
+
+    id: int
+    outcome: DealTransitionOutcome
+    status: Optional[DealStatus] = None
+
+
+class DealBulkTransitionResult(BaseModel):
+    """Результат массового перехода"""
+
+    updated: int
+    results: List[DealTransitionResult]
+
+
 class DealInDB(DealBase, BaseSchema):
     """Схема сделки в БД"""
 
@@ -78,3 +128,39 @@ class Review(ReviewInDB):
     """Схема для ответа API"""
 
     pass
+
+
+class DealEvent(BaseModel):
+    """Событие журнала сделки; id — сквозной номер для чтения ленты"""
+
+    id: int
+    deal_id: int
+    event_type: DealEventType
+    from_status: Optional[DealStatus] = None
+    to_status: Optional[DealStatus] = None
+    payload: Optional[dict] = None
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+class DealEventFeed(BaseModel):
+    """Страница ленты событий; next_after передается в after следующего запроса"""
+
+    items: List[DealEvent]
+    next_after: int
+
+
+class DealExpanded(Deal):
+    """Сделка со связанными объектами из ?expand=; в ответе только запрошенные связи"""
+
+    account: Optional[Account] = None
+    seller: Optional[User] = None
+    buyer: Optional[User] = None
+    review: Optional[Review] = None
+
+
+class DealPage(CursorPage[Deal]):
+    """Страница истории сделок пользователя"""
+
+    total: Optional[int] = None
@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class GameStats(BaseModel):
+    """Игра в каталоге: число доступных аккаунтов и цены"""
+
+    game: str
+    available_count: int
+    min_price: Optional[float] = None
+    median_price: Optional[float] = None
+    max_price: Optional[float] = None
+
+    model_config = {"from_attributes": True}
+
+
+class GameStatsDrift(BaseModel):
+    """Расхождение сводки с данными аккаунтов"""
+
+    game: str
+    stored: Optional[GameStats] = None
+    actual: Optional[GameStats] = None
+
+
+class GameStatsCheck(BaseModel):
+    """Результат проверки согласованности сводки по играм"""
+
+    checked_at: datetime
+    games: int
+    drift: List[GameStatsDrift]
+
+
+class PriceHistogram(BaseModel):
+    """Гистограмма цен: len(edges) == len(counts) + 1"""
+
+    edges: List[float]
+    counts: List[int]
+
+
+class OutlierBounds(BaseModel):
+    """Границы выбросов по Тьюки"""
+
+    lower: float
+    upper: float
+
+
+class PricePosition(BaseModel):
+    """Положение цены продавца на рынке игры"""
+
+    price: float
+    percentile: float
+    is_outlier: bool
+
+
+class GamePriceStats(BaseModel):
+    """Распределение цен доступных аккаунтов игры"""
+
+    game: str
+    count: int
+    min_price: float
+    max_price: float
+    mean_price: float
+    percentiles: Dict[str, float]
+    histogram: PriceHistogram
+    outlier_bounds: OutlierBounds
+    outliers: int
+    position: Optional[PricePosition] = None
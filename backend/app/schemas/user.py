@@ -1,8 +1,9 @@
-from typing import Optional
+from datetime import datetime
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
-from .base import BaseSchema
+from .base import BaseSchema, CursorPage
 
 
 class UserBase(BaseModel):
@@ -10,7 +11,6 @@ class UserBase(BaseModel):
 
     telegram_id: int
     username: Optional[str] = None
-    rating: float = Field(default=0.0, ge=0.0, le=5.0)
 
 
 class UserCreate(UserBase):
@@ -20,19 +20,70 @@ class UserCreate(UserBase):
 
 
 class UserUpdate(BaseModel):
-    """Схема для обновления пользователя"""
+    """Схема для обновления пользователя (рейтинг считается по отзывам)"""
 
     username: Optional[str] = None
-    rating: Optional[float] = Field(default=None, ge=0.0, le=5.0)
 
 
 class UserInDB(UserBase, BaseSchema):
     """Схема пользователя в БД"""
 
-    pass
+    rating: float = Field(default=0.0, ge=0.0, le=5.0)
+    rating_count: int = 0
+    # Байесовская оценка: средняя, сглаженная к априорной при малом числе отзывов
+    rating_smoothed: Optional[float] = None
 
 
 class User(UserInDB):
     """Схема для ответа API"""
 
     pass
+
+
+class SellerRatingDrift(BaseModel):
+    """Расхождение рейтинга продавца с его отзывами"""
+
+    user_id: int
+    stored_sum: int
+    stored_count: int
+    stored_rating: Optional[float] = None
+    actual_sum: int
+    actual_count: int
+    actual_rating: float
+
+
+class SellerRatingCheck(BaseModel):
+    """Результат сверки рейтингов продавцов с отзывами"""
+
+    checked_at: datetime
+    sellers: int
+    drift: List[SellerRatingDrift]
+
+
+class RatingSummary(BaseModel):
+    """Сводка отзывов продавца: рейтинг и распределение оценок"""
+
+    rating: float
+    rating_count: int
+    rating_smoothed: Optional[float] = None
+    # Число отзывов по оценкам: {1: ..., 5: ...}
+    histogram: Dict[int, int]
+
+
+class SellerReview(BaseModel):
+    """Отзыв о продавце со сделкой и аккаунтом"""
+
+    id: int
+    created_at: datetime
+    rating: int
+    comment: Optional[str] = None
+    deal_id: int
+    buyer_id: Optional[int] = None
+    account_id: Optional[int] = None
+    account_title: Optional[str] = None
+
+
+class SellerReviewPage(CursorPage[SellerReview]):
+    """Страница отзывов о продавце"""
+
+    summary: RatingSummary
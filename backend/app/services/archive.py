@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List
+
+from sqlalchemy import delete, exists, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models.account import Account, ArchivedAccount
+from ..models.deal import Deal
+from ..schemas.deal import DealStatus
+from .listing_cache import invalidate_accounts
+
+logger = logging.getLogger(__name__)
+
+# Колонки, переносимые из accounts в accounts_archive как есть
+ARCHIVED_COLUMNS = [
+    "id",
+    "created_at",
+    "updated_at",
+    "title",
+    "game",
+    "description",
+    "price",
+    "image_url",
+    "seller_id",
+    "seller",
+    "seller_rating",
+    "is_available",
+    "version",
+]
+
+
+async def move_to_archive(db: AsyncSession, ids: List[int], reason: str) -> None:
+    """
+    Переносит аккаунты в архив: INSERT ... SELECT и DELETE в текущей транзакции
+
+    commit остается за вызывающим кодом.
+    """
+    source = select(
+        *[getattr(Account, column) for column in ARCHIVED_COLUMNS],
+        literal(datetime.utcnow()).label("archived_at"),
+        literal(reason).label("archive_reason"),
+    ).where(Account.id.in_(ids))
+    await db.execute(
+        insert(ArchivedAccount).from_select(
+            [*ARCHIVED_COLUMNS, "archived_at", "archive_reason"], source
+        )
+    )
+    await db.execute(
+        delete(Account).where(Account.id.in_(ids)).execution_options(synchronize_session=False)
+    )
+
+
+async def archive_sold_batch(db: AsyncSession, batch_size: int, min_age: timedelta) -> int:
+    """
+    Архивирует одну пачку проданных аккаунтов в отдельной транзакции
+
+    Проданный — недоступный аккаунт с завершенной сделкой, не менявшийся
+    дольше min_age (чтобы недавно проданные еще были видны в каталоге).
+
+    Returns:
+        int: Число перенесенных аккаунтов
+    """
+    sold = exists().where(Deal.account_id == Account.id, Deal.status == DealStatus.COMPLETED)
+    query = (
+        select(Account.id)
+        .where(
+            Account.is_available.is_(False),
+            Account.updated_at < datetime.utcnow() - min_age,
+            sold,
+        )
+        .order_by(Account.id)
+        .limit(batch_size)
+    )
+    if db.bind.dialect.name == "postgresql":
+        # Параллельные архиваторы не берут одни и те же строки
+        query = query.with_for_update(skip_locked=True)
+
+    ids = (await db.execute(query)).scalars().all()
+    if not ids:
+        return 0
+
+    await move_to_archive(db, ids, "sold")
+    await db.commit()
+    invalidate_accounts(ids)
+    return len(ids)
+
+
+async def archive_sold_accounts(
+    db: AsyncSession,
+    batch_size: int = None,
+    min_age: timedelta = None,
+    pause: float = 0,
+) -> int:
+    """Архивирует проданные аккаунты пачками, пока они не закончатся"""
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    min_age = min_age if min_age is not None else timedelta(days=settings.ARCHIVE_MIN_AGE_DAYS)
+    total = 0
+    while True:
+        moved = await archive_sold_batch(db, batch_size, min_age)
+        total += moved
+        if moved < batch_size:
+            return total
+        # Пауза между пачками, чтобы не занимать БД надолго
+        await asyncio.sleep(pause)
+
+
+async def run_archiver(session_factory) -> None:
+    """Фоновая задача: периодическая архивация проданных аккаунтов"""
+    while True:
+        try:
+            async with session_factory() as db:
+                moved = await archive_sold_accounts(db, pause=settings.ARCHIVE_BATCH_PAUSE)
+            if moved:
+                logger.info(f"Archived {moved} sold accounts")
+        except Exception as e:
+            logger.exception(f"Archive job failed: {e}")
+        await asyncio.sleep(settings.ARCHIVE_INTERVAL)
@@ -0,0 +1,141 @@
+import json
+import logging
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.account import Account
+from ..schemas.account import AccountBulkResult, AccountCreate, BulkRowCreated, BulkRowError
+from .game_stats import refresh_games
+from .sellers import attach_sellers
+
+logger = logging.getLogger(__name__)
+
+# Строк в одном INSERT и одной транзакции
+CHUNK_SIZE = 1000
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+async def read_rows(request: Request) -> AsyncIterator[Any]:
+    """
+    Строки импорта из тела запроса
+
+    NDJSON читается потоково, по строкам; JSON-массив разбирается целиком.
+    Строки NDJSON отдаются как bytes и разбираются при валидации,
+    чтобы ошибка в одной строке не прерывала импорт.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_TYPES:
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+        return
+
+    try:
+        rows = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array of accounts")
+    for row in rows:
+        yield row
+
+
+def _validate_row(raw: Any) -> Tuple[Optional[dict], List[str]]:
+    """Валидирует строку и возвращает значения для INSERT или список ошибок"""
+    if isinstance(raw, bytes):
+        try:
+            raw = json.loads(raw)
+        except ValueError as e:
+            return None, [f"invalid JSON: {e}"]
+
+    try:
+        account = AccountCreate.model_validate(raw)
+    except ValidationError as e:
+        return None, [
+            f"{'.'.join(map(str, err['loc'])) or 'row'}: {err['msg']}" for err in e.errors()
+        ]
+
+    # Те же поля, что и в create_account; INSERT без ORM не вызывает @validates,
+    # поэтому seller_rating считаем сами
+    return {
+        "title": account.title,
+        "game": account.game,
+        "description": account.description,
+        "price": account.price,
+        "image_url": account.image_url,
+        "seller_id": account.seller_id,
+        "seller": account.seller,
+        "seller_rating": Account.rating_from_seller(account.seller),
+    }, []
+
+
+async def _insert_chunk(
+    db: AsyncSession, chunk: List[Tuple[int, dict]], result: AccountBulkResult
+) -> None:
+    """Вставляет пачку одним многострочным INSERT ... RETURNING id и фиксирует ее"""
+    # На SQLite sort_by_parameter_order откатывается к вставке по одной строке,
+    # а rowid внутри одного INSERT и так выдаются по возрастанию в порядке VALUES
+    is_sqlite = db.bind.dialect.name == "sqlite"
+    statement = insert(Account).returning(Account.id, sort_by_parameter_order=not is_sqlite)
+    try:
+        await attach_sellers(db, [values for _, values in chunk])
+        ids = (await db.execute(statement, [values for _, values in chunk])).scalars().all()
+        if is_sqlite:
+            ids = sorted(ids)
+        await refresh_games(db, {values["game"] for _, values in chunk})
+        await db.commit()
+    except SQLAlchemyError as e:
+        await db.rollback()
+        logger.error(f"Bulk insert of {len(chunk)} accounts failed: {e}")
+        result.errors.extend(
+            BulkRowError(index=index, errors=[f"database error: {e.__class__.__name__}"])
+            for index, _ in chunk
+        )
+        return
+
+    result.created.extend(
+        BulkRowCreated(index=index, id=account_id) for (index, _), account_id in zip(chunk, ids)
+    )
+
+
+async def import_accounts(
+    db: AsyncSession, rows: AsyncIterator[Any], chunk_size: int = CHUNK_SIZE
+) -> AccountBulkResult:
+    """
+    Массовый импорт аккаунтов
+
+    Строки валидируются по одной и накапливаются в пачки по chunk_size.
+    Каждая пачка вставляется одним INSERT ... RETURNING в своей транзакции,
+    поэтому ошибка в строке или в пачке не отменяет остальной импорт.
+    """
+    result = AccountBulkResult()
+    chunk: List[Tuple[int, dict]] = []
+    index = 0
+
+    async for raw in rows:
+        values, errors = _validate_row(raw)
+        if errors:
+            result.errors.append(BulkRowError(index=index, errors=errors))
+        else:
+            chunk.append((index, values))
+        index += 1
+
+        if len(chunk) >= chunk_size:
+            await _insert_chunk(db, chunk, result)
+            chunk = []
+
+    if chunk:
+        await _insert_chunk(db, chunk, result)
+    return result
@@ -0,0 +1,97 @@
+from typing import Collection, List
+
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.account import Account, ArchivedAccount
+from ..schemas.account import AccountFacets, AccountFilter
+
+# Границы ценовых диапазонов для фасетов; последний диапазон открыт сверху
+PRICE_BUCKETS = [0, 1000, 5000, 10000, 25000, 50000]
+
+
+def filter_conditions(filters: AccountFilter, exclude: Collection[str] = ()) -> list:
+    """
+    Условия WHERE для фильтров каталога
+
+    Args:
+        filters: Фильтры из запроса
+        exclude: Фильтры, которые нужно пропустить (для фасета по тому же полю)
+    """
+    conditions = []
+    if filters.game is not None and "game" not in exclude:
+        conditions.append(Account.game == filters.game)
+    if filters.min_price is not None and "price" not in exclude:
+        conditions.append(Account.price >= filters.min_price)
+    if filters.max_price is not None and "price" not in exclude:
+        conditions.append(Account.price <= filters.max_price)
+    if filters.is_available is not None:
+        # IS true/false литералом, чтобы планировщик мог использовать частичный индекс
+        conditions.append(Account.is_available.is_(filters.is_available))
+    if filters.min_seller_rating is not None:
+        conditions.append(Account.seller_rating >= filters.min_seller_rating)
+    return conditions
+
+
+def _price_bucket():
+    """Выражение, возвращающее нижнюю границу ценового диапазона"""
+    whens = [
+        (Account.price < upper, lower) for lower, upper in zip(PRICE_BUCKETS, PRICE_BUCKETS[1:])
+    ]
+    return case(*whens, else_=PRICE_BUCKETS[-1])
+
+
+async def count_facets(db: AsyncSession, filters: AccountFilter) -> AccountFacets:
+    """
+    Считает фасеты по играм и ценовым диапазонам
+
+    Каждый фасет учитывает все фильтры, кроме фильтра по своему полю,
+    чтобы пользователь видел, сколько объявлений даст смена значения.
+    Оба запроса — GROUP BY по индексу (is_available, game, price).
+    """
+    games_query = (
+        select(Account.game, func.count())
+        .where(*filter_conditions(filters, exclude={"game"}))
+        .group_by(Account.game)
+        .order_by(func.count().desc(), Account.game)
+    )
+    games = [
+        {"game": game, "count": count}
+        for game, count in (await db.execute(games_query)).all()
+        if game is not None
+    ]
+
+    bucket = _price_bucket().label("bucket")
+    price_query = (
+        select(bucket, func.count())
+        .where(*filter_conditions(filters, exclude={"price"}))
+        .where(Account.price.is_not(None))
+        .group_by(bucket)
+    )
+    counts = {float(lower): count for lower, count in (await db.execute(price_query)).all()}
+
+    price_buckets: List[dict] = []
+    for i, lower in enumerate(PRICE_BUCKETS):
+        upper = PRICE_BUCKETS[i + 1] if i + 1 < len(PRICE_BUCKETS) else None
+        price_buckets.append(
+            {"min_price": lower, "max_price": upper, "count": counts.get(float(lower), 0)}
+        )
+
+    return AccountFacets(games=games, price_buckets=price_buckets)
+
+
+async def catalog_watermark(db: AsyncSession) -> tuple:
+    """
+    Водяной знак каталога для ETag списков: max(updated_at) и max(archived_at)
+
+    Удаленные и проданные аккаунты уходят в accounts_archive, поэтому
+    удаления видны по времени архивации. Оба max берутся по индексам
+    (ix_accounts_updated_at и индекс archived_at) без сканирования таблиц.
+    """
+    result = await db.execute(
+        select(
+            select(func.max(Account.updated_at)).scalar_subquery(),
+            select(func.max(ArchivedAccount.archived_at)).scalar_subquery(),
+        )
+    )
+    return tuple(result.one())
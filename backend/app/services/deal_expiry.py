@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models.deal import Deal
+from ..schemas.deal import DealStatus, DealTransitionOutcome
+from .deals import transition_deals
+from .listing_cache import invalidate_accounts
+
+logger = logging.getLogger(__name__)
+
+
+class SweepMetrics:
+    """Счетчики фоновой отмены зависших сделок"""
+
+    def __init__(self):
+        self.sweeps = 0
+        self.failures = 0
+        self.deals_expired = 0
+        self.accounts_released = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+        self.last_run_at = None
+
+    def record(self, duration: float, expired: int, released: int) -> None:
+        self.sweeps += 1
+        self.deals_expired += expired
+        self.accounts_released += released
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.total_duration += duration
+        self.last_run_at = datetime.utcnow()
+
+    def stats(self) -> dict:
+        """Счетчики для мониторинга"""
+        return {
+            "sweeps": self.sweeps,
+            "failures": self.failures,
+            "deals_expired": self.deals_expired,
+            "accounts_released": self.accounts_released,
+            "last_duration_seconds": self.last_duration,
+            "max_duration_seconds": self.max_duration,
+            "avg_duration_seconds": self.total_duration / self.sweeps if self.sweeps else 0.0,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+        }
+
+
+sweep_metrics = SweepMetrics()
+
+
+async def expire_pending_batch(
+    db: AsyncSession, batch_size: int, ttl: timedelta
+) -> Tuple[int, int]:
+    """
+    Отменяет одну пачку сделок, ожидающих дольше ttl, в отдельной транзакции
+
+    Returns:
+        Tuple[int, int]: Число отмененных сделок и число возвращенных в продажу аккаунтов
+    """
+    query = (
+        select(Deal.id)
+        .where(Deal.status == DealStatus.PENDING, Deal.created_at < datetime.utcnow() - ttl)
+        .order_by(Deal.created_at, Deal.id)
+        .limit(batch_size)
+    )
+    if db.bind.dialect.name == "postgresql":
+        # Реплики API не берут одни и те же сделки и не ждут друг друга
+        query = query.with_for_update(skip_locked=True)
+
+    ids = (await db.execute(query)).scalars().all()
+    if not ids:
+        return 0, 0
+
+    results, released = await transition_deals(
+        db, ids, DealStatus.CANCELLED, payload={"reason": "expired"}
+    )
+    await db.commit()
+    if released:
+        invalidate_accounts(released, ["is_available"])
+    expired = sum(result["outcome"] == DealTransitionOutcome.UPDATED for result in results)
+    return expired, len(released)
+
+
+async def expire_pending_deals(
+    db: AsyncSession,
+    batch_size: int = None,
+    ttl: timedelta = None,
+    pause: float = 0,
+) -> Tuple[int, int]:
+    """Отменяет зависшие сделки пачками, пока они не закончатся; пишет метрики"""
+    batch_size = batch_size or settings.DEAL_EXPIRY_BATCH_SIZE
+    ttl = ttl if ttl is not None else timedelta(hours=settings.DEAL_PENDING_TTL_HOURS)
+    started = time.monotonic()
+    expired = released = 0
+    while True:
+        batch_expired, batch_released = await expire_pending_batch(db, batch_size, ttl)
+        expired += batch_expired
+        released += batch_released
+        if batch_expired < batch_size:
+            break
+        # Пауза между пачками, чтобы не занимать БД надолго
+        await asyncio.sleep(pause)
+
+    sweep_metrics.record(time.monotonic() - started, expired, released)
+    return expired, released
+
+
+async def run_deal_expiry(session_factory) -> None:
+    """Фоновая задача: периодическая отмена зависших сделок"""
+    while True:
+        try:
+            async with session_factory() as db:
+                expired, released = await expire_pending_deals(
+                    db, pause=settings.DEAL_EXPIRY_BATCH_PAUSE
+                )
+            if expired:
+                logger.info(f"Expired {expired} pending deals, released {released} accounts")
+        except Exception as e:
+            sweep_metrics.failures += 1
+            logger.exception(f"Deal expiry sweep failed: {e}")
+        await asyncio.sleep(settings.DEAL_EXPIRY_INTERVAL)
@@ -0,0 +1,280 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+
+from ..models.account import Account
+from ..models.deal import Deal, DealEvent
+from ..schemas.account import Account as AccountSchema
+from ..schemas.deal import Deal as DealSchema
+from ..schemas.deal import (
+    DealCreate,
+    DealEventType,
+    DealExpanded,
+    DealStatus,
+    DealTransitionOutcome,
+)
+from ..schemas.deal import Review as ReviewSchema
+from ..schemas.user import User as UserSchema
+from .game_stats import refresh_games
+
+# Допустимые переходы статуса сделки
+TRANSITIONS = {
+    DealStatus.PENDING: {DealStatus.COMPLETED, DealStatus.CANCELLED},
+    DealStatus.COMPLETED: set(),
+    DealStatus.CANCELLED: set(),
+}
+
+# Событие журнала для перехода в статус
+STATUS_EVENTS = {
+    DealStatus.COMPLETED: DealEventType.COMPLETED,
+    DealStatus.CANCELLED: DealEventType.CANCELLED,
+}
+
+# Связи для ?expand=: стратегии загрузки и схемы ответа.
+# Все связи сделки — многие-к-одному или один-к-одному, поэтому LEFT JOIN
+# не размножает строки и страница любого размера грузится одним запросом.
+# selectinload тут хуже: он бьет IN на пачки по 500 ID, и число запросов растет.
+DEAL_EXPANSIONS = {
+    "account": (
+        (joinedload(Deal.live_account), joinedload(Deal.archived_account)),
+        AccountSchema,
+    ),
+    "seller": ((joinedload(Deal.seller),), UserSchema),
+    "buyer": ((joinedload(Deal.buyer),), UserSchema),
+    "review": ((joinedload(Deal.review),), ReviewSchema),
+}
+
+
+def expand_options(expand: List[str]) -> list:
+    """Опции загрузки для запрошенных связей"""
+    return [option for name in expand for option in DEAL_EXPANSIONS[name][0]]
+
+
+def expand_deal(deal: Deal, expand: List[str]) -> dict:
+    """Сделка с запрошенными связями; связи должны быть загружены expand_options()"""
+    data = DealSchema.model_validate(deal).model_dump()
+    for name in expand:
+        related = getattr(deal, name)
+        schema = DEAL_EXPANSIONS[name][1]
+        data[name] = schema.model_validate(related) if related is not None else None
+    return DealExpanded(**data).model_dump(mode="json", exclude_unset=True)
+
+
+def record_event(
+    db: AsyncSession,
+    deal_id: int,
+    event_type: DealEventType,
+    from_status: Optional[DealStatus] = None,
+    to_status: Optional[DealStatus] = None,
+    payload: Optional[dict] = None,
+) -> DealEvent:
+    """Добавляет событие в журнал; пишется при flush/commit вместе с изменением сделки"""
+    event = DealEvent(
+        deal_id=deal_id,
+        event_type=event_type,
+        from_status=from_status,
+        to_status=to_status,
+        payload=payload,
+    )
+    db.add(event)
+    return event
+
+
+async def open_deal(db: AsyncSession, deal: DealCreate) -> Tuple[Deal, Optional[str]]:
+    """
+    Создает сделку, атомарно снимая аккаунт с продажи
+
+    Доступность проверяется и сбрасывается одним условным
+    UPDATE ... WHERE is_available RETURNING: из параллельных покупок
+    строку обновит только одна, остальные получат 0 строк. Проверка
+    в Python после SELECT так не работает — оба запроса видят True.
+    Сводка по игре в транзакции покупки не пересчитывается: иначе все
+    покупки одной игры ждали бы друг друга на ее строке в game_stats.
+    commit остается за вызывающим кодом.
+
+    Returns:
+        Tuple[Deal, Optional[str]]: Сделка и игра аккаунта — ее нужно
+            передать в mark_games_dirty() после commit
+
+    Raises:
+        HTTPException: 404, если аккаунта нет; 400, если он уже недоступен
+    """
+    if deal.status != DealStatus.PENDING:
+        raise HTTPException(status_code=400, detail="Deal must be created in pending status")
+
+    claim = (
+        update(Account)
+        .where(Account.id == deal.account_id, Account.is_available.is_(True))
+        .values(is_available=False, updated_at=datetime.utcnow(), version=Account.version + 1)
+        .returning(Account.game)
+        .execution_options(synchronize_session=False)
+    )
+    claimed = (await db.execute(claim)).first()
+    if claimed is None:
+        # Различаем причины только на редком пути отказа
+        if await db.scalar(select(Account.id).where(Account.id == deal.account_id)) is None:
+            raise HTTPException(status_code=404, detail="Account not found")
+        raise HTTPException(status_code=400, detail="Account is not available")
+
+    db_deal = Deal(
+        seller_id=deal.seller_id,
+        buyer_id=deal.buyer_id,
+        account_id=deal.account_id,
+        status=deal.status,
+    )
+    db.add(db_deal)
+    await db.flush()
+    record_event(db, db_deal.id, DealEventType.CREATED, to_status=DealStatus.PENDING)
+    return db_deal, claimed.game
+
+
+async def transition_deal(
+    db: AsyncSession, deal_id: int, status: DealStatus, versions: Optional[List[int]] = None
+) -> Tuple[Deal, bool]:
+    """
+    Переводит сделку в новый статус по правилам TRANSITIONS
+
+    Статус меняется условным UPDATE ... WHERE status = <исходный>
+    [AND version IN (...)] RETURNING без предварительного SELECT, поэтому
+    из двух параллельных переходов применится один. В той же транзакции
+    пишется событие журнала; при отмене аккаунт возвращается в продажу.
+    commit остается за вызывающим кодом.
+
+    Args:
+        versions: Допустимые текущие версии из If-Match (None — без условия)
+
+    Returns:
+        Tuple[Deal, bool]: Сделка и признак изменения (False — уже в этом статусе)
+
+    Raises:
+        HTTPException: 404 — нет сделки, 412 — версия не совпала,
+            400 — недопустимый переход, 409 — параллельное изменение
+    """
+    conditions = [Deal.id == deal_id]
+    if versions is not None:
+        conditions.append(Deal.version.in_(versions))
+
+    for source in [source for source, targets in TRANSITIONS.items() if status in targets]:
+        statement = (
+            update(Deal)
+            .where(*conditions, Deal.status == source)
+            .values(status=status, updated_at=datetime.utcnow(), version=Deal.version + 1)
+            .returning(Deal)
+            .execution_options(populate_existing=True)
+        )
+        db_deal = (await db.execute(statement)).scalar_one_or_none()
+        if db_deal is not None:
+            record_event(db, deal_id, STATUS_EVENTS[status], from_status=source, to_status=status)
+            if status == DealStatus.CANCELLED:
+                await release_accounts(db, [db_deal.account_id])
+            return db_deal, True
+
+    # Переход не применился: выясняем причину по текущему состоянию
+    query = select(Deal).where(Deal.id == deal_id).execution_options(populate_existing=True)
+    db_deal = (await db.execute(query)).scalar_one_or_none()
+    if db_deal is None:
+        raise HTTPException(status_code=404, detail="Deal not found")
+    if versions is not None and db_deal.version not in versions:
+        raise HTTPException(status_code=412, detail="Resource was modified (If-Match failed)")
+    if db_deal.status == status:
+        return db_deal, False
+    if status not in TRANSITIONS[db_deal.status]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid status transition: {db_deal.status.value} -> {status.value}",
+        )
+    raise HTTPException(status_code=409, detail="Deal status was changed concurrently")
+
+
+async def release_accounts(db: AsyncSession, account_ids: List[int]) -> List[int]:
+    """
+    Возвращает в продажу аккаунты отмененных сделок одним UPDATE
+
+    Returns:
+        List[int]: ID аккаунтов, которые действительно были сняты с продажи
+    """
+    release = (
+        update(Account)
+        .where(Account.id.in_(account_ids), Account.is_available.is_(False))
+        .values(is_available=True, updated_at=datetime.utcnow(), version=Account.version + 1)
+        .returning(Account.id, Account.game)
+        .execution_options(synchronize_session=False)
+    )
+    rows = (await db.execute(release)).all()
+    if rows:
+        await refresh_games(db, {row.game for row in rows})
+    return [row.id for row in rows]
+
+
+async def transition_deals(
+    db: AsyncSession, ids: List[int], status: DealStatus, payload: Optional[dict] = None
+) -> Tuple[List[dict], List[int]]:
+    """
+    Переводит набор сделок в новый статус set-based запросами
+
+    Для каждого допустимого исходного статуса выполняется один
+    UPDATE ... WHERE id IN (...) AND status = <исходный> RETURNING, поэтому
+    исходный статус события известен точно, а параллельно измененные сделки
+    просто не попадают под условие. Затем одним SELECT классифицируются
+    остальные сделки, события пишутся одной пачкой INSERT, а при отмене
+    аккаунты возвращаются в продажу одним UPDATE. payload записывается
+    в каждое событие. commit остается за вызывающим кодом.
+
+    Returns:
+        Tuple[List[dict], List[int]]: Итоги по сделкам в порядке ids
+            и ID аккаунтов, возвращенных в продажу
+    """
+    ids = list(dict.fromkeys(ids))
+    now = datetime.utcnow()
+    outcomes = {}
+    events = []
+    account_ids = []
+
+    sources = [source for source, targets in TRANSITIONS.items() if status in targets]
+    for source in sources:
+        statement = (
+            update(Deal)
+            .where(Deal.id.in_(ids), Deal.status == source)
+            .values(status=status, updated_at=now, version=Deal.version + 1)
+            .returning(Deal.id, Deal.account_id)
+            .execution_options(synchronize_session=False)
+        )
+        for row in (await db.execute(statement)).all():
+            outcomes[row.id] = (DealTransitionOutcome.UPDATED, status)
+            account_ids.append(row.account_id)
+            events.append({
+                "deal_id": row.id,
+                "event_type": STATUS_EVENTS[status],
+                "from_status": source,
+                "to_status": status,
+                "payload": payload,
+                "created_at": now,
+            })
+
+    rest = [deal_id for deal_id in ids if deal_id not in outcomes]
+    if rest:
+        rows = await db.execute(select(Deal.id, Deal.status).where(Deal.id.in_(rest)))
+        for row in rows:
+            outcome = (
+                DealTransitionOutcome.UNCHANGED
+                if row.status == status
+                else DealTransitionOutcome.INVALID
+            )
+            outcomes[row.id] = (outcome, row.status)
+
+    if events:
+        await db.execute(insert(DealEvent), events)
+
+    released = []
+    if status == DealStatus.CANCELLED and account_ids:
+        released = await release_accounts(db, account_ids)
+
+    results = []
+    for deal_id in ids:
+        outcome, current = outcomes.get(deal_id, (DealTransitionOutcome.NOT_FOUND, None))
+        results.append({"id": deal_id, "outcome": outcome, "status": current})
+    return results, released
@@ -0,0 +1,230 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Set
+
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models.account import Account
+from ..models.game import GameStats
+from ..schemas.game import GameStats as GameStatsSchema
+from ..schemas.game import GameStatsCheck, GameStatsDrift
+
+logger = logging.getLogger(__name__)
+
+# Поля аккаунта, от которых зависит сводка
+STATS_FIELDS = {"game", "price", "is_available"}
+
+# Допуск при сравнении цен в проверке согласованности
+PRICE_TOLERANCE = 1e-6
+
+# Игры, сводку которых пересчитает фоновая задача (см. mark_games_dirty)
+_dirty_games: Set[str] = set()
+
+
+def _stats_query(games: Optional[Iterable[str]] = None):
+    """
+    Сводка по доступным аккаунтам, сгруппированная по игре
+
+    Медиана считается через row_number() внутри игры: среднее одной
+    или двух центральных цен. Запрос идет по индексу (is_available, game, price).
+    """
+    available = [Account.is_available.is_(True), Account.game.isnot(None)]
+    if games is not None:
+        available.append(Account.game.in_(list(games)))
+
+    ranked = (
+        select(
+            Account.game,
+            Account.price,
+            func.row_number().over(partition_by=Account.game, order_by=Account.price).label("rn"),
+            func.count().over(partition_by=Account.game).label("n"),
+        )
+        .where(*available)
+        .subquery()
+    )
+    middle = ranked.c.rn.in_([(ranked.c.n + 1) // 2, (ranked.c.n + 2) // 2])
+    return select(
+        ranked.c.game,
+        func.max(ranked.c.n).label("available_count"),
+        func.min(ranked.c.price).label("min_price"),
+        func.avg(case((middle, ranked.c.price))).label("median_price"),
+        func.max(ranked.c.price).label("max_price"),
+    ).group_by(ranked.c.game)
+
+
+async def _compute(db: AsyncSession, games: Optional[Iterable[str]] = None) -> Dict[str, dict]:
+    result = await db.execute(_stats_query(games))
+    return {row.game: dict(row._mapping) for row in result}
+
+
+def _upsert(dialect: str, rows: list):
+    """INSERT ... ON CONFLICT (game) DO UPDATE для PostgreSQL и SQLite"""
+    insert = postgresql_insert if dialect == "postgresql" else sqlite_insert
+    statement = insert(GameStats).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[GameStats.game],
+        set_={
+            "available_count": statement.excluded.available_count,
+            "min_price": statement.excluded.min_price,
+            "median_price": statement.excluded.median_price,
+            "max_price": statement.excluded.max_price,
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+
+
+async def _lock_games(db: AsyncSession, games: Iterable[str]) -> None:
+    """
+    Блокирует строки сводки игр до конца транзакции (PostgreSQL)
+
+    Без блокировки две параллельные транзакции по одной игре считали бы
+    сводку каждая без изменений другой, и вторая перезаписала бы первую
+    устаревшими числами. Под блокировкой пересчет идет отдельным запросом
+    уже после commit предыдущей транзакции и видит ее изменения (READ COMMITTED).
+    Строки новых игр сначала вставляются заготовкой, чтобы было что блокировать.
+    Игры блокируются по порядку, чтобы транзакции не ждали друг друга по кругу.
+    В SQLite запись и так идет по одной транзакции за раз.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return
+    games = sorted(games)
+    await db.execute(
+        postgresql_insert(GameStats)
+        .values([{"game": game, "available_count": 0} for game in games])
+        .on_conflict_do_nothing(index_elements=[GameStats.game])
+    )
+    await db.execute(
+        select(GameStats.game)
+        .where(GameStats.game.in_(games))
+        .order_by(GameStats.game)
+        .with_for_update()
+    )
+
+
+async def refresh_games(db: AsyncSession, games: Iterable[Optional[str]]) -> None:
+    """
+    Пересчитывает сводку для затронутых игр
+
+    Вызывается в транзакции, изменившей аккаунты, до commit: пересчет
+    идет только по строкам этих игр, остальная сводка не трогается.
+    Строки сводки этих игр блокируются до commit (см. _lock_games).
+    Игры без доступных аккаунтов удаляются из сводки.
+    """
+    games = {game for game in games if game}
+    if not games:
+        return
+
+    await _lock_games(db, games)
+    stats = await _compute(db, games)
+    now = datetime.utcnow()
+    if stats:
+        rows = [dict(row, updated_at=now) for row in stats.values()]
+        await db.execute(_upsert(db.bind.dialect.name, rows))
+    empty = games - stats.keys()
+    if empty:
+        await db.execute(delete(GameStats).where(GameStats.game.in_(empty)))
+
+
+def mark_games_dirty(games: Iterable[Optional[str]]) -> None:
+    """
+    Откладывает пересчет сводки игр до фоновой задачи (вызывать после commit)
+
+    Для горячих путей записи, которым нельзя ждать блокировку строки
+    сводки. Если процесс остановится раньше пересчета, расхождение
+    исправит периодическая проверка check_game_stats.
+    """
+    _dirty_games.update(game for game in games if game)
+
+
+async def refresh_dirty_games(db: AsyncSession) -> int:
+    """Пересчитывает сводку отложенных игр; возвращает их число"""
+    games = set(_dirty_games)
+    if not games:
+        return 0
+    _dirty_games.difference_update(games)
+    try:
+        await refresh_games(db, games)
+        await db.commit()
+    except Exception:
+        # Пересчет повторится при следующем запуске
+        _dirty_games.update(games)
+        raise
+    return len(games)
+
+
+def touches_stats(fields: Iterable[str]) -> bool:
+    """Затрагивают ли измененные поля аккаунта сводку по играм"""
+    return bool(STATS_FIELDS & set(fields))
+
+
+def _differs(stored: Optional[dict], actual: Optional[dict]) -> bool:
+    if stored is None or actual is None:
+        return stored is not actual
+    if stored["available_count"] != actual["available_count"]:
+        return True
+    for field in ("min_price", "median_price", "max_price"):
+        a, b = stored[field], actual[field]
+        if (a is None) != (b is None) or (a is not None and abs(a - b) > PRICE_TOLERANCE):
+            return True
+    return False
+
+
+async def check_game_stats(db: AsyncSession, repair: bool = True) -> GameStatsCheck:
+    """
+    Проверка согласованности: пересчитывает сводку с нуля и сравнивает с таблицей
+
+    Args:
+        repair: Перезаписать таблицу пересчитанными значениями
+
+    Returns:
+        GameStatsCheck: Игры, по которым сводка разошлась с данными
+    """
+    actual = await _compute(db)
+    result = await db.execute(select(GameStats))
+    stored = {
+        row.game: GameStatsSchema.model_validate(row).model_dump() for row in result.scalars()
+    }
+
+    drift = [
+        GameStatsDrift(game=game, stored=stored.get(game), actual=actual.get(game))
+        for game in sorted(stored.keys() | actual.keys())
+        if _differs(stored.get(game), actual.get(game))
+    ]
+
+    if repair and drift:
+        await refresh_games(db, [item.game for item in drift])
+        await db.commit()
+
+    return GameStatsCheck(checked_at=datetime.utcnow(), games=len(actual), drift=drift)
+
+
+async def run_game_stats_refresher(session_factory) -> None:
+    """Фоновая задача: пересчет сводки игр, отложенный через mark_games_dirty()"""
+    while True:
+        try:
+            async with session_factory() as db:
+                await refresh_dirty_games(db)
+        except Exception as e:
+            logger.exception(f"Game stats refresh failed: {e}")
+        await asyncio.sleep(settings.GAME_STATS_REFRESH_INTERVAL)
+
+
+async def run_game_stats_checker(session_factory) -> None:
+    """Фоновая задача: периодическая проверка и исправление сводки по играм"""
+    while True:
+        try:
+            async with session_factory() as db:
+                report = await check_game_stats(db)
+            if report.drift:
+                logger.warning(
+                    f"Game stats drift repaired for {len(report.drift)} games: "
+                    f"{[item.game for item in report.drift]}"
+                )
+        except Exception as e:
+            logger.exception(f"Game stats check failed: {e}")
+        await asyncio.sleep(settings.GAME_STATS_CHECK_INTERVAL)
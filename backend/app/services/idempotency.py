@@ -0,0 +1,57 @@
+import hashlib
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from ..config import settings
+from ..utils.idempotency import IdempotencyKeyReused, IdempotencyStore, StoredResponse
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+MAX_KEY_LENGTH = 255
+
+# Заголовки, которые пересчитываются при повторной отдаче ответа
+_SKIPPED_HEADERS = {b"content-length"}
+
+idempotency_store = IdempotencyStore(
+    max_bytes=settings.IDEMPOTENCY_MAX_BYTES,
+    ttl=settings.IDEMPOTENCY_TTL,
+)
+
+
+async def idempotency_middleware(request: Request, call_next):
+    """
+    Поддержка заголовка Idempotency-Key для POST-запросов
+
+    Повтор запроса с тем же ключом, методом и путем получает первый ответ
+    (статус, заголовки и тело) с заголовком Idempotent-Replayed: true,
+    обработчик при этом не выполняется. Тот же ключ с другим телом — 422.
+    """
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if request.method != "POST" or key is None:
+        return await call_next(request)
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return JSONResponse(status_code=400, content={"detail": "Invalid Idempotency-Key"})
+
+    fingerprint = hashlib.sha256(await request.body()).hexdigest()
+
+    async def execute() -> StoredResponse:
+        response = await call_next(request)
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = [(k, v) for k, v in response.raw_headers if k not in _SKIPPED_HEADERS]
+        return StoredResponse(response.status_code, headers, body)
+
+    try:
+        stored, replayed = await idempotency_store.run(
+            f"{request.method} {request.url.path} {key}", fingerprint, execute
+        )
+    except IdempotencyKeyReused:
+        return JSONResponse(
+            status_code=422,
+            content={"detail": "Idempotency-Key was already used for a different request"},
+        )
+
+    response = Response(content=stored.body, status_code=stored.status_code)
+    response.raw_headers.extend(stored.headers)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return response
@@ -0,0 +1,44 @@
+from ..config import settings
+from ..utils.cache import ResponseCache
+
+# Теги: все страницы списка и отдельный аккаунт (его карточка и страницы, где он есть)
+LIST_TAG = "accounts:list"
+
+# Поля, от которых не зависят фильтры, сортировка и фасеты каталога
+DISPLAY_ONLY_FIELDS = {"title", "description", "image_url"}
+
+listing_cache = ResponseCache(
+    max_bytes=settings.LISTING_CACHE_MAX_BYTES,
+    ttl=settings.LISTING_CACHE_TTL,
+)
+
+
+def account_tag(account_id: int) -> str:
+    """Тег записей, содержащих аккаунт"""
+    return f"account:{account_id}"
+
+
+def invalidate_accounts(account_ids, changed_fields=None) -> None:
+    """Инвалидирует кэш после массового изменения аккаунтов"""
+    tags = [account_tag(account_id) for account_id in account_ids]
+    if changed_fields is None or not set(changed_fields) <= DISPLAY_ONLY_FIELDS:
+        tags.append(LIST_TAG)
+    listing_cache.invalidate_tags(*tags)
+
+
+def invalidate_account(account_id: int = None, changed_fields=None) -> None:
+    """
+    Инвалидирует кэш после изменения аккаунта
+
+    Args:
+        account_id: ID измененного аккаунта (None для нового аккаунта)
+        changed_fields: Измененные поля. Если менялись только отображаемые поля,
+            сбрасываются лишь карточка и страницы, где аккаунт уже есть;
+            иначе состав страниц мог измениться и сбрасываются все списки.
+    """
+    tags = []
+    if account_id is not None:
+        tags.append(account_tag(account_id))
+    if changed_fields is None or not set(changed_fields) <= DISPLAY_ONLY_FIELDS:
+        tags.append(LIST_TAG)
+    listing_cache.invalidate_tags(*tags)
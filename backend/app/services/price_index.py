@@ -0,0 +1,28 @@
+import asyncio
+import logging
+import time
+
+from ..config import settings
+from ..utils.price_index import PriceIndex
+
+logger = logging.getLogger(__name__)
+
+# Цены доступных аккаунтов по играм для GET /games/{game}/prices
+price_index = PriceIndex(settle=settings.PRICE_INDEX_SETTLE_SECONDS)
+
+
+async def run_price_indexer(session_factory) -> None:
+    """Фоновая задача: полная загрузка цен и догон изменений между загрузками"""
+    last_load = None
+    while True:
+        try:
+            async with session_factory() as db:
+                now = time.monotonic()
+                if last_load is None or now - last_load >= settings.PRICE_INDEX_RELOAD_INTERVAL:
+                    await price_index.load(db)
+                    last_load = now
+                else:
+                    await price_index.refresh(db)
+        except Exception as e:
+            logger.exception(f"Price index job failed: {e}")
+        await asyncio.sleep(settings.PRICE_INDEX_REFRESH_INTERVAL)
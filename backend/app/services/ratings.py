@@ -0,0 +1,238 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Float, and_, case, cast, func, literal, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models.deal import Deal, Review
+from ..models.user import RATING_STARS, User
+from ..schemas.user import SellerRatingCheck, SellerRatingDrift
+from .listing_cache import invalidate_accounts
+from .sellers import SUMMARY_COLUMNS, refresh_seller_summaries
+from .user_cache import invalidate_users
+
+logger = logging.getLogger(__name__)
+
+# Допустимая погрешность сравнения производных значений с плавающей точкой
+RATING_TOLERANCE = 1e-6
+
+
+def derived_ratings(rating_sum, rating_count) -> dict:
+    """
+    Значения rating и rating_smoothed для суммы и числа оценок (выражения SQL)
+
+    rating — среднее (0 без отзывов), rating_smoothed — байесовская оценка
+    (w * m + sum) / (w + count) с априорной средней m и весом w; без отзывов
+    или при w = 0 сглаженной оценки нет.
+    """
+    weight = settings.RATING_PRIOR_WEIGHT
+    rating_sum = cast(rating_sum, Float)
+    rating = case((rating_count > 0, rating_sum / rating_count), else_=literal(0.0))
+    if weight > 0:
+        smoothed = case(
+            (
+                rating_count > 0,
+                (weight * settings.RATING_PRIOR_MEAN + rating_sum) / (weight + rating_count),
+            ),
+            else_=None,
+        )
+    else:
+        smoothed = literal(None, Float)
+    return {"rating": rating, "rating_smoothed": smoothed}
+
+
+async def apply_review_rating(
+    db: AsyncSession, deal_id: int, new_rating: Optional[int], old_rating: Optional[int] = None
+) -> Tuple[Optional[int], List[int]]:
+    """
+    Учитывает новую оценку отзыва (или ее изменение) в рейтинге продавца сделки
+
+    Сумма, число оценок и счетчики распределения меняются одним UPDATE
+    с приращениями, поэтому параллельные отзывы на сделки одного продавца
+    не теряют друг друга; производные значения считаются в том же выражении
+    от новых суммы и числа. Сводка продавца в его объявлениях обновляется
+    в той же транзакции. commit остается за вызывающим кодом.
+
+    Args:
+        new_rating: Оценка после изменения
+        old_rating: Прежняя оценка (None для нового отзыва)
+
+    Returns:
+        Tuple[Optional[int], List[int]]: ID продавца (None, если рейтинг не менялся)
+            и ID его объявлений — для инвалидации кэшей после commit
+    """
+    if new_rating == old_rating:
+        return None, []
+
+    new_sum = User.rating_sum + (new_rating or 0) - (old_rating or 0)
+    new_count = User.rating_count + (new_rating is not None) - (old_rating is not None)
+    histogram = {}
+    if new_rating is not None:
+        histogram[f"rating_{new_rating}_count"] = User.histogram_column(new_rating) + 1
+    if old_rating is not None:
+        histogram[f"rating_{old_rating}_count"] = User.histogram_column(old_rating) - 1
+
+    seller_id = select(Deal.seller_id).where(Deal.id == deal_id).scalar_subquery()
+    statement = (
+        update(User)
+        .where(User.id == seller_id)
+        .values(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            **histogram,
+            **derived_ratings(new_sum, new_count),
+            updated_at=datetime.utcnow(),
+            version=User.version + 1,
+        )
+        # Строка, а не объект User: загруженный раньше в сессию продавец
+        # не обновляется из RETURNING, и сводка получила бы старый рейтинг
+        .returning(*SUMMARY_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    seller = (await db.execute(statement)).one_or_none()
+    if seller is None:
+        return None, []
+    return seller.id, await refresh_seller_summaries(db, seller)
+
+
+def _differs(stored, actual):
+    """Условие SQL: значения расходятся (с учетом NULL и погрешности)"""
+    return or_(
+        and_(stored.is_(None), actual.isnot(None)),
+        and_(stored.isnot(None), actual.is_(None)),
+        func.abs(stored - actual) > RATING_TOLERANCE,
+    )
+
+
+async def check_seller_ratings(db: AsyncSession, repair: bool = True) -> SellerRatingCheck:
+    """
+    Сверка рейтингов: пересчет по всем отзывам одним запросом
+
+    Суммы, числа и распределения оценок всех продавцов считаются одним
+    GROUP BY по отзывам и сделкам и сравниваются с users в том же запросе
+    (LEFT JOIN), вместе с производными значениями; из БД возвращаются
+    только расхождения.
+
+    Args:
+        repair: Записать пересчитанные значения расходящимся продавцам
+
+    Returns:
+        SellerRatingCheck: Продавцы, у которых рейтинг разошелся с отзывами
+    """
+    totals = (
+        select(
+            Deal.seller_id.label("seller_id"),
+            func.sum(Review.rating).label("rating_sum"),
+            func.count(Review.id).label("rating_count"),
+            *[
+                func.count(case((Review.rating == stars, 1))).label(f"rating_{stars}_count")
+                for stars in RATING_STARS
+            ],
+        )
+        .join(Deal, Deal.id == Review.deal_id)
+        .group_by(Deal.seller_id)
+        .subquery()
+    )
+    actual_histogram = {
+        stars: func.coalesce(totals.c[f"rating_{stars}_count"], 0) for stars in RATING_STARS
+    }
+    actual_sum = func.coalesce(totals.c.rating_sum, 0)
+    actual_count = func.coalesce(totals.c.rating_count, 0)
+    derived = derived_ratings(actual_sum, actual_count)
+    query = (
+        select(
+            User.id,
+            User.rating_sum,
+            User.rating_count,
+            User.rating,
+            actual_sum.label("actual_sum"),
+            actual_count.label("actual_count"),
+            derived["rating"].label("actual_rating"),
+        )
+        .outerjoin(totals, totals.c.seller_id == User.id)
+        .where(
+            or_(
+                User.rating_sum != actual_sum,
+                User.rating_count != actual_count,
+                *[
+                    User.histogram_column(stars) != actual_histogram[stars]
+                    for stars in RATING_STARS
+                ],
+                _differs(User.rating, derived["rating"]),
+                _differs(User.rating_smoothed, derived["rating_smoothed"]),
+            )
+        )
+        .order_by(User.id)
+    )
+    drift = [
+        SellerRatingDrift(
+            user_id=row.id,
+            stored_sum=row.rating_sum,
+            stored_count=row.rating_count,
+            stored_rating=row.rating,
+            actual_sum=row.actual_sum,
+            actual_count=row.actual_count,
+            actual_rating=row.actual_rating,
+        )
+        for row in (await db.execute(query)).all()
+    ]
+    sellers = await db.scalar(select(func.count()).select_from(User))
+
+    account_ids = []
+    if repair and drift:
+        # Пересчет внутри UPDATE коррелированными подзапросами: отзыв, записанный
+        # после сверки, все равно будет учтен
+        reviews = select(Review.rating).join(Deal, Deal.id == Review.deal_id).where(
+            Deal.seller_id == User.id
+        )
+        repaired_sum = func.coalesce(
+            reviews.with_only_columns(func.sum(Review.rating)).scalar_subquery(), 0
+        )
+        repaired_count = reviews.with_only_columns(func.count(Review.id)).scalar_subquery()
+        repaired_histogram = {
+            f"rating_{stars}_count": reviews.with_only_columns(func.count(Review.id))
+            .where(Review.rating == stars)
+            .scalar_subquery()
+            for stars in RATING_STARS
+        }
+        statement = (
+            update(User)
+            .where(User.id.in_([item.user_id for item in drift]))
+            .values(
+                rating_sum=repaired_sum,
+                rating_count=repaired_count,
+                **repaired_histogram,
+                **derived_ratings(repaired_sum, repaired_count),
+                updated_at=datetime.utcnow(),
+                version=User.version + 1,
+            )
+            .returning(*SUMMARY_COLUMNS)
+            .execution_options(synchronize_session=False)
+        )
+        for seller in (await db.execute(statement)).all():
+            account_ids.extend(await refresh_seller_summaries(db, seller))
+        await db.commit()
+        invalidate_users([item.user_id for item in drift])
+        if account_ids:
+            invalidate_accounts(account_ids, ["seller"])
+
+    return SellerRatingCheck(checked_at=datetime.utcnow(), sellers=sellers, drift=drift)
+
+
+async def run_seller_rating_checker(session_factory) -> None:
+    """Фоновая задача: периодическая сверка и исправление рейтингов продавцов"""
+    while True:
+        try:
+            async with session_factory() as db:
+                report = await check_seller_ratings(db)
+            if report.drift:
+                logger.warning(
+                    f"Seller rating drift repaired for {len(report.drift)} users: "
+                    f"{[item.user_id for item in report.drift]}"
+                )
+        except Exception as e:
+            logger.exception(f"Seller rating check failed: {e}")
+        await asyncio.sleep(settings.RATING_CHECK_INTERVAL)
@@ -0,0 +1,51 @@
+import re
+
+from sqlalchemy import false, func, literal_column, or_, select
+from sqlalchemy.sql import Select, column, table
+
+from ..models.account import Account
+
+# Конфигурация без стемминга: в каталоге смешаны русские и английские названия.
+# Должна совпадать с конфигурацией search_vector в миграции
+SEARCH_CONFIG = "simple"
+
+# Поисковый индекс создает миграция a84e6b2c7f13 (add_accounts_search):
+# в PostgreSQL колонка search_vector (GENERATED ... STORED), поэтому в модели
+# Account она не объявлена; в SQLite таблица accounts_fts с триггерами
+search_vector = literal_column("accounts.search_vector")
+
+accounts_fts = table("accounts_fts", column("rowid"))
+
+
+def _fts5_match(q: str) -> str:
+    """Строит безопасное выражение MATCH: каждое слово в кавычках и с префиксным поиском"""
+    return " ".join(f'"{token}"*' for token in re.findall(r"\w+", q))
+
+
+def build_search_query(dialect: str, q: str) -> Select:
+    """
+    Запрос поиска аккаунтов, отсортированный по релевантности
+
+    PostgreSQL: tsvector + GIN, дополнительно pg_trgm для опечаток в названии
+    (оператор % использует порог pg_trgm.similarity_threshold, по умолчанию 0.3).
+    SQLite: FTS5 с ранжированием bm25 и префиксным поиском по словам.
+    """
+    if dialect == "postgresql":
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+        rank = func.ts_rank_cd(search_vector, ts_query) + func.similarity(Account.title, q)
+        return (
+            select(Account)
+            .where(or_(search_vector.op("@@")(ts_query), Account.title.op("%")(q)))
+            .order_by(rank.desc(), Account.id.desc())
+        )
+
+    match = _fts5_match(q)
+    if not match:
+        return select(Account).where(false())
+
+    return (
+        select(Account)
+        .join(accounts_fts, accounts_fts.c.rowid == Account.id)
+        .where(literal_column("accounts_fts").op("MATCH")(match))
+        .order_by(func.bm25(literal_column("accounts_fts")), Account.id.desc())
+    )
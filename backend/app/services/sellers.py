@@ -0,0 +1,99 @@
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.account import Account
+from ..models.user import User
+
+# Колонки пользователя, из которых строится сводка: UPDATE ... RETURNING этих
+# колонок дает новые значения даже для пользователя, уже загруженного в сессию
+SUMMARY_COLUMNS = (User.id, User.username, User.rating)
+
+
+def seller_summary(user: User) -> dict:
+    """
+    Компактная копия данных продавца, хранимая в Account.seller
+
+    user — объект User или строка с колонками SUMMARY_COLUMNS.
+    """
+    return {"id": user.id, "name": user.username, "rating": user.rating}
+
+
+async def resolve_seller(
+    db: AsyncSession, seller_id: Optional[int], seller: Optional[dict]
+) -> Tuple[Optional[int], Optional[dict]]:
+    """
+    Определяет продавца для аккаунта
+
+    seller_id берется из запроса, иначе из seller["id"]. Если такой пользователь
+    есть, сводка строится по его записи; иначе переданный JSON сохраняется как есть.
+
+    Returns:
+        Tuple[Optional[int], Optional[dict]]: seller_id и сводка продавца
+    """
+    candidate = seller_id if seller_id is not None else (seller or {}).get("id")
+    if candidate:
+        user = await db.get(User, candidate)
+        if user is not None:
+            return user.id, seller_summary(user)
+    return None, seller
+
+
+async def attach_sellers(db: AsyncSession, rows: List[dict]) -> None:
+    """
+    resolve_seller для пачки строк импорта одним запросом к users
+
+    Строки меняются на месте: заполняются seller_id, seller и seller_rating.
+    """
+    candidates = {
+        row.get("seller_id") or (row.get("seller") or {}).get("id") for row in rows
+    } - {None, 0}
+    if not candidates:
+        return
+
+    result = await db.execute(select(User).where(User.id.in_(candidates)))
+    users = {user.id: user for user in result.scalars()}
+    for row in rows:
+        user = users.get(row.get("seller_id") or (row.get("seller") or {}).get("id"))
+        if user is None:
+            row["seller_id"] = None
+            continue
+        row["seller_id"] = user.id
+        row["seller"] = seller_summary(user)
+        row["seller_rating"] = user.rating
+
+
+async def refresh_seller_summaries(db: AsyncSession, user: User) -> List[int]:
+    """
+    Обновляет сводку продавца во всех его аккаунтах одним UPDATE по индексу seller_id
+
+    Вызывается при изменении username или rating пользователя, в той же транзакции.
+
+    Returns:
+        List[int]: ID обновленных аккаунтов (для инвалидации кэша)
+    """
+    statement = (
+        update(Account)
+        .where(Account.seller_id == user.id)
+        .values(
+            seller=seller_summary(user),
+            seller_rating=user.rating,
+            updated_at=datetime.utcnow(),
+            version=Account.version + 1,
+        )
+        .returning(Account.id)
+        .execution_options(synchronize_session=False)
+    )
+    return (await db.execute(statement)).scalars().all()
+
+
+def summary_changed(fields: Iterable[str]) -> bool:
+    """
+    Затрагивают ли поля, измененные через PATCH /users, сводку продавца
+
+    Рейтинг так не меняется: его пересчитывает apply_review_rating, который
+    сам обновляет сводку.
+    """
+    return "username" in set(fields)
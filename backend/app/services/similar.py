@@ -0,0 +1,30 @@
+import asyncio
+import logging
+import time
+
+from ..config import settings
+from ..utils.similarity import SimilarityIndex
+
+logger = logging.getLogger(__name__)
+
+# Индекс похожих объявлений для GET /accounts/{id}/similar
+similarity_index = SimilarityIndex(
+    max_delta=settings.SIMILAR_MAX_DELTA, settle=settings.SIMILAR_SETTLE_SECONDS
+)
+
+
+async def run_similarity_indexer(session_factory) -> None:
+    """Фоновая задача: полная сборка индекса и догон изменений между сборками"""
+    last_load = None
+    while True:
+        try:
+            async with session_factory() as db:
+                now = time.monotonic()
+                if last_load is None or now - last_load >= settings.SIMILAR_RELOAD_INTERVAL:
+                    await similarity_index.load(db)
+                    last_load = now
+                else:
+                    await similarity_index.refresh(db)
+        except Exception as e:
+            logger.exception(f"Similarity index job failed: {e}")
+        await asyncio.sleep(settings.SIMILAR_REFRESH_INTERVAL)
@@ -0,0 +1,163 @@
+import asyncio
+import gzip
+import io
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models.account import Account
+from ..schemas.account import Account as AccountSchema
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = "accounts.ndjson.gz"
+META_FILE = "accounts.meta.json"
+BATCH_SIZE = 1000
+
+# Один писатель на процесс: пересборка и дописывание не должны пересекаться
+_lock = asyncio.Lock()
+
+
+def snapshot_path() -> Path:
+    """Путь к файлу снимка"""
+    return Path(settings.SNAPSHOT_DIR) / SNAPSHOT_FILE
+
+
+def read_meta() -> Optional[dict]:
+    """Метаданные снимка: водяной знак updated_at, число строк, время сборки"""
+    try:
+        return json.loads((Path(settings.SNAPSHOT_DIR) / META_FILE).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta: dict) -> None:
+    path = Path(settings.SNAPSHOT_DIR) / META_FILE
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, path)
+
+
+def _encode(accounts) -> bytes:
+    """Строки NDJSON в том же формате, что и ответ GET /accounts/{id}"""
+    return b"".join(
+        AccountSchema.model_validate(account).model_dump_json().encode() + b"\n"
+        for account in accounts
+    )
+
+
+def _append_bytes(path: Path, data: bytes) -> None:
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+async def _max_updated_at(db: AsyncSession) -> Optional[datetime]:
+    return (await db.execute(select(func.max(Account.updated_at)))).scalar()
+
+
+async def _write_rows(db: AsyncSession, query, gz) -> int:
+    """Потоково выбирает строки пачками и дописывает их в gzip-файл"""
+    rows = 0
+    result = await db.stream_scalars(query.execution_options(yield_per=BATCH_SIZE))
+    async for batch in result.partitions():
+        await asyncio.to_thread(gz.write, _encode(batch))
+        rows += len(batch)
+    return rows
+
+
+async def rebuild_snapshot(db: AsyncSession) -> dict:
+    """
+    Полная пересборка снимка доступных аккаунтов
+
+    Файл собирается во временный и атомарно подменяет старый,
+    поэтому уже начатые выгрузки дочитывают прежнюю версию.
+    """
+    async with _lock:
+        started = time.monotonic()
+        path = snapshot_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Водяной знак берем до выборки: строки, измененные во время сборки,
+        # попадут в следующее дописывание (повтор строки допустим)
+        watermark = await _max_updated_at(db)
+        query = select(Account).where(Account.is_available.is_(True)).order_by(Account.id)
+
+        tmp = path.with_suffix(".tmp")
+        gz = await asyncio.to_thread(gzip.open, tmp, "wb", 6)
+        try:
+            rows = await _write_rows(db, query, gz)
+        finally:
+            await asyncio.to_thread(gz.close)
+        os.replace(tmp, path)
+
+        meta = {
+            "watermark": watermark.isoformat() if watermark else None,
+            "rows": rows,
+            "appended_rows": 0,
+            "built_at": datetime.utcnow().isoformat(),
+        }
+        _write_meta(meta)
+        logger.info(f"Snapshot rebuilt: {rows} rows in {time.monotonic() - started:.2f}s")
+        return meta
+
+
+async def append_changes(db: AsyncSession) -> dict:
+    """
+    Дописывает в снимок аккаунты, измененные после водяного знака
+
+    Изменения пишутся отдельным gzip-членом в конец файла (многочленный gzip
+    читается стандартными распаковщиками как один поток). Строка содержит
+    is_available, поэтому снятые с продажи аккаунты тоже видны потребителю:
+    при чтении применяется последняя запись для каждого id. Удаленные
+    аккаунты исчезают из снимка при следующей полной пересборке.
+    """
+    meta = read_meta()
+    if meta is None or not snapshot_path().exists():
+        return await rebuild_snapshot(db)
+
+    async with _lock:
+        watermark = await _max_updated_at(db)
+        if watermark is None or meta["watermark"] == watermark.isoformat():
+            return meta
+
+        query = select(Account).order_by(Account.updated_at, Account.id)
+        if meta["watermark"]:
+            query = query.where(Account.updated_at > datetime.fromisoformat(meta["watermark"]))
+
+        # Член gzip собираем в памяти и дописываем одной записью,
+        # чтобы сбой посреди выборки не оставил в файле оборванный член
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=6) as gz:
+            rows = await _write_rows(db, query, gz)
+        if rows:
+            await asyncio.to_thread(_append_bytes, snapshot_path(), buffer.getvalue())
+
+        meta.update(watermark=watermark.isoformat(), appended_rows=meta["appended_rows"] + rows)
+        _write_meta(meta)
+        logger.info(f"Snapshot appended: {rows} changed rows")
+        return meta
+
+
+async def run_snapshot_scheduler(session_factory) -> None:
+    """Фоновая задача: периодическая полная пересборка и дописывание изменений между ними"""
+    last_rebuild = None
+    while True:
+        try:
+            async with session_factory() as db:
+                now = time.monotonic()
+                if last_rebuild is None or now - last_rebuild >= settings.SNAPSHOT_REBUILD_INTERVAL:
+                    await rebuild_snapshot(db)
+                    last_rebuild = now
+                else:
+                    await append_changes(db)
+        except Exception as e:
+            logger.exception(f"Snapshot job failed: {e}")
+        await asyncio.sleep(settings.SNAPSHOT_APPEND_INTERVAL)
@@ -0,0 +1,57 @@
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+from ..models.user import User
+from ..schemas.user import User as UserSchema
+from ..utils.cache import LookupCache
+
+# Кэш telegram_id -> пользователь (JSON-совместимый dict схемы ответа)
+user_cache = LookupCache(
+    max_entries=settings.USER_CACHE_MAX_ENTRIES,
+    ttl=settings.USER_CACHE_TTL,
+    negative_ttl=settings.USER_CACHE_NEGATIVE_TTL,
+)
+
+
+def user_tag(user_id: int) -> str:
+    """Тег записи пользователя: по нему инвалидируют изменения по ID"""
+    return f"user:{user_id}"
+
+
+async def get_user_by_telegram(db: AsyncSession, telegram_id: int) -> Optional[dict]:
+    """
+    Пользователь по telegram_id из кэша или из БД
+
+    Промах кэшируется тоже: повторный запрос несуществующего telegram_id
+    не идет в БД до истечения USER_CACHE_NEGATIVE_TTL или создания пользователя.
+
+    Returns:
+        Optional[dict]: Пользователь в виде ответа API или None
+    """
+    cached = user_cache.get(telegram_id)
+    if cached is not None:
+        return cached.value
+    version = user_cache.version
+
+    query = select(User).where(User.telegram_id == telegram_id)
+    user = (await db.execute(query)).scalar_one_or_none()
+    if user is None:
+        user_cache.set(telegram_id, None, version=version)
+        return None
+    value = UserSchema.model_validate(user).model_dump(mode="json")
+    user_cache.set(telegram_id, value, [user_tag(user.id)], version=version)
+    return value
+
+
+def invalidate_users(user_ids: Iterable[int] = (), telegram_ids: Iterable[int] = ()) -> None:
+    """
+    Инвалидирует кэш после изменения пользователей (вызывать после commit)
+
+    Args:
+        user_ids: ID измененных или удаленных пользователей
+        telegram_ids: telegram_id, для которых могли быть отрицательные записи
+    """
+    user_cache.invalidate(telegram_ids, [user_tag(user_id) for user_id in user_ids])
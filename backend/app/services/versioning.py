@@ -0,0 +1,58 @@
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.base import BaseModel
+
+
+async def update_versioned(
+    db: AsyncSession,
+    model: type,
+    object_id: int,
+    values: dict,
+    versions: Optional[List[int]] = None,
+    not_found: str = "Not found",
+    key=None,
+) -> BaseModel:
+    """
+    Обновляет строку одним условным UPDATE ... WHERE id AND version RETURNING
+
+    Версия увеличивается в том же запросе, поэтому из двух параллельных
+    изменений с одной версией применится только одно. Без изменений
+    выполняется только проверка условия. commit остается за вызывающим кодом.
+
+    Args:
+        versions: Допустимые текущие версии из If-Match (None — без условия)
+        key: Уникальная колонка, по которой ищется строка (по умолчанию id)
+
+    Raises:
+        HTTPException: 404, если строки нет; 412, если версия не совпала
+    """
+    key = key if key is not None else model.id
+    conditions = [key == object_id]
+    if versions is not None:
+        conditions.append(model.version.in_(versions))
+
+    if values:
+        statement = (
+            update(model)
+            .where(*conditions)
+            .values(**values, version=model.version + 1, updated_at=datetime.utcnow())
+            .returning(model)
+            # Синхронизация сессии по умолчанию: условия простые, и объект, уже
+            # загруженный в сессию, получает значения из RETURNING
+            .execution_options(populate_existing=True)
+        )
+    else:
+        statement = select(model).where(*conditions).execution_options(populate_existing=True)
+    obj = (await db.execute(statement)).scalar_one_or_none()
+    if obj is not None:
+        return obj
+
+    # Различаем причины только на пути отказа
+    if versions is None or await db.scalar(select(model.id).where(key == object_id)) is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    raise HTTPException(status_code=412, detail="Resource was modified (If-Match failed)")
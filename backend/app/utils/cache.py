@@ -0,0 +1,249 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Set
+
+
+@dataclass
+class CachedResponse:
+    """Закэшированный ответ: тело и ETag, вычисленный при сохранении"""
+
+    body: bytes
+    etag: Optional[str]
+    expires_at: float
+    tags: frozenset
+    size: int
+
+
+class ResponseCache:
+    """
+    Ограниченный по объему LRU-кэш готовых JSON-ответов с TTL
+
+    Значения хранятся как bytes, поэтому попадание в кэш не требует
+    ни запроса к БД, ни валидации Pydantic. Записи помечаются тегами,
+    инвалидация идет по тегу. Кэш живет в памяти процесса: при нескольких
+    воркерах устаревание между ними ограничено TTL.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        self._size = 0
+        # Увеличивается при каждой инвалидации; см. set()
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Возвращает закэшированный ответ или None"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def set(
+        self,
+        key: str,
+        value: bytes,
+        tags: Iterable[str] = (),
+        version: int = None,
+        etag: str = None,
+    ) -> None:
+        """
+        Сохраняет ответ
+
+        Args:
+            version: Значение self.version на момент начала чтения из БД.
+                Если с тех пор была инвалидация, ответ мог устареть и не сохраняется.
+            etag: ETag ответа, отдается вместе с телом при попадании в кэш
+        """
+        if version is not None and version != self.version:
+            return
+
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        entry = CachedResponse(value, etag, time.monotonic() + self.ttl, frozenset(tags), size)
+        self._entries[key] = entry
+        self._size += size
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while self._size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate_tags(self, *tags: str) -> None:
+        """Удаляет все записи, помеченные любым из тегов"""
+        self.version += 1
+        for tag in tags:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Полностью очищает кэш"""
+        self.version += 1
+        self._entries.clear()
+        self._tags.clear()
+        self._size = 0
+
+    def stats(self) -> dict:
+        """Счетчики для мониторинга"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
+
+
+@dataclass
+class CachedLookup:
+    """Результат поиска по ключу; value None — ключа нет в БД (отрицательная запись)"""
+
+    value: Optional[dict]
+    expires_at: float
+    tags: frozenset
+
+
+class LookupCache:
+    """
+    Ограниченный по числу записей LRU-кэш результатов поиска по ключу с TTL
+
+    Кэширует и отсутствие ключа (отрицательные записи, со своим, обычно
+    меньшим TTL), чтобы повторные запросы несуществующего ключа не шли в БД.
+    Записи помечаются тегами, как в ResponseCache; защита от сохранения
+    устаревшего значения — через version.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, negative_ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[object, CachedLookup]" = OrderedDict()
+        self._tags: Dict[str, Set[object]] = {}
+        # Увеличивается при каждой инвалидации; см. set()
+        self.version = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key) -> Optional[CachedLookup]:
+        """Возвращает запись (в том числе отрицательную) или None при промахе"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        if entry.value is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def set(
+        self, key, value: Optional[dict], tags: Iterable[str] = (), version: int = None
+    ) -> None:
+        """
+        Сохраняет результат поиска (None — ключ не найден)
+
+        Args:
+            version: Значение self.version на момент начала чтения из БД.
+                Если с тех пор была инвалидация, результат мог устареть и не сохраняется.
+        """
+        if version is not None and version != self.version:
+            return
+        if self.max_entries <= 0:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        ttl = self.ttl if value is not None else self.negative_ttl
+        entry = CachedLookup(value, time.monotonic() + ttl, frozenset(tags))
+        self._entries[key] = entry
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, keys: Iterable = (), tags: Iterable[str] = ()) -> None:
+        """Удаляет записи по ключам и по тегам"""
+        self.version += 1
+        self.invalidations += 1
+        keys = set(keys)
+        for tag in tags:
+            keys.update(self._tags.get(tag, ()))
+        for key in keys:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Полностью очищает кэш"""
+        self.version += 1
+        self._entries.clear()
+        self._tags.clear()
+
+    def stats(self) -> dict:
+        """Счетчики для мониторинга"""
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_ratio": (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+        }
+
+    def _remove(self, key) -> None:
+        entry = self._entries.pop(key)
+        for tag in entry.tags:
+            keys = self._tags.get(tag)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
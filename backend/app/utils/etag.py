@@ -0,0 +1,59 @@
+import hashlib
+from typing import Any, List, Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Строит сильный ETag из версии ресурса
+
+    Args:
+        parts: Значения, однозначно определяющие представление ресурса
+            (тип и ID ресурса, updated_at, параметры запроса и т.п.)
+    """
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Проверяет заголовок If-None-Match (слабое сравнение, как требует RFC 9110)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    candidates = [value.strip() for value in header.split(",")]
+    return etag in (value[2:] if value.startswith("W/") else value for value in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    """Ответ 304 без тела"""
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def version_etag(version: int) -> str:
+    """ETag представления ресурса по номеру его версии"""
+    return f'"{version}"'
+
+
+def if_match_versions(request: Request) -> Optional[List[int]]:
+    """
+    Версии ресурса из заголовка If-Match
+
+    Returns:
+        Optional[List[int]]: None, если условия нет (заголовок отсутствует или "*");
+            иначе номера версий. Слабые и чужие ETag не совпадают ни с одной
+            версией: If-Match требует строгого сравнения (RFC 9110).
+    """
+    header = request.headers.get("if-match")
+    if not header or header.strip() == "*":
+        return None
+
+    versions = []
+    for value in header.split(","):
+        value = value.strip()
+        if len(value) > 2 and value[0] == value[-1] == '"' and value[1:-1].isdigit():
+            versions.append(int(value[1:-1]))
+    return versions
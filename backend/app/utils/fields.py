@@ -0,0 +1,70 @@
+from typing import Any, Collection, Iterable, List, Optional, Type
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel, TypeAdapter
+
+_rows = TypeAdapter(Any)
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[List[str]]:
+    """
+    Разбирает параметр ?fields=id,title,price
+
+    Args:
+        fields: Значение параметра запроса
+        schema: Схема ответа, поля которой можно запрашивать
+
+    Returns:
+        Optional[List[str]]: Запрошенные поля в порядке запроса или None, если параметр не задан
+
+    Raises:
+        HTTPException: Если запрошено неизвестное поле
+    """
+    if fields is None:
+        return None
+
+    requested = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in schema.model_fields]
+    if not requested or unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+
+def parse_expand(expand: Optional[str], allowed: Collection[str]) -> List[str]:
+    """
+    Разбирает параметр ?expand=account,seller
+
+    Returns:
+        List[str]: Запрошенные связи в порядке запроса (пустой список, если параметр не задан)
+
+    Raises:
+        HTTPException: Если запрошена неизвестная связь
+    """
+    if not expand:
+        return []
+
+    requested = list(dict.fromkeys(name.strip() for name in expand.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown expand: {', '.join(unknown)}")
+    return requested
+
+
+def select_columns(model, fields: Iterable[str], extra: Iterable[str] = ()) -> list:
+    """Колонки модели для SELECT: запрошенные поля плюс служебные (id, ключи сортировки)"""
+    return [getattr(model, name) for name in dict.fromkeys([*fields, *extra])]
+
+
+def sparse_rows(rows, fields: List[str]) -> List[dict]:
+    """Оставляет в строках результата только запрошенные поля"""
+    return [{name: getattr(row, name) for name in fields} for row in rows]
+
+
+def encode_json(content: Any) -> bytes:
+    """Сериализует словари и строки результата в JSON (datetime, Enum и схемы Pydantic)"""
+    return _rows.dump_json(content)
+
+
+def sparse_response(rows, fields: List[str]) -> Response:
+    """Ответ со списком строк, содержащих только запрошенные поля"""
+    return Response(content=encode_json(sparse_rows(rows, fields)), media_type="application/json")
@@ -0,0 +1,118 @@
+import os
+from email.utils import formatdate
+from typing import Optional, Tuple
+
+import anyio
+from fastapi import HTTPException, Request, Response
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Разбирает заголовок Range с одним диапазоном байт
+
+    Returns:
+        Optional[Tuple[int, int]]: Начало и конец диапазона включительно или None,
+            если заголовок не поддерживается (тогда отдается весь файл)
+
+    Raises:
+        HTTPException: 416, если диапазон лежит за пределами файла
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+
+    start_str, _, end_str = spec.strip().partition("-")
+    try:
+        if start_str:
+            start = int(start_str)
+            end = int(end_str) if end_str else size - 1
+        else:
+            # bytes=-N: последние N байт
+            start = max(size - int(end_str), 0)
+            end = size - 1
+    except ValueError:
+        return None
+
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, min(end, size - 1)
+
+
+class RangeFileResponse(Response):
+    """
+    Отдача файла с поддержкой Range/If-Range
+
+    Файл открывается при создании ответа, поэтому его атомарная замена
+    или дописывание во время отдачи не влияют на уже начатый ответ.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(
+        self, path: str, request: Request, media_type: str, filename: Optional[str] = None
+    ):
+        self._file = open(path, "rb")
+        stat = os.fstat(self._file.fileno())
+        size = stat.st_size
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+
+        headers = {
+            "Accept-Ranges": "bytes",
+            "ETag": etag,
+            "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        }
+        if filename:
+            headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+        byte_range = None
+        if_range = request.headers.get("if-range")
+        if "range" in request.headers and size and (if_range is None or if_range == etag):
+            try:
+                byte_range = parse_range(request.headers["range"], size)
+            except HTTPException:
+                self._file.close()
+                raise
+
+        if byte_range is None:
+            self.start, end, status_code = 0, size - 1, 200
+        else:
+            (self.start, end), status_code = byte_range, 206
+            headers["Content-Range"] = f"bytes {self.start}-{end}/{size}"
+
+        self.length = end - self.start + 1
+        headers["Content-Length"] = str(self.length)
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            if scope["method"] == "HEAD":
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+
+            offset, remaining = self.start, self.length
+            while remaining > 0:
+                chunk = await anyio.to_thread.run_sync(
+                    os.pread, self._file.fileno(), min(self.chunk_size, remaining), offset
+                )
+                if not chunk:
+                    break
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": remaining > 0}
+                )
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            self._file.close()
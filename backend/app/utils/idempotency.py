@@ -0,0 +1,139 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+
+class IdempotencyKeyReused(Exception):
+    """Ключ уже использован для запроса с другим телом"""
+
+
+@dataclass
+class StoredResponse:
+    """Сохраненный первый ответ на запрос с ключом идемпотентности"""
+
+    status_code: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+    fingerprint: str = ""
+    expires_at: float = 0.0
+    size: int = 0
+
+
+@dataclass
+class _InFlight:
+    fingerprint: str
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+class IdempotencyStore:
+    """
+    Ограниченное по объему LRU-хранилище ответов по ключам идемпотентности с TTL
+
+    Первый запрос с ключом выполняется, его ответ сохраняется; повторы
+    получают сохраненный ответ без выполнения обработчика. Повтор, пришедший
+    во время выполнения первого запроса, ждет его завершения. Ответы 5xx не
+    сохраняются: такой запрос можно повторить. Хранилище живет в памяти
+    процесса, как и ResponseCache.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._in_flight: Dict[str, _InFlight] = {}
+        self._size = 0
+        self.executed = 0
+        self.replayed = 0
+        self.waited = 0
+        self.evictions = 0
+
+    async def run(
+        self, key: str, fingerprint: str, handler: Callable[[], Awaitable[StoredResponse]]
+    ) -> Tuple[StoredResponse, bool]:
+        """
+        Выполняет handler один раз для ключа
+
+        Args:
+            key: Ключ идемпотентности вместе с областью (метод и путь)
+            fingerprint: Хэш тела запроса; повтор с другим телом — ошибка клиента
+
+        Returns:
+            Tuple[StoredResponse, bool]: Ответ и признак повтора (True — из хранилища)
+
+        Raises:
+            IdempotencyKeyReused: Если ключ использован для запроса с другим телом
+        """
+        while True:
+            entry = self._get(key)
+            if entry is not None:
+                if entry.fingerprint != fingerprint:
+                    raise IdempotencyKeyReused(key)
+                self.replayed += 1
+                return entry, True
+
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                break
+            if in_flight.fingerprint != fingerprint:
+                raise IdempotencyKeyReused(key)
+            # После завершения первого запроса ответ уже в хранилище; если он
+            # не сохранился (5xx или исключение), повтор выполнится сам
+            self.waited += 1
+            await in_flight.done.wait()
+
+        in_flight = self._in_flight[key] = _InFlight(fingerprint)
+        try:
+            response = await handler()
+            self.executed += 1
+            if response.status_code < 500:
+                self._set(key, fingerprint, response)
+            return response, False
+        finally:
+            del self._in_flight[key]
+            in_flight.done.set()
+
+    def stats(self) -> dict:
+        """Счетчики для мониторинга"""
+        return {
+            "entries": len(self._entries),
+            "in_flight": len(self._in_flight),
+            "size_bytes": self._size,
+            "max_bytes": self.max_bytes,
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "waited": self.waited,
+            "evictions": self.evictions,
+        }
+
+    def _get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _set(self, key: str, fingerprint: str, response: StoredResponse) -> None:
+        size = len(key) + len(response.body) + sum(len(k) + len(v) for k, v in response.headers)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        response.fingerprint = fingerprint
+        response.expires_at = time.monotonic() + self.ttl
+        response.size = size
+        self._entries[key] = response
+        self._size += size
+
+        while self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._size -= entry.size
@@ -0,0 +1,74 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+from sqlalchemy.sql import Select
+
+
+def _encode_value(value: Any) -> Any:
+    """Приводит значение ключа к JSON-совместимому виду"""
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    """Восстанавливает значение ключа из курсора"""
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(sort: str, values: Sequence[Any]) -> str:
+    """
+    Кодирует позицию последней записи страницы в непрозрачный курсор
+
+    Args:
+        sort: Имя сортировки, для которой построен курсор
+        values: Значения ключа сортировки последней записи
+
+    Returns:
+        str: Курсор в формате base64url
+    """
+    payload = {"s": sort, "v": [_encode_value(value) for value in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> List[Any]:
+    """
+    Декодирует курсор и проверяет, что он выдан для той же сортировки
+
+    Raises:
+        HTTPException: Если курсор поврежден или построен для другой сортировки
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [_decode_value(value) for value in payload["v"]]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if payload.get("s") != sort:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+    return values
+
+
+def apply_keyset(
+    query: Select, columns: Tuple[Any, ...], descending: bool, values: Sequence[Any] = None
+) -> Select:
+    """
+    Добавляет к запросу сортировку и условие keyset-пагинации
+
+    Условие вида (col1, col2) > (:v1, :v2) использует составной индекс
+    по тем же колонкам, поэтому стоимость страницы не зависит от ее номера.
+    """
+    if values:
+        key = tuple_(*columns)
+        query = query.where(key < tuple_(*values) if descending else key > tuple_(*values))
+    order = [column.desc() if descending else column.asc() for column in columns]
+    return query.order_by(*order)
@@ -0,0 +1,241 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.account import Account
+from .pagination import apply_keyset
+
+logger = logging.getLogger(__name__)
+
+# Процентили в ответе GET /games/{game}/prices
+PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+
+# Коэффициент для границ выбросов по Тьюки: Q1 - k*IQR, Q3 + k*IQR
+OUTLIER_K = 1.5
+
+LOAD_BATCH_SIZE = 10000
+
+
+class GamePrices:
+    """
+    Цены доступных аккаунтов одной игры
+
+    Два выровненных массива, отсортированных по цене: float64 цены и int64 ID.
+    Сортировка поддерживается при вставке, поэтому квантили берутся по индексу.
+    """
+
+    __slots__ = ("ids", "prices")
+
+    def __init__(self, ids: np.ndarray, prices: np.ndarray):
+        self.ids = ids
+        self.prices = prices
+
+    def __len__(self) -> int:
+        return self.prices.size
+
+    def remove(self, account_ids: np.ndarray) -> None:
+        """Удаляет аккаунты по ID"""
+        keep = ~np.isin(self.ids, account_ids)
+        if not keep.all():
+            self.ids, self.prices = self.ids[keep], self.prices[keep]
+
+    def insert(self, account_ids: np.ndarray, prices: np.ndarray) -> None:
+        """Вставляет аккаунты, сохраняя сортировку по цене (без полной пересортировки)"""
+        order = np.argsort(prices, kind="stable")
+        account_ids, prices = account_ids[order], prices[order]
+        positions = np.searchsorted(self.prices, prices)
+        self.prices = np.insert(self.prices, positions, prices)
+        self.ids = np.insert(self.ids, positions, account_ids)
+
+
+def quantiles(prices: np.ndarray, q: Sequence[float]) -> np.ndarray:
+    """
+    Квантили отсортированного массива с линейной интерполяцией
+
+    Совпадает с percentile_cont в PostgreSQL и np.quantile(method="linear"),
+    но не требует частичной сортировки: массив уже упорядочен.
+    """
+    position = np.asarray(q, dtype=np.float64) * (prices.size - 1)
+    low = np.floor(position).astype(np.intp)
+    high = np.minimum(low + 1, prices.size - 1)
+    return prices[low] + (prices[high] - prices[low]) * (position - low)
+
+
+def histogram(prices: np.ndarray, bins: int):
+    """
+    Гистограмма отсортированного массива: границы и число цен в корзинах
+
+    Корзины [left, right), последняя закрыта справа, как в np.histogram.
+    Для отсортированного массива это bins+1 бинарных поисков вместо прохода по всем ценам.
+    """
+    low, high = prices[0], prices[-1]
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    edges = np.linspace(low, high, bins + 1)
+    positions = np.searchsorted(prices, edges, side="left")
+    positions[-1] = prices.size
+    return edges, np.diff(positions)
+
+
+def price_stats(prices: np.ndarray, bins: int, price: Optional[float] = None) -> dict:
+    """Процентили, гистограмма и выбросы по ценам одной игры"""
+    values = quantiles(prices, [p / 100 for p in PERCENTILES])
+    q1, q3 = quantiles(prices, [0.25, 0.75])
+    lower, upper = q1 - OUTLIER_K * (q3 - q1), q3 + OUTLIER_K * (q3 - q1)
+    edges, counts = histogram(prices, bins)
+
+    stats = {
+        "count": int(prices.size),
+        "min_price": float(prices[0]),
+        "max_price": float(prices[-1]),
+        "mean_price": float(prices.mean()),
+        "percentiles": {f"p{p}": float(v) for p, v in zip(PERCENTILES, values)},
+        "histogram": {"edges": edges.tolist(), "counts": counts.tolist()},
+        "outlier_bounds": {"lower": float(lower), "upper": float(upper)},
+        "outliers": int(
+            np.searchsorted(prices, lower, side="left")
+            + prices.size
+            - np.searchsorted(prices, upper, side="right")
+        ),
+        "position": None,
+    }
+    if price is not None:
+        below = np.searchsorted(prices, price, side="left")
+        stats["position"] = {
+            "price": price,
+            "percentile": float(below / prices.size * 100),
+            "is_outlier": bool(price < lower or price > upper),
+        }
+    return stats
+
+
+class PriceIndex:
+    """
+    Цены доступных аккаунтов по играм в памяти процесса
+
+    Индекс изменяется только фоновой задачей (load/refresh), обработчики
+    запросов читают последние собранные массивы без блокировок. Полная
+    загрузка собирает новые массивы отдельно и подменяет их целиком.
+    Между загрузками индекс догоняет БД по (updated_at, id) строго после
+    водяного знака, поэтому строки не применяются повторно. Строки моложе
+    settle секунд не читаются: их транзакции могли еще не зафиксироваться,
+    и строка с более ранним updated_at появилась бы уже за водяным знаком.
+    Удаленные аккаунты не видны по updated_at, поэтому удаление сообщается
+    через discard().
+    """
+
+    def __init__(self, settle: float):
+        self.settle = settle
+        self._games: Dict[str, GamePrices] = {}
+        # (updated_at, id) последней примененной строки
+        self._watermark: Optional[Tuple[datetime, int]] = None
+        self._deleted: set = set()
+
+    @property
+    def ready(self) -> bool:
+        return self._watermark is not None
+
+    def get(self, game: str) -> Optional[GamePrices]:
+        """Цены игры или None, если доступных аккаунтов нет"""
+        prices = self._games.get(game)
+        return prices if prices is not None and len(prices) else None
+
+    def discard(self, account_id: int) -> None:
+        """Отмечает удаленный аккаунт; применяется при следующем обновлении"""
+        self._deleted.add(account_id)
+
+    def _settled(self) -> datetime:
+        """Граница updated_at, до которой все транзакции считаются зафиксированными"""
+        return datetime.utcnow() - timedelta(seconds=self.settle)
+
+    async def load(self, db: AsyncSession) -> None:
+        """Полная загрузка цен доступных аккаунтов"""
+        started = time.monotonic()
+        # Водяной знак до выборки: изменения во время загрузки догонит refresh(),
+        # повторное применение строк, попавших и в загрузку, безвредно
+        watermark = (self._settled(), 0)
+        deleted = set(self._deleted)
+        # Порядок (game, price) отдает индекс (is_available, game, price),
+        # поэтому массивы каждой игры приходят уже отсортированными
+        query = (
+            select(Account.game, Account.id, Account.price)
+            .where(
+                Account.is_available.is_(True),
+                Account.game.isnot(None),
+                Account.price.isnot(None),
+            )
+            .order_by(Account.game, Account.price)
+        )
+        columns: Dict[str, tuple] = {}
+        result = await db.stream(query.execution_options(yield_per=LOAD_BATCH_SIZE))
+        async for batch in result.partitions():
+            for game, account_id, price in batch:
+                ids, prices = columns.setdefault(game, ([], []))
+                ids.append(account_id)
+                prices.append(price)
+
+        self._games = {
+            game: GamePrices(np.array(ids, dtype=np.int64), np.array(prices, dtype=np.float64))
+            for game, (ids, prices) in columns.items()
+        }
+        self._watermark = watermark
+        # Удаления, отмеченные во время загрузки, применит refresh()
+        self._deleted -= deleted
+        logger.info(
+            f"Price index loaded: {sum(map(len, self._games.values()))} listings, "
+            f"{len(self._games)} games in {time.monotonic() - started:.2f}s"
+        )
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Применяет аккаунты, измененные после водяного знака, и удаления"""
+        deleted, self._deleted = self._deleted, set()
+        query = select(
+            Account.id, Account.game, Account.price, Account.is_available, Account.updated_at
+        ).where(Account.updated_at < self._settled())
+        query = apply_keyset(query, (Account.updated_at, Account.id), False, self._watermark)
+        rows = (await db.execute(query)).all()
+        if not rows and not deleted:
+            return
+
+        self.apply([row[:4] for row in rows], deleted)
+        if rows:
+            self._watermark = (rows[-1].updated_at, rows[-1].id)
+
+    def apply(self, rows, deleted=()) -> None:
+        """
+        Применяет изменения: строки (id, game, price, is_available) и удаленные ID
+
+        Каждый измененный ID сначала удаляется из всех игр (игра могла смениться),
+        затем доступные аккаунты вставляются в массив своей игры.
+        """
+        changed = np.array([row[0] for row in rows] + list(deleted), dtype=np.int64)
+        for prices in self._games.values():
+            prices.remove(changed)
+
+        inserts: Dict[str, tuple] = {}
+        for account_id, game, price, is_available in rows:
+            if is_available and game is not None and price is not None:
+                ids, values = inserts.setdefault(game, ([], []))
+                ids.append(account_id)
+                values.append(price)
+
+        for game, (ids, values) in inserts.items():
+            prices = self._games.setdefault(
+                game, GamePrices(np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64))
+            )
+            prices.insert(np.array(ids, dtype=np.int64), np.array(values, dtype=np.float64))
+
+    def stats(self) -> dict:
+        """Счетчики для мониторинга"""
+        return {
+            "games": len(self._games),
+            "listings": sum(map(len, self._games.values())),
+            "bytes": sum(p.ids.nbytes + p.prices.nbytes for p in self._games.values()),
+            "ready": self.ready,
+            "watermark": self._watermark[0].isoformat() if self._watermark else None,
+        }
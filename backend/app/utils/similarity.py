@@ -0,0 +1,312 @@
+import asyncio
+import logging
+import math
+import re
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.account import Account
+from .pagination import apply_keyset
+
+logger = logging.getLogger(__name__)
+
+# Размер пространства хэшированных признаков
+N_FEATURES = 1 << 20
+
+# Веса источников признаков: совпадение игры важнее совпадения слова
+TITLE_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+GAME_WEIGHT = 3.0
+
+# Признаки, встречающиеся в большей доле объявлений, при поиске пропускаются:
+# вклад в косинус у них мал, а списки объявлений самые длинные
+MAX_DF_RATIO = 0.3
+
+LOAD_BATCH_SIZE = 10000
+
+_token_re = re.compile(r"\w\w+")
+
+
+def listing_features(
+    title: Optional[str], description: Optional[str], game: Optional[str]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Хэшированные признаки объявления
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Отсортированные номера признаков (int32)
+            и сублинейные частоты 1 + log(tf) (float32)
+    """
+    counts: Counter = Counter()
+    for text, weight in ((title, TITLE_WEIGHT), (description, DESCRIPTION_WEIGHT)):
+        for token in _token_re.findall((text or "").lower()):
+            counts[zlib.crc32(token.encode()) & (N_FEATURES - 1)] += weight
+    if game:
+        counts[zlib.crc32(b"game:" + game.lower().encode()) & (N_FEATURES - 1)] += GAME_WEIGHT
+
+    features = np.fromiter(sorted(counts), dtype=np.int32, count=len(counts))
+    tf = np.fromiter((1 + math.log(counts[f]) for f in features), np.float32, len(counts))
+    return features, tf
+
+
+class _Segment:
+    """
+    Неизменяемая часть индекса
+
+    Строки хранятся дважды: построчно (row_ptr/row_features/row_tf) для
+    пересборки и по признакам (col_ptr/col_rows/col_weights) для поиска.
+    Веса — TF-IDF, нормированные по строке, поэтому скалярное произведение
+    равно косинусной близости.
+    """
+
+    def __init__(self, ids: np.ndarray, lengths: np.ndarray, features: np.ndarray, tf: np.ndarray):
+        rows = ids.size
+        self.ids = ids
+        self.live = np.ones(rows, dtype=bool)
+        self.row_ptr = np.concatenate(([0], np.cumsum(lengths)))
+        self.row_features = features
+        self.row_tf = tf
+        self.slots = {int(account_id): slot for slot, account_id in enumerate(ids.tolist())}
+
+        df = np.bincount(features, minlength=N_FEATURES)
+        self.df = df
+        self.idf = (np.log((1 + rows) / (1 + df)) + 1).astype(np.float32)
+
+        entry_rows = np.repeat(np.arange(rows, dtype=np.int32), lengths)
+        weights = tf * self.idf[features]
+        norms = np.sqrt(np.bincount(entry_rows, weights * weights, minlength=rows))
+        weights /= np.maximum(norms, 1e-12)[entry_rows].astype(np.float32)
+
+        order = np.argsort(features, kind="stable")
+        self.col_ptr = np.concatenate(([0], np.cumsum(df)))
+        self.col_rows = entry_rows[order]
+        self.col_weights = weights[order].astype(np.float32)
+
+    def merge(self, delta: Dict[int, Tuple[np.ndarray, np.ndarray]]) -> "_Segment":
+        """Новый сегмент из живых строк этого сегмента и строк дельты"""
+        lengths = np.diff(self.row_ptr)
+        keep = np.repeat(self.live, lengths)
+        items = list(delta.items())
+        return _Segment(
+            np.concatenate((self.ids[self.live], np.fromiter(delta, np.int64, len(delta)))),
+            np.concatenate(
+                (lengths[self.live], np.fromiter((f.size for _, (f, _) in items), np.int64))
+            ),
+            np.concatenate([self.row_features[keep]] + [features for _, (features, _) in items]),
+            np.concatenate([self.row_tf[keep]] + [tf for _, (_, tf) in items]),
+        )
+
+
+def _build_segment(entries: List[Tuple[int, np.ndarray, np.ndarray]]) -> _Segment:
+    if not entries:
+        empty = np.empty(0, dtype=np.int32)
+        return _Segment(np.empty(0, dtype=np.int64), empty, empty, np.empty(0, dtype=np.float32))
+    ids = np.fromiter((entry[0] for entry in entries), np.int64, len(entries))
+    lengths = np.fromiter((entry[1].size for entry in entries), np.int64, len(entries))
+    features = np.concatenate([entry[1] for entry in entries])
+    tf = np.concatenate([entry[2] for entry in entries])
+    return _Segment(ids, lengths, features, tf)
+
+
+def _top_k(ids: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    candidates = np.flatnonzero(scores > 0)
+    if candidates.size > k:
+        candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+    return ids[candidates], scores[candidates]
+
+
+class SimilarityIndex:
+    """
+    Индекс похожих объявлений: хэшированные TF-IDF признаки и косинусная близость
+
+    Содержит только доступные аккаунты. Основной сегмент — инвертированный
+    индекс в массивах NumPy; измененные после его сборки аккаунты помечаются
+    в нем удаленными и попадают в небольшую дельту, которая ищется перебором.
+    Когда дельта превышает max_delta, сегменты сливаются в новый.
+
+    Индекс изменяется только фоновой задачей (load/refresh), поиск читает
+    его из обработчиков запросов без блокировок. Догон изменений устроен
+    как в PriceIndex: строго после водяного знака (updated_at, id) и только
+    по строкам старше settle секунд, чтобы не пропустить транзакцию,
+    зафиксированную позже строки с более поздним updated_at.
+    """
+
+    def __init__(self, max_delta: int, settle: float):
+        self.max_delta = max_delta
+        self.settle = settle
+        self._main: Optional[_Segment] = None
+        self._delta: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._delta_arrays = None
+        self._deleted: set = set()
+        # (updated_at, id) последней примененной строки
+        self._watermark: Optional[Tuple[datetime, int]] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._main is not None
+
+    def discard(self, account_id: int) -> None:
+        """Отмечает удаленный аккаунт; применяется при следующем refresh()"""
+        self._deleted.add(account_id)
+
+    def _settled(self) -> datetime:
+        """Граница updated_at, до которой все транзакции считаются зафиксированными"""
+        return datetime.utcnow() - timedelta(seconds=self.settle)
+
+    async def load(self, db: AsyncSession) -> None:
+        """Полная загрузка доступных аккаунтов и сборка основного сегмента"""
+        started = time.monotonic()
+        # Водяной знак до выборки: изменения во время загрузки догонит refresh(),
+        # повторное применение строк, попавших и в загрузку, безвредно
+        watermark = (self._settled(), 0)
+        deleted = set(self._deleted)
+        query = select(Account.id, Account.title, Account.description, Account.game).where(
+            Account.is_available.is_(True)
+        )
+        entries = []
+        result = await db.stream(query.execution_options(yield_per=LOAD_BATCH_SIZE))
+        async for batch in result.partitions():
+            # Токенизация занимает процессор, поэтому уходит в поток
+            entries.extend(await asyncio.to_thread(self._features, batch))
+
+        main = await asyncio.to_thread(_build_segment, entries)
+        self._main, self._delta, self._delta_arrays = main, {}, None
+        self._watermark = watermark
+        # Удаления, отмеченные во время загрузки, применит refresh()
+        self._deleted -= deleted
+        logger.info(
+            f"Similarity index loaded: {main.ids.size} listings "
+            f"in {time.monotonic() - started:.2f}s"
+        )
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Применяет аккаунты, измененные после водяного знака, и удаления"""
+        deleted, self._deleted = self._deleted, set()
+        query = select(
+            Account.id,
+            Account.title,
+            Account.description,
+            Account.game,
+            Account.is_available,
+            Account.updated_at,
+        ).where(Account.updated_at < self._settled())
+        query = apply_keyset(query, (Account.updated_at, Account.id), False, self._watermark)
+        rows = (await db.execute(query)).all()
+
+        for account_id in deleted:
+            self._remove(account_id)
+        for row in rows:
+            self._remove(row.id)
+            if row.is_available:
+                self._delta[row.id] = listing_features(row.title, row.description, row.game)
+        if rows or deleted:
+            self._delta_arrays = None
+        if rows:
+            self._watermark = (rows[-1].updated_at, rows[-1].id)
+
+        if len(self._delta) > self.max_delta:
+            await self.compact()
+
+    async def compact(self) -> None:
+        """Сливает дельту с основным сегментом"""
+        main = await asyncio.to_thread(self._main.merge, self._delta)
+        self._main, self._delta, self._delta_arrays = main, {}, None
+
+    def similar(
+        self, title: Optional[str], description: Optional[str], game: Optional[str],
+        k: int, exclude: int = None,
+    ) -> List[Tuple[int, float]]:
+        """
+        Top-k доступных аккаунтов, близких к тексту объявления
+
+        Returns:
+            List[Tuple[int, float]]: ID аккаунтов и косинусная близость, по убыванию
+        """
+        main = self._main
+        features, tf = listing_features(title, description, game)
+        weights = tf * main.idf[features]
+        weights /= max(float(np.linalg.norm(weights)), 1e-12)
+
+        # Основной сегмент: складываем вклады по спискам строк каждого признака
+        keep = main.df[features] <= max(MAX_DF_RATIO * main.ids.size, 1)
+        starts, ends = main.col_ptr[features[keep]], main.col_ptr[features[keep] + 1]
+        if starts.size:
+            entries = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)])
+            scale = np.repeat(weights[keep], ends - starts)
+            scores = np.bincount(
+                main.col_rows[entries],
+                main.col_weights[entries] * scale,
+                minlength=main.ids.size,
+            )
+            scores[~main.live] = 0
+        else:
+            scores = np.zeros(main.ids.size)
+        ids, values = _top_k(main.ids, scores, k + 1)
+
+        # Дельта: перебор всех ее признаков одной векторной операцией
+        delta = self._delta_arrays or self._compile_delta(main)
+        if delta is not None:
+            delta_ids, entry_rows, delta_features, delta_weights = delta
+            mask = np.isin(delta_features, features)
+            position = np.searchsorted(features, delta_features[mask])
+            delta_scores = np.bincount(
+                entry_rows[mask],
+                delta_weights[mask] * weights[position],
+                minlength=delta_ids.size,
+            )
+            more_ids, more_values = _top_k(delta_ids, delta_scores, k + 1)
+            ids, values = np.concatenate((ids, more_ids)), np.concatenate((values, more_values))
+
+        order = np.argsort(-values, kind="stable")
+        result = [
+            (int(account_id), float(score))
+            for account_id, score in zip(ids[order], values[order])
+            if account_id != exclude
+        ]
+        return result[:k]
+
+    def stats(self) -> dict:
+        """Счетчики для мониторинга"""
+        main = self._main
+        return {
+            "ready": self.ready,
+            "listings": int(main.live.sum()) + len(self._delta) if main is not None else 0,
+            "delta": len(self._delta),
+            "entries": int(main.col_rows.size) if main is not None else 0,
+            "watermark": self._watermark[0].isoformat() if self._watermark else None,
+        }
+
+    @staticmethod
+    def _features(batch) -> List[Tuple[int, np.ndarray, np.ndarray]]:
+        return [
+            (account_id, *listing_features(title, description, game))
+            for account_id, title, description, game in batch
+        ]
+
+    def _remove(self, account_id: int) -> None:
+        slot = self._main.slots.get(account_id)
+        if slot is not None:
+            self._main.live[slot] = False
+        self._delta.pop(account_id, None)
+
+    def _compile_delta(self, main: _Segment):
+        """Плоские массивы дельты с весами по IDF основного сегмента"""
+        if not self._delta:
+            return None
+        ids = np.fromiter(self._delta, np.int64, len(self._delta))
+        lengths = [features.size for features, _ in self._delta.values()]
+        features = np.concatenate([features for features, _ in self._delta.values()])
+        tf = np.concatenate([tf for _, tf in self._delta.values()])
+        entry_rows = np.repeat(np.arange(ids.size), lengths)
+        weights = tf * main.idf[features]
+        norms = np.sqrt(np.bincount(entry_rows, weights * weights, minlength=ids.size))
+        weights = weights / np.maximum(norms, 1e-12)[entry_rows]
+        self._delta_arrays = (ids, entry_rows, features, weights)
+        return self._delta_arrays
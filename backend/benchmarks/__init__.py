@@ -0,0 +1 @@
+"""Нагрузочные замеры бэкенда TrustyTrade"""
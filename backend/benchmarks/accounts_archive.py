@@ -0,0 +1,86 @@
+"""
+Запросы каталога до и после переноса 90% аккаунтов в архив
+
+Запуск: python -m benchmarks.accounts_archive [количество строк]
+Использует app.services.archive, поэтому, как и приложению, нужен .env.
+"""
+
+import asyncio
+import sys
+import time
+from datetime import timedelta
+
+from sqlalchemy import func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.models import Account, Deal
+from app.schemas.account import AccountFilter
+from app.schemas.deal import DealStatus
+from app.services.archive import archive_sold_accounts
+from app.services.catalog import count_facets, filter_conditions
+
+from .common import create_bench_engine, measure, seed_accounts
+
+PAGE_SIZE = 20
+DEEP_OFFSET = 5000
+
+
+async def mark_sold(engine) -> int:
+    """Снимает с продажи 90% аккаунтов и создает по ним завершенные сделки"""
+    async with engine.begin() as conn:
+        await conn.execute(
+            update(Account).where(Account.id % 10 != 0).values(is_available=False)
+        )
+        sold = select(
+            Account.id, literal(DealStatus.COMPLETED, Deal.__table__.c.status.type)
+        ).where(Account.is_available.is_(False))
+        await conn.execute(insert(Deal).from_select(["account_id", "status"], sold))
+        return (await conn.execute(select(func.count()).select_from(Deal))).scalar()
+
+
+async def run_queries(session_factory) -> dict:
+    available = AccountFilter(is_available=True)
+    newest = (
+        select(Account)
+        .where(*filter_conditions(available))
+        .order_by(Account.created_at.desc(), Account.id.desc())
+    )
+    async with session_factory() as db:
+        return {
+            "первая страница": await measure(
+                lambda: db.execute(newest.limit(PAGE_SIZE)), repeat=20
+            ),
+            f"OFFSET {DEEP_OFFSET}": await measure(
+                lambda: db.execute(newest.offset(DEEP_OFFSET).limit(PAGE_SIZE)), repeat=10
+            ),
+            "фасеты": await measure(lambda: count_facets(db, available), repeat=5),
+            "count(*)": await measure(
+                lambda: db.execute(select(func.count()).select_from(Account)), repeat=5
+            ),
+        }
+
+
+async def main(rows: int) -> None:
+    engine = await create_bench_engine()
+    await seed_accounts(engine, rows)
+    deals = await mark_sold(engine)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    print(f"Строк в каталоге: {rows}, продано: {deals}, БД: {engine.dialect.name}")
+
+    before = await run_queries(session_factory)
+
+    started = time.perf_counter()
+    async with session_factory() as db:
+        moved = await archive_sold_accounts(db, batch_size=10000, min_age=timedelta(0))
+    print(f"Перенесено в архив: {moved} за {time.perf_counter() - started:.1f} с")
+
+    after = await run_queries(session_factory)
+    print(f"{'запрос':>18} {'до, мс':>10} {'после, мс':>10}")
+    for name in before:
+        print(f"{name:>18} {before[name]:>10.2f} {after[name]:>10.2f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000))
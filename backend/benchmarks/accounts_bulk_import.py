@@ -0,0 +1,68 @@
+"""
+Пропускная способность импорта аккаунтов: по одному (как POST /accounts)
+и пачками (как POST /accounts/bulk)
+
+Запуск: python -m benchmarks.accounts_bulk_import [строк для поштучной вставки] [строк для пачек]
+"""
+
+import asyncio
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Account
+from app.services.bulk_import import import_accounts
+
+from .common import create_bench_engine, fake_account
+
+FIELDS = ["title", "game", "description", "price", "image_url", "seller"]
+
+
+def payloads(count: int) -> list:
+    start = datetime(2025, 1, 1)
+    return [{k: v for k, v in fake_account(i, start).items() if k in FIELDS} for i in range(count)]
+
+
+async def single_inserts(engine, rows: list) -> float:
+    """Повторяет create_account: add, commit и refresh на каждую строку"""
+    started = time.perf_counter()
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        for row in rows:
+            account = Account(**row)
+            db.add(account)
+            await db.commit()
+            await db.refresh(account)
+    return len(rows) / (time.perf_counter() - started)
+
+
+async def bulk_import(engine, rows: list) -> float:
+    async def stream():
+        for row in rows:
+            yield row
+
+    started = time.perf_counter()
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        result = await import_accounts(db, stream())
+    assert len(result.created) == len(rows), result.errors[:5]
+    return len(rows) / (time.perf_counter() - started)
+
+
+async def main(single_rows: int, bulk_rows: int) -> None:
+    engine = await create_bench_engine()
+    print(f"БД: {engine.dialect.name}")
+
+    rate = await single_inserts(engine, payloads(single_rows))
+    print(f"POST /accounts, {single_rows} строк: {rate:,.0f} строк/с")
+
+    rate = await bulk_import(engine, payloads(bulk_rows))
+    print(f"POST /accounts/bulk, {bulk_rows} строк: {rate:,.0f} строк/с")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    single = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    bulk = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    asyncio.run(main(single, bulk))
@@ -0,0 +1,63 @@
+"""
+Сравнение offset- и keyset-пагинации каталога аккаунтов
+
+Запуск: python -m benchmarks.accounts_pagination [количество строк]
+"""
+
+import asyncio
+import sys
+
+from sqlalchemy import select
+
+from app.models import Account
+from app.utils.pagination import apply_keyset
+
+from .common import create_bench_engine, measure, seed_accounts
+
+PAGE_SIZE = 20
+PAGES = [1, 10, 100, 1000]
+
+# Те же ключи, что и в routers/accounts.py (роутер не импортируем, чтобы не требовать .env)
+SORT_KEYS = {
+    "created_at": ((Account.created_at, Account.id), True),
+    "price": ((Account.price, Account.id), False),
+}
+
+
+async def main(rows: int) -> None:
+    engine = await create_bench_engine()
+    await seed_accounts(engine, rows)
+    print(f"Строк в каталоге: {rows}, размер страницы: {PAGE_SIZE}")
+
+    for sort, (columns, descending) in SORT_KEYS.items():
+        order = [c.desc() if descending else c.asc() for c in columns]
+
+        async with engine.connect() as conn:
+            # Находим ключ последней записи перед каждой страницей
+            keys = {}
+            for page in PAGES:
+                skip = (page - 1) * PAGE_SIZE
+                if skip:
+                    query = select(*columns).order_by(*order).offset(skip - 1).limit(1)
+                    keys[page] = tuple((await conn.execute(query)).one())
+                else:
+                    keys[page] = None
+
+            print(f"\nСортировка {sort}")
+            print(f"{'страница':>10} {'offset, мс':>12} {'keyset, мс':>12}")
+            for page in PAGES:
+                skip = (page - 1) * PAGE_SIZE
+                offset_query = select(Account).order_by(*order).offset(skip).limit(PAGE_SIZE)
+                keyset_query = apply_keyset(
+                    select(Account), columns, descending, keys[page]
+                ).limit(PAGE_SIZE)
+
+                offset_ms = await measure(lambda: conn.execute(offset_query))
+                keyset_ms = await measure(lambda: conn.execute(keyset_query))
+                print(f"{page:>10} {offset_ms:>12.2f} {keyset_ms:>12.2f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200000))
@@ -0,0 +1,52 @@
+"""
+Сравнение LIKE-сканирования и полнотекстового поиска по каталогу
+
+Запуск: python -m benchmarks.accounts_search [количество строк]
+"""
+
+import asyncio
+import sys
+
+from sqlalchemy import or_, select
+
+from app.models import Account
+from app.services.search import build_search_query
+
+from .common import apply_migration, create_bench_engine, measure, seed_accounts
+
+# Миграция add_accounts_search: tsvector и GIN в PostgreSQL, FTS5 в SQLite
+SEARCH_REVISION = "a84e6b2c7f13"
+QUERIES = ["immortal", "rare skins", "Genshin elite", "inventry"]
+PAGE_SIZE = 20
+
+
+async def main(rows: int) -> None:
+    engine = await create_bench_engine()
+    await seed_accounts(engine, rows)
+    async with engine.begin() as conn:
+        await conn.run_sync(apply_migration, SEARCH_REVISION)
+    dialect = engine.dialect.name
+    print(f"Строк в каталоге: {rows}, БД: {dialect}")
+    print(f"{'запрос':>16} {'LIKE, мс':>10} {'FTS, мс':>10} {'найдено':>8}")
+
+    async with engine.connect() as conn:
+        for q in QUERIES:
+            pattern = f"%{q}%"
+            like_query = (
+                select(Account)
+                .where(or_(Account.title.ilike(pattern), Account.description.ilike(pattern)))
+                .order_by(Account.id.desc())
+                .limit(PAGE_SIZE)
+            )
+            fts_query = build_search_query(dialect, q).limit(PAGE_SIZE)
+
+            like_ms = await measure(lambda: conn.execute(like_query), repeat=5)
+            fts_ms = await measure(lambda: conn.execute(fts_query), repeat=5)
+            found = len((await conn.execute(fts_query)).all())
+            print(f"{q:>16} {like_ms:>10.2f} {fts_ms:>10.2f} {found:>8}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000))
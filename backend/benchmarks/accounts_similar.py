@@ -0,0 +1,55 @@
+"""
+Задержка поиска похожих объявлений по индексу в памяти
+
+Запуск: python -m benchmarks.accounts_similar [количество строк]
+"""
+
+import asyncio
+import random
+import sys
+import time
+
+from sqlalchemy import select
+
+from app.models import Account
+from app.utils.similarity import SimilarityIndex
+
+from .common import create_bench_engine, measure, seed_accounts
+
+K = 10
+SAMPLES = 50
+
+
+async def main(rows: int) -> None:
+    engine = await create_bench_engine()
+    await seed_accounts(engine, rows)
+    print(f"Строк в каталоге: {rows}, БД: {engine.dialect.name}")
+
+    index = SimilarityIndex(max_delta=5000, settle=0)
+    async with engine.connect() as conn:
+        started = time.perf_counter()
+        await index.load(conn)
+        print(f"Сборка индекса: {time.perf_counter() - started:.2f} с, {index.stats()}")
+
+        random.seed(7)
+        ids = random.sample(range(1, rows + 1), SAMPLES)
+        query = select(Account.title, Account.description, Account.game).where(Account.id.in_(ids))
+        listings = (await conn.execute(query)).all()
+
+        async def search_all():
+            for title, description, game in listings:
+                index.similar(title, description, game, K)
+
+        per_query = await measure(search_all, repeat=5) / len(listings)
+        print(f"Поиск top-{K}: {per_query:.2f} мс на запрос")
+
+        title, description, game = listings[0]
+        print(f"Пример: {title!r}")
+        for account_id, score in index.similar(title, description, game, 3):
+            print(f"  {account_id}: {score:.3f}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500_000))
@@ -0,0 +1,111 @@
+"""
+Общие утилиты для бенчмарков
+
+Бенчмарки запускаются из папки backend: python -m benchmarks.<имя>
+По умолчанию используется SQLite в памяти. Для замеров на PostgreSQL укажите
+BENCH_DATABASE_URL — схема в этой БД будет пересоздана, поэтому используйте
+отдельную базу, а не рабочую.
+"""
+
+import os
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Awaitable, Callable, List
+
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from alembic.script import ScriptDirectory
+from sqlalchemy import insert
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from app.models import Account, Base
+
+BENCH_DATABASE_URL = os.getenv("BENCH_DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / "migrations"
+
+GAMES = ["Dota 2", "CS:GO", "World of Warcraft", "Genshin Impact", "PUBG", "Valorant"]
+WORDS = [
+    "immortal", "rank", "skins", "rare", "level", "heroes", "inventory", "top", "elite",
+    "legendary", "mythic", "prime", "battlepass", "knife", "gloves", "mount", "raid",
+    "arena", "ranked", "smurf", "main", "collector", "limited", "event", "season",
+    "account", "full", "access", "mail", "original", "owner", "cheap", "premium",
+    "вещи", "ранг", "скины", "редкий", "топ", "донат", "прокачан",
+]
+
+
+async def create_bench_engine(url: str = BENCH_DATABASE_URL, **kwargs) -> AsyncEngine:
+    """Создает движок и пустую схему для замеров"""
+    if url.endswith(":memory:"):
+        # Одно соединение на все сессии: иначе у каждой своя пустая БД
+        engine = create_async_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+    else:
+        engine = create_async_engine(url, **kwargs)
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    return engine
+
+
+def apply_migration(connection: Connection, revision: str) -> None:
+    """
+    Выполняет upgrade() одной миграции поверх схемы из create_all
+
+    Часть схемы (например, поисковый индекс) описана только в миграциях.
+    Вызывается через run_sync на соединении.
+    """
+    migration = ScriptDirectory(str(MIGRATIONS_DIR)).get_revision(revision).module
+    with Operations.context(MigrationContext.configure(connection)):
+        migration.upgrade()
+
+
+def fake_account(i: int, start: datetime) -> dict:
+    """Генерирует строку таблицы accounts"""
+    game = random.choice(GAMES)
+    words = " ".join(random.sample(WORDS, 3))
+    created_at = start + timedelta(seconds=i)
+    return {
+        "title": f"Аккаунт {game} {words} #{i}",
+        "game": game,
+        "description": f"{words} {random.randint(1, 100)} lvl",
+        "price": float(random.randint(100, 100000)),
+        "image_url": None,
+        "seller": {
+            "id": 1 + i % 100,
+            "name": f"seller{i % 100}",
+            "rating": round(random.uniform(1, 5), 1),
+        },
+        "is_available": random.random() < 0.8,
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+async def seed_accounts(engine: AsyncEngine, count: int, batch_size: int = 10000) -> None:
+    """Заполняет таблицу accounts пачками многострочных INSERT"""
+    random.seed(42)
+    start = datetime(2025, 1, 1)
+    async with engine.begin() as conn:
+        for offset in range(0, count, batch_size):
+            rows = [fake_account(i, start) for i in range(offset, min(offset + batch_size, count))]
+            await conn.execute(insert(Account.__table__), rows)
+
+
+async def measure(func: Callable[[], Awaitable], repeat: int = 20) -> float:
+    """Медианное время выполнения в миллисекундах"""
+    samples: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
@@ -0,0 +1,135 @@
+"""
+Стресс-тест параллельных покупок одного аккаунта
+
+Запуск: python -m benchmarks.deals_concurrency [покупателей] [раундов]
+
+Каждый раунд одновременно запускает покупки одного аккаунта всеми
+покупателями и печатает, сколько сделок создано. Для сравнения так же
+прогоняется прежний алгоритм (SELECT, проверка в Python, UPDATE).
+Проверка «ровно одна сделка» — в test_deals.py.
+
+In-memory SQLite не подходит (все сессии делят одно соединение), поэтому
+без BENCH_DATABASE_URL используется временный файл SQLite. Прежний алгоритм
+теперь тоже не продает дважды: гонку ловит счетчик version (StaleDataError),
+но ценой исключения вместо отказа 400. Нужен .env, как и приложению.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm.exc import StaleDataError
+
+from app.models import Account, Deal, User
+from app.schemas.deal import DealCreate
+from app.services.deals import open_deal
+
+from .common import create_bench_engine
+
+URL = os.getenv("BENCH_DATABASE_URL") or (
+    "sqlite+aiosqlite:///" + os.path.join(tempfile.mkdtemp(), "deals.db")
+)
+
+
+async def naive_deal(db, deal: DealCreate) -> None:
+    """Прежний create_deal: проверка доступности в Python между SELECT и UPDATE"""
+    account = (await db.execute(select(Account).where(Account.id == deal.account_id))).scalar_one()
+    if not account.is_available:
+        raise HTTPException(status_code=400, detail="Account is not available")
+    db.add(Deal(**deal.model_dump()))
+    account.is_available = False
+
+
+async def buy(session_factory, create, deal: DealCreate) -> str:
+    async with session_factory() as db:
+        try:
+            await create(db, deal)
+            await db.commit()
+            return "ok"
+        except HTTPException:
+            await db.rollback()
+            return "rejected"
+        except OperationalError:
+            # SQLite: взаимная блокировка читателей, ставших писателями
+            await db.rollback()
+            return "error"
+        except StaleDataError:
+            # Версия строки уже изменена: счетчик version перехватил гонку
+            await db.rollback()
+            return "rejected"
+
+
+async def run(engine, session_factory, create, buyers: int, rounds: int) -> int:
+    totals = {"ok": 0, "rejected": 0, "error": 0}
+    oversold = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        async with engine.begin() as conn:
+            account_id = (
+                await conn.execute(
+                    insert(Account)
+                    .values(title="stress", game="Dota 2", price=100.0, is_available=True)
+                    .returning(Account.id)
+                )
+            ).scalar()
+
+        results = await asyncio.gather(
+            *[
+                buy(
+                    session_factory,
+                    create,
+                    DealCreate(seller_id=1, buyer_id=2 + i, account_id=account_id),
+                )
+                for i in range(buyers)
+            ]
+        )
+        for result in results:
+            totals[result] += 1
+
+        async with engine.connect() as conn:
+            deals = (
+                await conn.execute(
+                    select(func.count()).select_from(Deal).where(Deal.account_id == account_id)
+                )
+            ).scalar()
+        if deals != 1:
+            oversold += 1
+    elapsed = time.perf_counter() - started
+
+    attempts = buyers * rounds
+    print(
+        f"  попыток: {attempts}, {attempts / elapsed:.0f} в секунду; "
+        f"сделок: {totals['ok']}, отказов: {totals['rejected']}, ошибок БД: {totals['error']}; "
+        f"раундов с числом сделок != 1: {oversold} из {rounds}"
+    )
+    return oversold
+
+
+async def main(buyers: int, rounds: int) -> None:
+    # SQLite сериализует запись: ждем блокировку дольше стандартных 5 секунд
+    options = {"connect_args": {"timeout": 60}} if URL.startswith("sqlite") else {}
+    engine = await create_bench_engine(URL, **options)
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(User), [{"telegram_id": i, "username": f"u{i}"} for i in range(1, 3)]
+        )
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    print(f"Покупателей: {buyers}, раундов: {rounds}, БД: {engine.dialect.name}")
+
+    print("Условный UPDATE ... RETURNING:")
+    await run(engine, session_factory, open_deal, buyers, rounds)
+    print("SELECT + проверка в Python:")
+    await run(engine, session_factory, naive_deal, buyers, rounds)
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    asyncio.run(main(*(args + [200, 10][len(args):])))
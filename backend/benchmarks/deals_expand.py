@@ -0,0 +1,126 @@
+"""
+Число запросов и время загрузки страницы сделок с ?expand=
+
+Запуск: python -m benchmarks.deals_expand [сделок]
+
+Для каждого размера страницы сравниваются ленивая загрузка связей по одной
+сделке (N+1 запрос) и expand_options(). То, что число запросов с expand
+не зависит от размера страницы, проверяет test_deals.py.
+Нужен .env, как и приложению.
+"""
+
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import lazyload
+
+from app.models import Deal, Review, User
+from app.models.account import ArchivedAccount
+from app.schemas.deal import DealStatus
+from app.services.deals import DEAL_EXPANSIONS, expand_deal, expand_options
+
+from .common import create_bench_engine, seed_accounts
+
+PAGE_SIZES = [10, 100, 1000]
+EXPAND = list(DEAL_EXPANSIONS)
+# Все связи приходят LEFT JOIN в одном SELECT
+EXPECTED_QUERIES = 1
+
+
+async def seed_deals(engine, count: int) -> None:
+    """Пользователи, сделки по аккаунтам каталога и архива, отзывы к завершенным"""
+    random.seed(42)
+    now = datetime.utcnow()
+    await seed_accounts(engine, count)
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(User.__table__),
+            [{"telegram_id": i, "username": f"user{i}", "rating": 0.0} for i in range(1, 101)],
+        )
+        # Каждый десятый аккаунт сделки — в архиве
+        archived = [
+            {"id": count + i, "title": f"archived #{i}", "game": "Dota 2", "price": 100.0,
+             "is_available": False, "archived_at": now, "archive_reason": "sold"}
+            for i in range(1, count // 10 + 1)
+        ]
+        await conn.execute(insert(ArchivedAccount.__table__), archived)
+
+        deals = []
+        for i in range(1, count + 1):
+            account_id = count + i // 10 if i % 10 == 0 else i
+            deals.append({
+                "seller_id": random.randint(1, 100),
+                "buyer_id": random.randint(1, 100),
+                "account_id": account_id,
+                "status": DealStatus.COMPLETED if i % 2 else DealStatus.PENDING,
+                "created_at": now,
+                "updated_at": now,
+            })
+        await conn.execute(insert(Deal.__table__), deals)
+        await conn.execute(
+            insert(Review.__table__),
+            [{"deal_id": i, "rating": random.randint(1, 5), "created_at": now, "updated_at": now}
+             for i in range(1, count + 1, 2)],
+        )
+
+
+async def lazy_page(db, limit: int) -> list:
+    """Прежний способ: связи догружаются отдельным запросом на каждую сделку"""
+    # Ленивая загрузка аккаунта в модели запрещена, здесь она включается явно
+    query = select(Deal).options(lazyload(Deal.live_account), lazyload(Deal.archived_account))
+    deals = (await db.execute(query.limit(limit))).scalars().all()
+    for deal in deals:
+        for name in ("live_account", "archived_account", "seller", "buyer", "review"):
+            await db.run_sync(lambda _: getattr(deal, name))
+    return [expand_deal(deal, EXPAND) for deal in deals]
+
+
+async def expanded_page(db, limit: int) -> list:
+    query = select(Deal).options(*expand_options(EXPAND)).limit(limit)
+    deals = (await db.execute(query)).unique().scalars().all()
+    return [expand_deal(deal, EXPAND) for deal in deals]
+
+
+async def main(count: int) -> None:
+    engine = await create_bench_engine()
+    await seed_deals(engine, count)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    print(f"Сделок: {count}, БД: {engine.dialect.name}, expand={','.join(EXPAND)}")
+
+    queries = 0
+
+    def count_query(*args):
+        nonlocal queries
+        queries += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_query)
+
+    print(
+        f"{'страница':>9} {'N+1, запр.':>11} {'N+1, мс':>9} "
+        f"{'expand, запр.':>14} {'expand, мс':>11}"
+    )
+    for limit in PAGE_SIZES:
+        results = []
+        for load in (lazy_page, expanded_page):
+            async with session_factory() as db:
+                queries = 0
+                started = time.perf_counter()
+                page = await load(db, limit)
+                results.append((queries, (time.perf_counter() - started) * 1000, page))
+
+        (lazy_queries, lazy_ms, _), (expand_queries, expand_ms, _) = results
+        print(
+            f"{limit:>9} {lazy_queries:>11} {lazy_ms:>9.1f} "
+            f"{expand_queries:>14} {expand_ms:>11.1f}"
+        )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
@@ -0,0 +1,107 @@
+"""
+Сравнение статистики цен в памяти (NumPy) с расчетом в БД
+
+Запуск: python -m benchmarks.price_stats [количество строк]
+
+На PostgreSQL процентили считаются через percentile_cont, гистограмма через
+width_bucket. В SQLite percentile_cont нет, поэтому каждый процентиль берется
+отдельным запросом ORDER BY price LIMIT 1 OFFSET k по индексу (is_available, game, price).
+"""
+
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import Integer, case, cast, func, select, text, update
+
+from app.models import Account
+from app.utils.price_index import PERCENTILES, PriceIndex, price_stats
+
+from .common import GAMES, create_bench_engine, measure, seed_accounts
+
+BINS = 20
+CHANGES = 1000
+
+POSTGRES_PERCENTILES = text(
+    "SELECT percentile_cont(CAST(:q AS float8[])) WITHIN GROUP (ORDER BY price) "
+    "FROM accounts WHERE is_available AND game = :game"
+)
+
+
+async def sql_stats(conn, game: str) -> None:
+    """Процентили и гистограмма цен игры запросами к БД"""
+    available = [Account.is_available.is_(True), Account.game == game]
+    count, low, high = (
+        await conn.execute(
+            select(func.count(), func.min(Account.price), func.max(Account.price)).where(*available)
+        )
+    ).one()
+
+    if conn.dialect.name == "postgresql":
+        await conn.execute(
+            POSTGRES_PERCENTILES, {"q": [p / 100 for p in PERCENTILES], "game": game}
+        )
+        bucket = func.width_bucket(Account.price, low, high, BINS)
+    else:
+        for p in PERCENTILES:
+            offset = int(p / 100 * (count - 1))
+            await conn.execute(
+                select(Account.price)
+                .where(*available)
+                .order_by(Account.price)
+                .offset(offset)
+                .limit(2)
+            )
+        width = (high - low) / BINS
+        bucket = case(
+            (Account.price >= high, BINS - 1), else_=cast((Account.price - low) / width, Integer)
+        )
+    await conn.execute(select(bucket, func.count()).where(*available).group_by(bucket))
+
+
+async def main(rows: int) -> None:
+    engine = await create_bench_engine()
+    await seed_accounts(engine, rows)
+    print(f"Строк в каталоге: {rows}, БД: {engine.dialect.name}")
+
+    index = PriceIndex(settle=0)
+    async with engine.connect() as conn:
+        started = time.perf_counter()
+        # AsyncSession не нужен: индексу достаточно execute/stream соединения
+        await index.load(conn)
+        print(f"Загрузка индекса: {(time.perf_counter() - started) * 1000:.0f} мс, {index.stats()}")
+
+        print(f"{'игра':>20} {'SQL, мс':>10} {'NumPy, мс':>10} {'строк':>8}")
+        for game in GAMES:
+            prices = index.get(game).prices
+
+            async def numpy_stats():
+                price_stats(prices, BINS, 5000.0)
+
+            sql_ms = await measure(lambda: sql_stats(conn, game), repeat=5)
+            numpy_ms = await measure(numpy_stats, repeat=50)
+            print(f"{game:>20} {sql_ms:>10.2f} {numpy_ms:>10.3f} {prices.size:>8}")
+
+        # Догон изменений: CHANGES аккаунтов меняют цену и доступность
+        ids = random.sample(range(1, rows + 1), CHANGES)
+        await conn.execute(
+            update(Account)
+            .where(Account.id.in_(ids))
+            .values(
+                price=Account.price + 1,
+                is_available=~Account.is_available,
+                updated_at=datetime.utcnow(),
+            )
+        )
+        await conn.commit()
+        started = time.perf_counter()
+        await index.refresh(conn)
+        print(f"Догон {CHANGES} изменений: {(time.perf_counter() - started) * 1000:.1f} мс")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000))
@@ -0,0 +1,114 @@
+"""
+Авторизация и поиск пользователя по telegram_id: с кэшем и без
+
+Запуск: python -m benchmarks.user_lookup [пользователей] [запросов]
+
+Каждый запрос проверяет подпись данных Telegram и находит пользователя
+по telegram_id: без кэша — отдельным SELECT, как раньше, с кэшем — через
+get_user_by_telegram. Каждый десятый запрос — несуществующий telegram_id
+(проверяется отрицательное кэширование). Нужен .env, как и приложению.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import random
+import sys
+import time
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.auth.telegram import verify_telegram_data
+from app.models import User
+from app.schemas.user import User as UserSchema
+from app.services.user_cache import get_user_by_telegram, user_cache
+
+from .common import create_bench_engine, measure
+
+BOT_TOKEN = "bench:token"
+TELEGRAM_ID_OFFSET = 100000
+
+
+def signed_auth_data(telegram_id: int) -> dict:
+    """Данные авторизации Telegram с корректной подписью"""
+    data = {"id": str(telegram_id), "first_name": "bench", "auth_date": str(int(time.time()))}
+    check_string = "\n".join(f"{k}={v}" for k, v in sorted(data.items()))
+    secret = hashlib.sha256(BOT_TOKEN.encode()).digest()
+    data["hash"] = hmac.new(secret, check_string.encode(), hashlib.sha256).hexdigest()
+    return data
+
+
+async def uncached_lookup(db, telegram_id: int):
+    """Прежний путь: SELECT на каждый запрос"""
+    query = select(User).where(User.telegram_id == telegram_id)
+    user = (await db.execute(query)).scalar_one_or_none()
+    return None if user is None else UserSchema.model_validate(user).model_dump(mode="json")
+
+
+async def main(users: int, requests: int) -> None:
+    engine = await create_bench_engine()
+    async with engine.begin() as conn:
+        rows = [
+            {"telegram_id": TELEGRAM_ID_OFFSET + i, "username": f"user{i}"} for i in range(users)
+        ]
+        await conn.execute(insert(User.__table__), rows)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    queries = {"count": 0}
+
+    def count_query(*args):
+        queries["count"] += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_query)
+
+    random.seed(42)
+    # Горячие пользователи встречаются чаще: 80% запросов к 20% пользователей
+    hot = max(1, users // 5)
+    telegram_ids = []
+    for i in range(requests):
+        if i % 10 == 9:
+            telegram_ids.append(random.randint(1, TELEGRAM_ID_OFFSET - 1))
+        elif random.random() < 0.8:
+            telegram_ids.append(TELEGRAM_ID_OFFSET + random.randrange(hot))
+        else:
+            telegram_ids.append(TELEGRAM_ID_OFFSET + random.randrange(users))
+    payloads = [signed_auth_data(telegram_id) for telegram_id in telegram_ids]
+
+    def make_run(lookup):
+        async def run():
+            async with session_factory() as db:
+                for data in payloads:
+                    data = dict(data)
+                    assert verify_telegram_data(data, BOT_TOKEN)
+                    await lookup(db, int(data["id"]))
+
+        return run
+
+    # Результаты обоих путей должны совпадать
+    async with session_factory() as db:
+        for telegram_id in telegram_ids[:200]:
+            expected = await uncached_lookup(db, telegram_id)
+            assert await get_user_by_telegram(db, telegram_id) == expected
+    user_cache.clear()
+
+    print(f"users={users} requests={requests}")
+    for name, lookup in [("select", uncached_lookup), ("cache", get_user_by_telegram)]:
+        queries["count"] = 0
+        user_cache.clear()
+        await make_run(lookup)()
+        cold = queries["count"]
+        elapsed = await measure(make_run(lookup), repeat=5)
+        print(
+            f"{name:>7}: {elapsed:8.1f} ms на {requests} запросов "
+            f"({elapsed * 1000 / requests:6.1f} мкс/запрос), запросов к БД в первом проходе: {cold}"
+        )
+    print(f"кэш: {user_cache.stats()}")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    requests = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    asyncio.run(main(users, requests))
@@ -6,7 +6,8 @@ import json
 import logging
 from typing import Any, Dict, Optional
 
-from config import BOT_TOKEN, WEBAPP_URL
+import httpx
+from config import API_URL, BOT_TOKEN, WEBAPP_URL
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update, WebAppInfo
 from telegram.ext import Application, CommandHandler, ContextTypes, MessageHandler, filters
 
@@ -33,6 +34,33 @@ def get_main_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(keyboard)
 
 
+async def fetch_profile_stats(telegram_id: int) -> Dict[str, Any]:
+    """
+    Статистика профиля из API бэкенда
+
+    Число успешных сделок берется из истории сделок пользователя
+    (обе стороны, status=completed), рейтинг и число отзывов — из профиля;
+    незарегистрированному пользователю возвращаются нули.
+    """
+    stats = {"completed_deals": 0, "rating": 0.0, "rating_count": 0}
+    async with httpx.AsyncClient(base_url=API_URL, timeout=5.0) as client:
+        response = await client.get(f"/users/telegram/{telegram_id}")
+        if response.status_code == 404:
+            return stats
+        response.raise_for_status()
+        user = response.json()
+        stats["rating"] = user["rating"]
+        stats["rating_count"] = user["rating_count"]
+
+        response = await client.get(
+            f"/users/{user['id']}/deals",
+            params={"status": "completed", "limit": 1, "include_total": "true"},
+        )
+        response.raise_for_status()
+        stats["completed_deals"] = response.json()["total"]
+    return stats
+
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Обработка команды /start"""
     try:
@@ -95,15 +123,16 @@ async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         user_id = update.effective_user.id
         user = update.effective_user
         logger.info(f"Получена команда /profile от пользователя {user_id}")
+        stats = await fetch_profile_stats(user_id)
 
         profile_text = (
             f"👤 Профиль пользователя {user.first_name}\n\n"
             f"🆔 ID: {user_id}\n"
             f"👤 Username: @{user.username or 'не указан'}\n\n"
             "📊 Статистика:\n"
-            "💰 Успешных сделок: 0\n"
-            "⭐ Рейтинг: 0.0/5.0\n"
-            "📝 Отзывов получено: 0\n\n"
+            f"💰 Успешных сделок: {stats['completed_deals']}\n"
+            f"⭐ Рейтинг: {stats['rating']:.1f}/5.0\n"
+            f"📝 Отзывов получено: {stats['rating_count']}\n\n"
             "🔍 Для просмотра подробной статистики и истории сделок\n"
             "используйте мини-приложение 👇"
         )
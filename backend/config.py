@@ -13,6 +13,9 @@ if not BOT_TOKEN:
 # URL веб-приложения
 WEBAPP_URL = os.getenv('WEBAPP_URL', 'https://trustytradelast.vercel.app/')
 
+# Адрес API бэкенда (статистика профиля)
+API_URL = os.getenv('API_URL', 'http://localhost:8000/api/v1')
+
 # Настройки сервера
 HOST = os.getenv('HOST', '0.0.0.0')
 PORT = int(os.getenv('PORT', 8443))
@@ -0,0 +1,66 @@
+"""accounts_sqlite_autoincrement
+
+Revision ID: 1a7c3e9f5b20
+Revises: b5d1e9f3a2c8
+Create Date: 2026-10-18 10:24:13.502817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1a7c3e9f5b20'
+down_revision = 'b5d1e9f3a2c8'
+branch_labels = None
+depends_on = None
+
+
+def _rebuild_accounts(autoincrement: bool) -> None:
+    """
+    Пересоздает таблицу accounts в SQLite с AUTOINCREMENT или без него
+
+    Индексы переносит batch-режим Alembic; триггеры FTS5 удаляются вместе
+    со старой таблицей, поэтому их DDL сохраняется до пересоздания и
+    выполняется заново. ID строк не меняются, поэтому accounts_fts остается верным.
+    """
+    triggers = op.get_bind().execute(sa.text(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'accounts'"
+    )).scalars().all()
+    with op.batch_alter_table('accounts', recreate='always',
+                              table_kwargs={'sqlite_autoincrement': autoincrement}):
+        pass
+    for trigger in triggers:
+        op.execute(trigger)
+
+
+def upgrade() -> None:
+    # Сделка ссылается на аккаунт без внешнего ключа: аккаунт может быть в архиве.
+    # Без AUTOINCREMENT SQLite выдает новой строке max(id) + 1, и ID аккаунта,
+    # ушедшего в архив, достался бы новому аккаунту. В PostgreSQL
+    # последовательность назад не идет, менять нечего
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    _rebuild_accounts(autoincrement=True)
+    # Счетчик начинается после всех выданных ID, включая архивные. Строки
+    # в sqlite_sequence нет, если таблица была пустой
+    op.execute("""
+        INSERT INTO sqlite_sequence (name, seq)
+        SELECT 'accounts', 0
+        WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'accounts')
+    """)
+    op.execute("""
+        UPDATE sqlite_sequence
+        SET seq = max(seq,
+                      coalesce((SELECT max(id) FROM accounts), 0),
+                      coalesce((SELECT max(id) FROM accounts_archive), 0))
+        WHERE name = 'accounts'
+    """)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    _rebuild_accounts(autoincrement=False)
@@ -0,0 +1,39 @@
+"""add_accounts_catalog_filters
+
+Revision ID: 5b7d09e1c2a4
+Revises: a84e6b2c7f13
+Create Date: 2026-10-17 13:05:52.611027
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7d09e1c2a4'
+down_revision = 'a84e6b2c7f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('accounts', sa.Column('seller_rating', sa.Float(), nullable=True))
+
+    # Переносим рейтинг продавца из JSON в отдельную колонку
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("UPDATE accounts SET seller_rating = (seller->>'rating')::float")
+    else:
+        op.execute("UPDATE accounts SET seller_rating = json_extract(seller, '$.rating')")
+
+    op.create_index('ix_accounts_available_game_price', 'accounts',
+                    ['is_available', 'game', 'price'], unique=False)
+    op.create_index('ix_accounts_seller_rating_available', 'accounts', ['seller_rating'],
+                    unique=False,
+                    postgresql_where=sa.text('is_available IS true'),
+                    sqlite_where=sa.text('is_available IS 1'))
+
+
+def downgrade() -> None:
+    op.drop_index('ix_accounts_seller_rating_available', table_name='accounts')
+    op.drop_index('ix_accounts_available_game_price', table_name='accounts')
+    op.drop_column('accounts', 'seller_rating')
@@ -0,0 +1,77 @@
+"""add_accounts_search
+
+Revision ID: a84e6b2c7f13
+Revises: 3c1f2a9d4e01
+Create Date: 2026-10-17 11:40:05.817342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a84e6b2c7f13'
+down_revision = '3c1f2a9d4e01'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("""
+            ALTER TABLE accounts ADD COLUMN search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(game, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(description, '')), 'B')
+            ) STORED
+        """)
+        op.create_index('ix_accounts_search_vector', 'accounts', ['search_vector'],
+                        unique=False, postgresql_using='gin')
+        op.create_index('ix_accounts_title_trgm', 'accounts', ['title'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+        return
+
+    # SQLite: внешний FTS5-индекс, синхронизируемый триггерами
+    op.execute("""
+        CREATE VIRTUAL TABLE accounts_fts USING fts5(
+            title, game, description,
+            content='accounts', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER accounts_fts_ai AFTER INSERT ON accounts BEGIN
+            INSERT INTO accounts_fts(rowid, title, game, description)
+            VALUES (new.id, new.title, new.game, new.description);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER accounts_fts_ad AFTER DELETE ON accounts BEGIN
+            INSERT INTO accounts_fts(accounts_fts, rowid, title, game, description)
+            VALUES ('delete', old.id, old.title, old.game, old.description);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER accounts_fts_au AFTER UPDATE ON accounts BEGIN
+            INSERT INTO accounts_fts(accounts_fts, rowid, title, game, description)
+            VALUES ('delete', old.id, old.title, old.game, old.description);
+            INSERT INTO accounts_fts(rowid, title, game, description)
+            VALUES (new.id, new.title, new.game, new.description);
+        END
+    """)
+    op.execute("INSERT INTO accounts_fts(accounts_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_accounts_title_trgm', table_name='accounts')
+        op.drop_index('ix_accounts_search_vector', table_name='accounts')
+        op.drop_column('accounts', 'search_vector')
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS accounts_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS accounts_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS accounts_fts_ai")
+    op.execute("DROP TABLE IF EXISTS accounts_fts")
@@ -0,0 +1,68 @@
+"""add_accounts_seller_id
+
+Revision ID: e91d3b7a5c28
+Revises: c2e8f4a61b95
+Create Date: 2026-10-17 15:48:36.274190
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e91d3b7a5c28'
+down_revision = 'c2e8f4a61b95'
+branch_labels = None
+depends_on = None
+
+POSTGRES_BACKFILL = """
+UPDATE accounts AS a
+SET seller_id = u.id,
+    seller = json_build_object('id', u.id, 'name', u.username, 'rating', u.rating),
+    seller_rating = u.rating
+FROM users AS u
+WHERE u.id = (a.seller->>'id')::int
+"""
+
+SQLITE_BACKFILL = """
+UPDATE accounts
+SET seller_id = (SELECT u.id FROM users AS u
+                 WHERE u.id = json_extract(accounts.seller, '$.id'))
+"""
+
+SQLITE_REFRESH = """
+UPDATE accounts
+SET seller = (SELECT json_object('id', u.id, 'name', u.username, 'rating', u.rating)
+              FROM users AS u WHERE u.id = accounts.seller_id),
+    seller_rating = (SELECT u.rating FROM users AS u WHERE u.id = accounts.seller_id)
+WHERE seller_id IS NOT NULL
+"""
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    is_postgres = bind.dialect.name == 'postgresql'
+
+    op.add_column('accounts', sa.Column('seller_id', sa.Integer(), nullable=True))
+    # SQLite не умеет добавлять ограничения через ALTER, там связь держит только ORM
+    if is_postgres:
+        op.create_foreign_key('fk_accounts_seller_id_users', 'accounts', 'users',
+                              ['seller_id'], ['id'], ondelete='SET NULL')
+
+    # Одним UPDATE: миграция и так выполняется в одной транзакции, и деление
+    # на пачки не отпустило бы блокировки строк раньше ее конца
+    if is_postgres:
+        op.execute(POSTGRES_BACKFILL)
+    else:
+        op.execute(SQLITE_BACKFILL)
+        op.execute(SQLITE_REFRESH)
+
+    op.create_index('ix_accounts_seller_id_created_at', 'accounts',
+                    ['seller_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_accounts_seller_id_created_at', table_name='accounts')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_constraint('fk_accounts_seller_id_users', 'accounts', type_='foreignkey')
+    op.drop_column('accounts', 'seller_id')
@@ -0,0 +1,118 @@
+"""
+Тесты сделок на SQLite: число запросов ?expand= и параллельные покупки
+
+Запуск из папки backend: python -m pytest test_deals.py
+Данные и способы загрузки страниц общие с бенчмарками (benchmarks/).
+"""
+
+import os
+
+# Настройки приложения читаются при импорте, поэтому задаются до него
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("BOT_TOKEN", "test:token")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("WEBAPP_URL", "http://localhost")
+
+import asyncio  # noqa: E402
+
+import pytest  # noqa: E402
+import pytest_asyncio  # noqa: E402
+from sqlalchemy import event, func, insert, select  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker  # noqa: E402
+
+from app.models import Account, Deal, User  # noqa: E402
+from app.schemas.deal import DealCreate  # noqa: E402
+from app.services.deals import open_deal  # noqa: E402
+from benchmarks.common import create_bench_engine  # noqa: E402
+from benchmarks.deals_concurrency import buy  # noqa: E402
+from benchmarks.deals_expand import (  # noqa: E402
+    EXPECTED_QUERIES,
+    expanded_page,
+    lazy_page,
+    seed_deals,
+)
+
+DEALS = 1000
+BUYERS = 20
+
+
+@pytest_asyncio.fixture
+async def deals_engine():
+    """SQLite в памяти со сделками по аккаунтам каталога и архива"""
+    engine = await create_bench_engine("sqlite+aiosqlite:///:memory:")
+    await seed_deals(engine, DEALS)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("limit", [10, 100, 1000])
+async def test_expand_loads_page_in_fixed_number_of_queries(deals_engine, limit):
+    """Страница со всеми связями грузится одним запросом и совпадает с ленивой загрузкой"""
+    session_factory = async_sessionmaker(deals_engine, expire_on_commit=False)
+    queries = []
+    event.listen(
+        deals_engine.sync_engine, "before_cursor_execute", lambda *args: queries.append(args[2])
+    )
+
+    async with session_factory() as db:
+        expanded = await expanded_page(db, limit)
+    expand_queries = len(queries)
+    async with session_factory() as db:
+        lazy = await lazy_page(db, limit)
+
+    assert len(expanded) == limit
+    assert expand_queries == EXPECTED_QUERIES
+    assert expanded == lazy
+
+
+@pytest_asyncio.fixture
+async def file_engine(tmp_path):
+    """
+    SQLite в файле: у каждой сессии свое соединение
+
+    In-memory SQLite не подходит — все сессии делили бы одно соединение.
+    """
+    engine = await create_bench_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'deals.db'}", connect_args={"timeout": 60}
+    )
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), [{"telegram_id": i, "username": f"u{i}"} for i in (1, 2)])
+    yield engine
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_parallel_purchases_create_exactly_one_deal(file_engine):
+    """Из параллельных покупок одного аккаунта проходит ровно одна"""
+    session_factory = async_sessionmaker(file_engine, expire_on_commit=False)
+    async with file_engine.begin() as conn:
+        account_id = (
+            await conn.execute(
+                insert(Account)
+                .values(title="stress", game="Dota 2", price=100.0, is_available=True)
+                .returning(Account.id)
+            )
+        ).scalar()
+
+    results = await asyncio.gather(
+        *[
+            buy(
+                session_factory,
+                open_deal,
+                DealCreate(seller_id=1, buyer_id=2, account_id=account_id),
+            )
+            for _ in range(BUYERS)
+        ]
+    )
+
+    async with file_engine.connect() as conn:
+        deals = await conn.scalar(
+            select(func.count()).select_from(Deal).where(Deal.account_id == account_id)
+        )
+        is_available = await conn.scalar(
+            select(Account.is_available).where(Account.id == account_id)
+        )
+    assert results.count("ok") == 1
+    assert deals == 1
+    assert is_available is False
@@ -0,0 +1,92 @@
+"""
+Тесты догона изменений индекса похожих объявлений на SQLite
+
+Запуск из папки backend: python -m pytest test_similarity.py
+"""
+
+import os
+
+# Настройки приложения читаются при импорте, поэтому задаются до него
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("BOT_TOKEN", "test:token")
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ.setdefault("WEBAPP_URL", "http://localhost")
+
+import asyncio  # noqa: E402
+from datetime import datetime, timedelta  # noqa: E402
+
+import pytest  # noqa: E402
+import pytest_asyncio  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+from app.models import Account  # noqa: E402
+from app.utils.similarity import SimilarityIndex  # noqa: E402
+from benchmarks.common import create_bench_engine  # noqa: E402
+
+SETTLE = 0.5
+
+
+@pytest_asyncio.fixture
+async def engine():
+    engine = await create_bench_engine("sqlite+aiosqlite:///:memory:")
+    yield engine
+    await engine.dispose()
+
+
+async def add_account(engine, title: str, updated_at: datetime) -> int:
+    async with engine.begin() as conn:
+        return (
+            await conn.execute(
+                insert(Account)
+                .values(
+                    title=title,
+                    game="Dota 2",
+                    price=100.0,
+                    is_available=True,
+                    updated_at=updated_at,
+                )
+                .returning(Account.id)
+            )
+        ).scalar()
+
+
+def found(index: SimilarityIndex, title: str) -> set:
+    return {account_id for account_id, _ in index.similar(title, None, "Dota 2", 10)}
+
+
+@pytest.mark.asyncio
+async def test_refresh_picks_up_row_committed_after_newer_one(engine):
+    """Строка, зафиксированная после более новой, не теряется за водяным знаком"""
+    index = SimilarityIndex(max_delta=100, settle=SETTLE)
+    async with engine.connect() as conn:
+        await index.load(conn)
+
+        started = datetime.utcnow()
+        newer = await add_account(engine, "immortal rank carry", started)
+        await index.refresh(conn)
+        # Транзакция, начатая раньше, фиксируется позже с более ранним updated_at
+        older = await add_account(engine, "immortal rank support", started - timedelta(seconds=0.1))
+        await asyncio.sleep(SETTLE + 0.1)
+        await index.refresh(conn)
+
+    assert {newer, older} <= found(index, "immortal rank")
+
+
+@pytest.mark.asyncio
+async def test_discard_during_load_is_kept(engine):
+    """Удаление, отмеченное во время полной загрузки, применяется следующим refresh()"""
+    old = datetime.utcnow() - timedelta(seconds=10)
+    removed = await add_account(engine, "ancient divine mid", old)
+    kept = await add_account(engine, "ancient divine offlane", old)
+    index = SimilarityIndex(max_delta=100, settle=SETTLE)
+
+    async def discard():
+        index.discard(removed)
+
+    async with engine.connect() as conn:
+        # load() доходит до первого await, после чего отмечается удаление
+        await asyncio.gather(index.load(conn), discard())
+        assert removed in found(index, "mid offlane")
+        await index.refresh(conn)
+
+    assert found(index, "mid offlane") == {kept}